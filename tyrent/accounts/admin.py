@@ -1,15 +1,34 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from core.admin_tools import EstimatedCountPaginator
+from core.csv_export import CSVExportMixin
 from .models import User, TenantProfile, LandlordProfile, VacantHouse
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(CSVExportMixin, BaseUserAdmin):
     list_display = ('full_name', 'username', 'email', 'role', 'status', 'verification_status', 'is_staff', 'created_at')
     list_filter = ('role', 'status', 'verification_status', 'is_staff', 'is_superuser')
-    search_fields = ('username', 'email', 'full_name', 'phone_number')
+    # Each backed by an index on UPPER(column), see User.Meta.indexes.
+    search_fields = ('username', 'email', 'full_name', '=phone_number')
     ordering = ('-created_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ('created_at', 'updated_at', 'verification_date')
+    export_columns = [
+        ('id', 'pk'),
+        ('username', 'username'),
+        ('full_name', 'full_name'),
+        ('email', 'email'),
+        ('phone_number', 'phone_number'),
+        ('role', 'role'),
+        ('status', 'status'),
+        ('verification_status', 'verification_status'),
+        ('is_active', 'is_active'),
+        ('is_staff', 'is_staff'),
+        ('date_joined', 'date_joined'),
+        ('last_login', 'last_login'),
+    ]
 
     fieldsets = (
         ('Login Info', {
@@ -43,13 +62,19 @@ class UserAdmin(BaseUserAdmin):
 @admin.register(TenantProfile)
 class TenantProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'current_address', 'preferred_location', 'occupation')
+    # Each backed by a trigram index, see User.Meta and TenantProfile.Meta.
     search_fields = ('user__full_name', 'user__email', 'preferred_location')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
 
 
 @admin.register(LandlordProfile)
 class LandlordProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'property_name', 'company_name', 'business_permit_number', 'national_id')
-    search_fields = ('user__full_name', 'company_name', 'business_permit_number')
+    # Each backed by a trigram index, see User.Meta and LandlordProfile.Meta.
+    search_fields = ('user__full_name', 'user__email', 'company_name', 'business_permit_number')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
 
 
 @admin.register(VacantHouse)
@@ -58,4 +83,8 @@ class VacantHouseAdmin(admin.ModelAdmin):
     list_filter = ('is_available', 'created_at')
     search_fields = ('title', 'landlord__user__full_name', 'address')
     readonly_fields = ('created_at', 'updated_at')
+    list_select_related = ('landlord__user',)
+    autocomplete_fields = ('landlord',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
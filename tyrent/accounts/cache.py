@@ -0,0 +1,88 @@
+"""
+Cached request.user. The User row is stored together with its landlord and
+tenant profiles (select_related fills both reverse one-to-ones, including
+"no profile"), so request.user.landlord_profile / tenant_profile need no
+query either. Any save or delete of the user or a profile drops the entry,
+as does logging out.
+
+Only used when settings.USER_CACHE_ENABLED, i.e. with a cache shared by
+every worker; a per-process cache cannot see other workers' invalidations.
+"""
+from django.contrib.auth import get_user_model, user_logged_out
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import LandlordProfile, TenantProfile
+
+# Bump when User or the profile models change shape, so entries pickled by
+# the previous release are ignored instead of unpickled into the new model.
+USER_CACHE_VERSION = 1
+
+# Safety net only: writes invalidate the entry explicitly.
+USER_CACHE_TIMEOUT = 300
+
+
+def user_cache_key(user_id):
+    return f'accounts:user:v{USER_CACHE_VERSION}:{user_id}'
+
+
+def _users():
+    User = get_user_model()
+    return User._default_manager.select_related('landlord_profile', 'tenant_profile')
+
+
+def load_user(user_id):
+    """The user with both profiles joined in, straight from the DB; None if missing."""
+    return _users().filter(pk=user_id).first()
+
+
+async def aload_user(user_id):
+    return await _users().filter(pk=user_id).afirst()
+
+
+def get_cached_user(user_id):
+    return cache.get(user_cache_key(user_id))
+
+
+async def aget_cached_user(user_id):
+    return await cache.aget(user_cache_key(user_id))
+
+
+def cache_user(user):
+    cache.set(user_cache_key(user.pk), user, USER_CACHE_TIMEOUT)
+
+
+async def acache_user(user):
+    await cache.aset(user_cache_key(user.pk), user, USER_CACHE_TIMEOUT)
+
+
+def forget_user(user_id):
+    """Drop the entry now and again once the current transaction commits."""
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+# ---------- INVALIDATION ----------
+
+@receiver(post_save, sender='accounts.User')
+@receiver(post_delete, sender='accounts.User')
+def forget_user_on_change(sender, instance, **kwargs):
+    # Covers password changes too: set_password() is followed by save().
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=LandlordProfile)
+@receiver(post_delete, sender=LandlordProfile)
+@receiver(post_save, sender=TenantProfile)
+@receiver(post_delete, sender=TenantProfile)
+def forget_user_on_profile_change(sender, instance, **kwargs):
+    forget_user(instance.user_id)
+
+
+@receiver(user_logged_out)
+def forget_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
@@ -0,0 +1,85 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .cache import acache_user, aget_cached_user, aload_user, cache_user, get_cached_user, load_user
+
+
+def _still_valid(user, backend_path, session_hash):
+    """Whether a cached user may stand in for the session without a DB check."""
+    return (
+        user is not None and user.is_active and backend_path in settings.AUTHENTICATION_BACKENDS
+        and session_hash and constant_time_compare(session_hash, user.get_session_auth_hash())
+    )
+
+
+def get_user(request):
+    """
+    Like django.contrib.auth.get_user(), but served from the user cache when
+    the session's auth hash still matches. Misses, and anything the fast path
+    does not vouch for, go through Django's own checks (which also flush
+    sessions invalidated by a password change) before the entry is refilled.
+    Without settings.USER_CACHE_ENABLED this is just auth.get_user().
+    """
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None or not settings.USER_CACHE_ENABLED:
+        return auth.get_user(request)
+
+    user = get_cached_user(user_id)
+    if _still_valid(user, request.session.get(BACKEND_SESSION_KEY), request.session.get(HASH_SESSION_KEY)):
+        return user
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        # Reload with the profiles joined so one entry answers both.
+        user = load_user(user.pk) or user
+        cache_user(user)
+    return user
+
+
+async def aget_user(request):
+    """get_user() for async views, using the async session, cache and ORM APIs."""
+    user_id = await request.session.aget(SESSION_KEY)
+    if user_id is None or not settings.USER_CACHE_ENABLED:
+        return await auth.aget_user(request)
+
+    user = await aget_cached_user(user_id)
+    backend_path = await request.session.aget(BACKEND_SESSION_KEY)
+    if _still_valid(user, backend_path, await request.session.aget(HASH_SESSION_KEY)):
+        return user
+
+    user = await auth.aget_user(request)
+    if user.is_authenticated:
+        user = await aload_user(user.pk) or user
+        await acache_user(user)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware with request.user and request.auser() read
+    through accounts.cache. Both fill the same per-request slot, so a view
+    that awaited auser() can hand request.user to a template for free.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _cached_get_user(request))
+        request.auser = partial(_acached_get_user, request)
+
+
+def _cached_get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+async def _acached_get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = await aget_user(request)
+    return request._cached_user
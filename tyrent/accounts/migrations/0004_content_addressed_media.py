@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:37
+
+import accounts.models
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_vacanthouse'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vacanthouse',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.get_content_storage, upload_to=accounts.models.house_image_upload_path),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:59
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='landlordprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('company_name', models.TextField())), name='gin_trgm_ops'), name='landlord_company_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='landlordprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('business_permit_number', models.TextField())), name='gin_trgm_ops'), name='landlord_permit_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='tenantprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('preferred_location', models.TextField())), name='gin_trgm_ops'), name='tenant_location_trgm'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 import uuid
+from core.indexes import icontains_index, iexact_index
+from core.storage import get_content_storage
 
 # ------------------- CUSTOM USER -------------------
 
@@ -49,6 +51,16 @@ class User(AbstractUser):
 
     REQUIRED_FIELDS = ['email', 'full_name', 'phone_number']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Admin changelist default order and search_fields
+            models.Index(fields=['-created_at'], name='user_created_recent_idx'),
+            icontains_index('username', 'user_username_trgm'),
+            icontains_index('email', 'user_email_trgm'),
+            icontains_index('full_name', 'user_full_name_trgm'),
+            iexact_index('phone_number', 'user_phone_upper_idx'),
+        ]
+
     def __str__(self):
         return f"{self.full_name} ({self.role})"
 
@@ -61,6 +73,11 @@ class TenantProfile(models.Model):
     preferred_location = models.CharField(max_length=255, null=True, blank=True)
     occupation = models.CharField(max_length=100, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            icontains_index('preferred_location', 'tenant_location_trgm'),
+        ]
+
     def __str__(self):
         return f"Tenant Profile: {self.user.full_name}"
 
@@ -75,6 +92,12 @@ class LandlordProfile(models.Model):
     address = models.CharField(max_length=255, null=True, blank=True)
     national_id = models.CharField(max_length=20, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            icontains_index('company_name', 'landlord_company_trgm'),
+            icontains_index('business_permit_number', 'landlord_permit_trgm'),
+        ]
+
     def __str__(self):
         return f"Landlord Profile: {self.user.full_name}"
 
@@ -96,7 +119,7 @@ class VacantHouse(models.Model):
     )
     title = models.CharField(max_length=255)
     description = models.TextField()
-    image = models.ImageField(upload_to=house_image_upload_path, null=True, blank=True)
+    image = models.ImageField(upload_to=house_image_upload_path, storage=get_content_storage, null=True, blank=True)
     address = models.CharField(max_length=255, blank=True)
     rent_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     is_available = models.BooleanField(default=True)
@@ -107,6 +130,11 @@ class VacantHouse(models.Model):
         ordering = ['-created_at']
         verbose_name = "Vacant House"
         verbose_name_plural = "Vacant Houses"
+        indexes = [
+            models.Index(fields=['-created_at'], name='vacanthouse_recent_idx'),
+            icontains_index('title', 'vacanthouse_title_trgm'),
+            icontains_index('address', 'vacanthouse_address_trgm'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.landlord.user.full_name}"
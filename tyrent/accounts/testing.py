@@ -0,0 +1,18 @@
+"""Test data helpers shared by the apps' test suites."""
+from .models import User
+
+
+def make_landlord(**fields):
+    """The 'landlord' user (password 'pass'); keyword arguments override the defaults."""
+    fields = {
+        'username': 'landlord', 'email': 'landlord@example.com', 'password': 'pass',
+        'full_name': 'Land Lord', 'role': 'LANDLORD', **fields,
+    }
+    return User.objects.create_user(**fields)
+
+
+def make_tenant(i=0):
+    return User.objects.create_user(
+        username=f'tenant{i}', email=f'tenant{i}@example.com', password='pass',
+        full_name=f'Tenant {i}', role='TENANT',
+    )
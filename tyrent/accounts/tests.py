@@ -1,3 +1,87 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .cache import get_cached_user
+from .models import LandlordProfile, User
+from .testing import make_landlord
+
+
+@override_settings(
+    USER_CACHE_ENABLED=True, SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+)
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(
+            username='cached-landlord', email='cached-landlord@example.com', password=None,
+            full_name='Cached Landlord', role='LANDLORD',
+        )
+        cls.profile = LandlordProfile.objects.create(user=cls.landlord, company_name='Before')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.landlord)
+        self.url = reverse('landlord_setup')
+
+    def test_warm_request_resolves_user_and_profile_without_queries(self):
+        with self.assertNumQueries(2):  # user, then user joined with profiles
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('landlord_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(get_cached_user(self.landlord.pk).landlord_profile.company_name, 'Before')
+
+    def test_profile_save_invalidates_entry(self):
+        self.client.get(self.url)
+        self.profile.company_name = 'After'
+        self.profile.save()
+        self.assertIsNone(get_cached_user(self.landlord.pk))
+
+        self.client.get(self.url)
+        self.assertEqual(get_cached_user(self.landlord.pk).landlord_profile.company_name, 'After')
+
+    def test_missing_profile_is_cached_too(self):
+        self.profile.delete()
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'accounts/landlord_setup.html')
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.get(self.url)
+        self.landlord.set_password('a-new-password')
+        self.landlord.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse('login')))
+
+    def test_logout_drops_entry(self):
+        self.client.get(self.url)
+        self.assertIsNotNone(get_cached_user(self.landlord.pk))
+        self.client.post(reverse('logout'))
+        self.assertIsNone(get_cached_user(self.landlord.pk))
+
+
+@override_settings(USER_CACHE_ENABLED=False)
+class UncachedUserTests(TestCase):
+    """Without a shared cache, every request checks the session and user in the DB."""
+
+    def setUp(self):
+        cache.clear()
+        self.landlord = make_landlord()
+        self.client.force_login(self.landlord)
+        self.url = reverse('landlord_setup')
+
+    def test_user_is_not_cached(self):
+        self.client.get(self.url)
+        self.assertIsNone(get_cached_user(self.landlord.pk))
+
+    def test_deactivation_takes_effect_on_next_request(self):
+        self.client.get(self.url)
+        User.objects.filter(pk=self.landlord.pk).update(is_active=False)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse('login')))
@@ -5,11 +5,15 @@ from django.contrib import messages
 from django.http import HttpResponse
 from .forms import CustomAuthenticationForm
 from .models import User, LandlordProfile, TenantProfile
-from listings.models import Property, Apartment
+from listings.models import Property
 from listings.forms import PropertyForm, ApartmentForm, VacantHouseForm
 from bookings.models import Booking
+from listings.portfolio import apartment_page, portfolio
+from core.querybudget import query_budget
+from core.renditions import renditions_for_many
 
 
+@query_budget(10)
 def register(request):
     if request.method == "POST":
         username = request.POST['username']
@@ -69,21 +73,26 @@ def logout_view(request):
     return redirect('login')
 
 
+@query_budget(5)
 @login_required
 def tenant_dashboard(request):
     if request.user.role != "TENANT":
         return redirect('home')
 
     tenant_profile = request.user.tenant_profile
-    bookings = Booking.objects.filter(tenant=request.user).order_by('-created_at')
+    bookings = Booking.objects.for_tenant(request.user)
+    page = bookings.page(request.GET.get('cursor'))
 
     context = {
         'tenant': tenant_profile,
-        'bookings': bookings
+        'bookings': page,
+        'status_counts': bookings.status_counts(),
+        'next_query': page.next_query(request) if page.has_next else '',
     }
     return render(request, 'accounts/tenant_dashboard.html', context)
 
 
+@query_budget(6)
 @login_required
 def landlord_setup(request):
     if request.user.role != 'LANDLORD':
@@ -108,6 +117,7 @@ def landlord_setup(request):
     return render(request, 'accounts/landlord_setup.html')
 
 
+@query_budget(7)
 @login_required
 def landlord_dashboard(request):
     if request.user.role != 'LANDLORD':
@@ -115,7 +125,6 @@ def landlord_dashboard(request):
 
     landlord_user = request.user
     properties = Property.objects.filter(landlord=landlord_user)
-    apartments = Apartment.objects.filter(property__in=properties)
 
     property_form = PropertyForm()
     apartment_form = ApartmentForm()
@@ -154,16 +163,22 @@ def landlord_dashboard(request):
             else:
                 messages.error(request, "Please fill all fields correctly for the apartment.")
 
+    summaries, totals = portfolio(landlord_user)
+    apartments = apartment_page(landlord_user, request.GET.get('cursor'))
     context = {
         'landlord': request.user.landlord_profile,
-        'properties': properties,
+        'properties': summaries,
+        'totals': totals,
         'apartments': apartments,
+        'next_query': apartments.next_query(request) if apartments.has_next else '',
+        'image_renditions': renditions_for_many(a.image.name for a in apartments),
         'property_form': property_form,
         'apartment_form': apartment_form,
     }
     return render(request, 'accounts/landlord_dashboard.html', context)
 
 
+@query_budget(15)
 @login_required
 def upload_house(request):
     landlord = request.user.landlord_profile
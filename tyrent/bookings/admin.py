@@ -1,3 +1,38 @@
 from django.contrib import admin
+from core.admin_tools import EstimatedCountPaginator
+from core.csv_export import CSVExportMixin
+from .models import Booking
 
-# Register your models here.
+
+# ---------- Booking Admin ----------
+@admin.register(Booking)
+class BookingAdmin(CSVExportMixin, admin.ModelAdmin):
+    list_display = ('id', 'tenant', 'apartment', 'status', 'start_date', 'end_date', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('tenant__full_name', 'tenant__email')
+    list_select_related = ('tenant', 'apartment__property')
+    autocomplete_fields = ('tenant', 'apartment')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Status changes go through bookings.services (overlap checks, occupancy calendar).
+    readonly_fields = ('status', 'created_at')
+    export_columns = [
+        ('id', 'pk'),
+        ('tenant', 'tenant__full_name'),
+        ('tenant_email', 'tenant__email'),
+        ('apartment', 'apartment__title'),
+        ('unit_number', 'apartment__unit_number'),
+        ('property', 'apartment__property__title'),
+        ('landlord', 'apartment__property__landlord__full_name'),
+        ('status', 'status'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+        ('created_at', 'created_at'),
+    ]
+
+    def get_readonly_fields(self, request, obj=None):
+        # An approved booking's dates are on the occupancy calendar; moving
+        # them here would skip mark_free/mark_booked and leave it stale.
+        if obj is not None and obj.status == 'Approved':
+            return self.readonly_fields + ('apartment', 'start_date', 'end_date')
+        return self.readonly_fields
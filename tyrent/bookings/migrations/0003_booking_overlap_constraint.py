@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:40
+
+import bookings.models
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_query_indexes'),
+    ]
+
+    operations = [
+        # GiST support for the plain `apartment_id =` part of the constraint.
+        BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(condition=models.Q(('end_date__isnull', True), ('end_date__gte', models.F('start_date')), _connector='OR'), name='booking_end_after_start', violation_error_message='The end date cannot be before the start date.'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status', 'Approved')), expressions=[('apartment', '='), (bookings.models.DateRange('start_date', 'end_date'), '&&')], name='booking_approved_no_overlap', violation_error_message='The apartment is already booked for these dates.'),
+        ),
+    ]
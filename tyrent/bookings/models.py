@@ -1,10 +1,73 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeOperators
 from django.db import models
+from django.db.models import Count, F, Func, Q, Value
 from django.utils import timezone
 from django.conf import settings
+from core.pagination import CursorPaginator
 from listings.models import Apartment
 
 User = settings.AUTH_USER_MODEL
 
+
+class DateRange(Func):
+    """daterange(start, end, '[]'): both ends inclusive, a NULL end is open-ended."""
+    function = 'daterange'
+    template = "%(function)s(%(expressions)s, '[]')"
+    output_field = DateRangeField()
+
+
+# Large columns that booking lists never show.
+LIST_DEFERRED_FIELDS = (
+    'message',
+    'apartment__description', 'apartment__notes',
+    'apartment__property__description', 'apartment__property__search_vector',
+)
+
+BOOKINGS_PER_PAGE = 25
+
+
+class BookingQuerySet(models.QuerySet):
+    def approved(self):
+        return self.filter(status='Approved')
+
+    def with_related(self):
+        """Join tenant, apartment and property, as lists and __str__ need them."""
+        return self.select_related('tenant', 'apartment__property')
+
+    def for_tenant(self, user):
+        """A tenant's bookings, ready for listing."""
+        return self.filter(tenant=user).with_related().defer(*LIST_DEFERRED_FIELDS)
+
+    def for_landlord(self, user):
+        """Bookings of a landlord's apartments, ready for listing."""
+        return self.filter(apartment__property__landlord=user).with_related().defer(*LIST_DEFERRED_FIELDS)
+
+    def for_user(self, user):
+        return self.for_landlord(user) if user.role == 'LANDLORD' else self.for_tenant(user)
+
+    def page(self, cursor=None):
+        """Newest-first CursorPage of these bookings after `cursor`."""
+        return CursorPaginator(self, ordering=('-created_at', '-id'), per_page=BOOKINGS_PER_PAGE).page(cursor)
+
+    def status_counts(self):
+        """{status: count} for every status, in one grouped query."""
+        counts = dict.fromkeys((value for value, _ in Booking.STATUS_CHOICES), 0)
+        counts.update(self.order_by().values_list('status').annotate(n=Count('pk')))
+        return counts
+
+    def overlapping(self, apartment, start_date, end_date=None):
+        """
+        Approved bookings of `apartment` that overlap [start_date, end_date]
+        (end_date None = open-ended). Uses the same expression as the
+        exclusion constraint, so it is answered from that GiST index.
+        """
+        period = DateRange(Value(start_date, models.DateField()), Value(end_date, models.DateField()))
+        return self.approved().alias(period=DateRange('start_date', 'end_date')).filter(
+            apartment=apartment, period__overlap=period,
+        )
+
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
@@ -21,8 +84,34 @@ class Booking(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     created_at = models.DateTimeField(default=timezone.now)
 
+    objects = BookingQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.tenant} → {self.apartment} ({self.status})"
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Tenant dashboard / booking_list: a tenant's bookings, newest first
+            models.Index(fields=['tenant', '-created_at'], name='booking_tenant_recent_idx'),
+            # Admin changelist default order
+            models.Index(fields=['-created_at'], name='booking_recent_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(end_date__isnull=True) | Q(end_date__gte=F('start_date')),
+                name='booking_end_after_start',
+                violation_error_message="The end date cannot be before the start date.",
+            ),
+            # Two approved bookings of one apartment can never overlap, however
+            # many approvals race: Postgres rejects the second at commit.
+            ExclusionConstraint(
+                name='booking_approved_no_overlap',
+                expressions=[
+                    ('apartment', RangeOperators.EQUAL),
+                    (DateRange('start_date', 'end_date'), RangeOperators.OVERLAPS),
+                ],
+                condition=Q(status='Approved'),
+                violation_error_message="The apartment is already booked for these dates.",
+            ),
+        ]
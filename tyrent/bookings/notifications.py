@@ -0,0 +1,79 @@
+"""
+Booking emails, queued through core.outbox in the caller's transaction: a
+rolled-back booking change sends nothing.
+"""
+from django.conf import settings
+from django.urls import reverse
+
+from core.outbox import queue_email
+from .models import Booking
+
+
+def _load(booking):
+    return Booking.objects.select_related('tenant', 'apartment__property__landlord').get(pk=booking.pk)
+
+
+def _link(booking):
+    return settings.SITE_URL.rstrip('/') + reverse('booking_detail', args=[booking.pk])
+
+
+def _dates(booking):
+    return f"{booking.start_date} to {booking.end_date or 'further notice'}"
+
+
+def booking_requested(booking):
+    """Tell the landlord about a new booking request."""
+    booking = _load(booking)
+    landlord = booking.apartment.property.landlord
+    if not landlord.email:
+        return None
+    return queue_email(
+        subject=f"New booking request for {booking.apartment.title}",
+        body=(
+            f"{booking.tenant.full_name} would like to book {booking.apartment.title} "
+            f"({booking.apartment.property.title}) from {_dates(booking)}.\n\n"
+            f"Review it at {_link(booking)}\n"
+        ),
+        to=[landlord.email],
+        reply_to=[booking.tenant.email] if booking.tenant.email else (),
+        kind='booking_requested',
+    )
+
+
+def _tenant_changed(booking):
+    landlord = booking.apartment.property.landlord
+    if not landlord.email:
+        return None
+    return queue_email(
+        subject=f"Booking for {booking.apartment.title} {booking.status.lower()} by the tenant",
+        body=(
+            f"{booking.tenant.full_name} {booking.status.lower()} their booking of "
+            f"{booking.apartment.title} ({booking.apartment.property.title}) from {_dates(booking)}.\n\n"
+            f"Details: {_link(booking)}\n"
+        ),
+        to=[landlord.email],
+        reply_to=[booking.tenant.email] if booking.tenant.email else (),
+        kind=f'booking_{booking.status.lower()}_by_tenant',
+    )
+
+
+def booking_status_changed(booking, actor=None):
+    """
+    Tell the other party about an approval, rejection or cancellation:
+    the landlord when `actor` is the tenant, otherwise the tenant.
+    """
+    booking = _load(booking)
+    if actor is not None and actor.pk == booking.tenant_id:
+        return _tenant_changed(booking)
+    if not booking.tenant.email:
+        return None
+    return queue_email(
+        subject=f"Your booking for {booking.apartment.title} was {booking.status.lower()}",
+        body=(
+            f"Your booking of {booking.apartment.title} ({booking.apartment.property.title}) "
+            f"from {_dates(booking)} is now {booking.status.lower()}.\n\n"
+            f"Details: {_link(booking)}\n"
+        ),
+        to=[booking.tenant.email],
+        kind=f'booking_{booking.status.lower()}',
+    )
@@ -0,0 +1,96 @@
+"""
+Booking state changes. Approval is where double-booking is prevented:
+approvals of an apartment are serialized on its row, a pre-check reports
+the clashing booking, and the booking_approved_no_overlap exclusion
+constraint guarantees no overlap even for writes that bypass this module.
+"""
+from django.db import IntegrityError, transaction
+
+from listings.models import Apartment
+from listings.occupancy import mark_booked, mark_free
+from . import notifications
+from .models import Booking
+
+OVERLAP_CONSTRAINT = 'booking_approved_no_overlap'
+
+# status -> statuses a booking may move to it from, for set_booking_status()
+TRANSITIONS = {
+    'Rejected': ('Pending',),
+    'Cancelled': ('Pending', 'Approved'),
+}
+
+
+class BookingConflict(Exception):
+    """An approval would overlap an approved booking of the same apartment."""
+
+    def __init__(self, booking, conflict):
+        self.booking = booking
+        self.conflict = conflict
+        if conflict is not None:
+            message = (f"Apartment is already booked from {conflict.start_date} "
+                       f"to {conflict.end_date or 'open-ended'} (booking #{conflict.pk}).")
+        else:
+            message = "Apartment is already booked for these dates."
+        super().__init__(message)
+
+
+def find_conflict(apartment, start_date, end_date=None, exclude=None):
+    """First approved booking overlapping the dates, or None."""
+    bookings = Booking.objects.overlapping(apartment, start_date, end_date)
+    if exclude is not None:
+        bookings = bookings.exclude(pk=exclude.pk)
+    return bookings.order_by('start_date').first()
+
+
+def approve_booking(booking):
+    """
+    Approve a pending booking, or raise BookingConflict. Returns the
+    refreshed booking.
+    """
+    with transaction.atomic():
+        # Approvals of one apartment queue on its row. Without this, two
+        # concurrent exclusion checks can wait on each other and deadlock.
+        Apartment.objects.select_for_update().only('pk').get(pk=booking.apartment_id)
+        booking = Booking.objects.select_for_update().get(pk=booking.pk)
+        if booking.status == 'Approved':
+            return booking
+        if booking.status != 'Pending':
+            raise ValueError(f"Only pending bookings can be approved, not {booking.status.lower()} ones.")
+
+        conflict = find_conflict(booking.apartment_id, booking.start_date, booking.end_date, exclude=booking)
+        if conflict is not None:
+            raise BookingConflict(booking, conflict)
+
+        booking.status = 'Approved'
+        try:
+            with transaction.atomic():
+                booking.save(update_fields=['status'])
+        except IntegrityError as exc:
+            # Another approval committed after our pre-check.
+            if getattr(getattr(exc.__cause__, 'diag', None), 'constraint_name', None) != OVERLAP_CONSTRAINT:
+                raise
+            booking.status = 'Pending'
+            conflict = find_conflict(booking.apartment_id, booking.start_date, booking.end_date, exclude=booking)
+            raise BookingConflict(booking, conflict) from exc
+        mark_booked(booking.apartment_id, booking.start_date, booking.end_date)
+        notifications.booking_status_changed(booking)
+    return booking
+
+
+def set_booking_status(booking, status, actor=None):
+    """
+    Reject a pending booking or cancel a pending or approved one; frees its
+    dates if it was approved. The party other than `actor` is emailed.
+    Raises ValueError for any other transition.
+    """
+    with transaction.atomic():
+        booking = Booking.objects.select_for_update().get(pk=booking.pk)
+        if booking.status not in TRANSITIONS.get(status, ()):
+            raise ValueError(f"A {booking.status.lower()} booking cannot be {status.lower()}.")
+        was_approved = booking.status == 'Approved'
+        booking.status = status
+        booking.save(update_fields=['status'])
+        if was_approved and status != 'Approved':
+            mark_free(booking.apartment_id, booking.start_date, booking.end_date)
+        notifications.booking_status_changed(booking, actor=actor)
+    return booking
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from listings.occupancy import mark_free
+from .models import Booking
+
+
+@receiver(post_delete, sender=Booking)
+def free_dates_on_booking_delete(sender, instance, **kwargs):
+    if instance.status == 'Approved':
+        mark_free(instance.apartment_id, instance.start_date, instance.end_date)
@@ -1,3 +1,270 @@
-from django.test import TestCase
+import threading
+import unittest
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.messages import get_messages
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from accounts.models import TenantProfile
+from accounts.testing import make_landlord, make_tenant
+from core.models import OutboxEmail
+from core.querybudget import QueryBudgetTestMixin
+from listings.models import Property, Apartment
+from .models import BOOKINGS_PER_PAGE, Booking
+from .services import BookingConflict, approve_booking, find_conflict, set_booking_status
+
+
+def make_apartment():
+    landlord = make_landlord()
+    prop = Property.objects.create(landlord=landlord, title='Riverside Court', property_type='House', address='Ngong Road')
+    return Apartment.objects.create(property=prop, title='Unit 1', rent=25000, location='Kilimani')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Exclusion constraints need PostgreSQL")
+class BookingOverlapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.apartment = make_apartment()
+        cls.tenant = make_tenant()
+        cls.june = Booking.objects.create(
+            tenant=cls.tenant, apartment=cls.apartment, status='Approved',
+            start_date=date(2026, 6, 1), end_date=date(2026, 6, 30),
+        )
+
+    def book(self, start, end=None, status='Pending'):
+        return Booking.objects.create(tenant=self.tenant, apartment=self.apartment,
+                                      start_date=start, end_date=end, status=status)
+
+    def test_pre_check_reports_conflict(self):
+        self.assertEqual(find_conflict(self.apartment, date(2026, 6, 30), date(2026, 7, 5)), self.june)
+        self.assertEqual(find_conflict(self.apartment, date(2026, 5, 1)), self.june)  # open-ended
+        self.assertIsNone(find_conflict(self.apartment, date(2026, 7, 1), date(2026, 7, 31)))
+        self.assertIsNone(find_conflict(self.apartment, date(2026, 5, 1), date(2026, 5, 31)))
+
+    def test_approve_rejects_overlap(self):
+        booking = self.book(date(2026, 6, 15), date(2026, 7, 15))
+        with self.assertRaises(BookingConflict) as raised:
+            approve_booking(booking)
+        self.assertEqual(raised.exception.conflict, self.june)
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'Pending')
+
+    def test_approve_adjacent_booking(self):
+        booking = approve_booking(self.book(date(2026, 7, 1), date(2026, 7, 31)))
+        self.assertEqual(booking.status, 'Approved')
+
+    def test_pending_bookings_may_overlap(self):
+        self.book(date(2026, 6, 10), date(2026, 6, 20))
+        self.book(date(2026, 6, 10), date(2026, 6, 20))
+
+    def test_constraint_rejects_direct_write(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.book(date(2026, 6, 20), None, status='Approved')
+
+    def test_end_before_start_rejected(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.book(date(2026, 8, 10), date(2026, 8, 1))
+
+    def test_constraint_backs_up_pre_check(self):
+        booking = self.book(date(2026, 6, 15), date(2026, 7, 15))
+        with mock.patch('bookings.services.find_conflict', side_effect=[None, self.june]):
+            with self.assertRaises(BookingConflict) as raised:
+                approve_booking(booking)
+        self.assertEqual(raised.exception.conflict, self.june)
+
+    def test_cancelled_booking_frees_dates(self):
+        Booking.objects.filter(pk=self.june.pk).update(status='Cancelled')
+        self.assertEqual(approve_booking(self.book(date(2026, 6, 1), date(2026, 6, 30))).status, 'Approved')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Exclusion constraints need PostgreSQL")
+class BookingApprovalRaceTests(TransactionTestCase):
+    """Many landlords' clicks at once: approvals race, the database arbitrates."""
+
+    THREADS = 16
+
+    def test_concurrent_approvals_never_overlap(self):
+        apartment = make_apartment()
+        start = date(2026, 6, 1)
+        # Every request overlaps at least its neighbours; some overlap all.
+        pending = [
+            Booking.objects.create(
+                tenant=make_tenant(i), apartment=apartment,
+                start_date=start + timedelta(days=7 * i), end_date=start + timedelta(days=7 * i + 10),
+            )
+            for i in range(self.THREADS)
+        ]
+        barrier = threading.Barrier(self.THREADS)
+        outcomes = []
+
+        def approve(booking):
+            try:
+                barrier.wait()
+                approve_booking(booking)
+                outcomes.append('approved')
+            except BookingConflict:
+                outcomes.append('conflict')
+            except Exception as exc:
+                outcomes.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=approve, args=(booking,)) for booking in pending]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([o for o in outcomes if not isinstance(o, str)], [])
+        approved = list(Booking.objects.approved().order_by('start_date'))
+        self.assertEqual(len(approved), outcomes.count('approved'))
+        self.assertGreater(len(approved), 0)
+        for earlier, later in zip(approved, approved[1:]):
+            self.assertLess(earlier.end_date, later.start_date)
+
+
+class BookingListTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.apartment = make_apartment()
+        cls.landlord = cls.apartment.property.landlord
+        cls.tenant = make_tenant()
+        TenantProfile.objects.create(user=cls.tenant)
+        other = make_tenant(1)
+        statuses = ['Pending'] * 20 + ['Rejected'] * 8 + ['Cancelled'] * 2
+        Booking.objects.bulk_create([
+            Booking(tenant=cls.tenant, apartment=cls.apartment, status=status,
+                    start_date=date(2026, 6, 1), end_date=date(2026, 6, 30))
+            for status in statuses
+        ] + [Booking(tenant=other, apartment=cls.apartment, start_date=date(2026, 6, 1))])
+
+    def test_status_counts(self):
+        with self.assertNumQueries(1):
+            counts = Booking.objects.for_tenant(self.tenant).status_counts()
+        self.assertEqual(counts, {'Pending': 20, 'Approved': 0, 'Rejected': 8, 'Cancelled': 2})
+        self.assertEqual(Booking.objects.for_landlord(self.landlord).status_counts()['Pending'], 21)
+
+    def test_list_rows_need_no_extra_queries(self):
+        bookings = list(Booking.objects.for_landlord(self.landlord))
+        with self.assertNumQueries(0):
+            [str(booking) for booking in bookings]
+
+    def test_tenant_booking_list(self):
+        self.client.force_login(self.tenant)
+        response = self.client.get(reverse('booking_list'))
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(len(response.context['bookings']), BOOKINGS_PER_PAGE)
+        self.assertEqual(response.context['status_counts']['Rejected'], 8)
+
+        response = self.client.get(reverse('booking_list'), {'cursor': response.context['bookings'].next_cursor})
+        self.assertEqual(len(response.context['bookings']), 30 - BOOKINGS_PER_PAGE)
+        self.assertEqual(response.context['next_query'], '')
+
+    def test_landlord_booking_list(self):
+        self.client.force_login(self.landlord)
+        response = self.client.get(reverse('booking_list'))
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(response.context['status_counts']['Pending'], 21)
+        self.assertContains(response, 'Tenant 1')
+
+    def test_tenant_dashboard(self):
+        self.client.force_login(self.tenant)
+        response = self.client.get(reverse('tenant_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+        self.assertContains(response, 'Pending 20')
+
+    def test_booking_detail_and_confirmation(self):
+        booking = Booking.objects.filter(tenant=self.tenant).first()
+        self.client.force_login(self.tenant)
+        for name in ('booking_detail', 'booking_confirmation'):
+            response = self.client.get(reverse(name, args=[booking.pk]))
+            self.assertEqual(response.status_code, 200)
+            self.assertWithinQueryBudget(response)
+
+
+class BookingNotificationTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.apartment = make_apartment()
+        cls.landlord = cls.apartment.property.landlord
+        cls.tenant = make_tenant()
+
+    def test_booking_request_emails_landlord(self):
+        self.client.force_login(self.tenant)
+        response = self.client.post(reverse('book_apartment', args=[self.apartment.pk]), {
+            'start_date': '2026-06-01', 'end_date': '2026-06-30', 'message': 'Hello',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertWithinQueryBudget(response)
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.kind, email.to, email.reply_to),
+                         ('booking_requested', ['landlord@example.com'], ['tenant0@example.com']))
+        self.assertIn('Tenant 0', email.body)
+
+    def test_status_changes_email_tenant(self):
+        booking = Booking.objects.create(tenant=self.tenant, apartment=self.apartment, start_date=date(2026, 6, 1))
+        self.client.force_login(self.landlord)
+        response = self.client.post(reverse('approve_booking', args=[booking.pk]))
+        self.assertWithinQueryBudget(response)
+        response = self.client.post(reverse('cancel_booking', args=[booking.pk]))
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(
+            list(OutboxEmail.objects.order_by('pk').values_list('kind', 'to')),
+            [('booking_approved', ['tenant0@example.com']), ('booking_cancelled', ['tenant0@example.com'])],
+        )
+
+    def test_tenant_cancellation_emails_landlord(self):
+        booking = Booking.objects.create(tenant=self.tenant, apartment=self.apartment, start_date=date(2026, 6, 1))
+        self.client.force_login(self.tenant)
+        response = self.client.post(reverse('cancel_booking', args=[booking.pk]))
+        self.assertWithinQueryBudget(response)
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.kind, email.to, email.reply_to),
+                         ('booking_cancelled_by_tenant', ['landlord@example.com'], ['tenant0@example.com']))
+        self.assertIn('Tenant 0 cancelled', email.body)
+
+    def test_invalid_transitions_are_refused(self):
+        booking = Booking.objects.create(tenant=self.tenant, apartment=self.apartment,
+                                         start_date=date(2026, 6, 1), status='Rejected')
+        with self.assertRaises(ValueError):
+            set_booking_status(booking, 'Rejected')
+        with self.assertRaises(ValueError):
+            set_booking_status(booking, 'Cancelled')
+
+        self.client.force_login(self.tenant)
+        response = self.client.post(reverse('cancel_booking', args=[booking.pk]))
+        self.assertEqual([str(m) for m in get_messages(response.wsgi_request)],
+                         ['A rejected booking cannot be cancelled.'])
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'Rejected')
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_failed_approval_sends_nothing(self):
+        Booking.objects.create(tenant=self.tenant, apartment=self.apartment, status='Approved',
+                               start_date=date(2026, 6, 1), end_date=date(2026, 6, 30))
+        booking = Booking.objects.create(tenant=self.tenant, apartment=self.apartment, start_date=date(2026, 6, 15))
+        with self.assertRaises(BookingConflict):
+            approve_booking(booking)
+        self.assertFalse(OutboxEmail.objects.exists())
+
+
+class BookingAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.apartment = make_apartment()
+        cls.tenant = make_tenant()
+
+    def readonly_fields(self, status):
+        booking = Booking.objects.create(tenant=self.tenant, apartment=self.apartment,
+                                         start_date=date(2026, 6, 1), status=status)
+        return admin.site.get_model_admin(Booking).get_readonly_fields(None, booking)
+
+    def test_approved_booking_dates_are_read_only(self):
+        self.assertTrue({'status', 'apartment', 'start_date', 'end_date'} <= set(self.readonly_fields('Approved')))
+
+    def test_pending_booking_dates_are_editable(self):
+        self.assertNotIn('start_date', self.readonly_fields('Pending'))
@@ -6,4 +6,7 @@ urlpatterns = [
     path('my-bookings/', views.booking_list, name='booking_list'),
     path('booking/<int:booking_id>/', views.booking_detail, name='booking_detail'),
     path('confirmation/<int:booking_id>/', views.booking_confirmation, name='booking_confirmation'),
+    path('booking/<int:booking_id>/approve/', views.approve_booking, name='approve_booking'),
+    path('booking/<int:booking_id>/reject/', views.update_booking_status, {'status': 'Rejected'}, name='reject_booking'),
+    path('booking/<int:booking_id>/cancel/', views.update_booking_status, {'status': 'Cancelled'}, name='cancel_booking'),
 ]
@@ -1,26 +1,39 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
+from django.views.decorators.http import require_POST
+from core.querybudget import query_budget
 from listings.models import Apartment
 from .models import Booking
 from .forms import BookingForm
+from . import notifications, services
 
+
+@query_budget(12)
 @login_required
 def book_apartment(request, apartment_id):
-    apartment = get_object_or_404(Apartment, id=apartment_id)
+    apartment = get_object_or_404(Apartment.objects.select_related('property'), id=apartment_id)
 
-    
-    if request.user.role == "LANDLORD" and request.user == apartment.landlord.user:
+    if request.user.role == "LANDLORD" and request.user.pk == apartment.property.landlord_id:
         messages.warning(request, "You cannot book your own apartment.")
         return redirect('property_detail', pk=apartment.property.id)
 
     if request.method == 'POST':
         form = BookingForm(request.POST)
         if form.is_valid():
+            # Early answer for the tenant; approval re-checks under the constraint.
+            conflict = services.find_conflict(apartment, form.cleaned_data['start_date'], form.cleaned_data['end_date'])
+            if conflict is not None:
+                form.add_error(None, f"This apartment is already booked from {conflict.start_date} "
+                                     f"to {conflict.end_date or 'further notice'}.")
+                return render(request, 'bookings/book_apartment.html', {'form': form, 'apartment': apartment})
             booking = form.save(commit=False)
             booking.tenant = request.user
             booking.apartment = apartment
-            booking.save()
+            with transaction.atomic():
+                booking.save()
+                notifications.booking_requested(booking)
             messages.success(request, "Your booking request has been submitted!")
             return redirect('booking_confirmation', booking_id=booking.id)
     else:
@@ -29,6 +42,7 @@ def book_apartment(request, apartment_id):
     return render(request, 'bookings/book_apartment.html', {'form': form, 'apartment': apartment})
 
 
+@query_budget(5)
 @login_required
 def booking_list(request):
     """
@@ -36,31 +50,73 @@ def booking_list(request):
     Landlord sees bookings for their apartments.
     Tenant sees only their own bookings.
     """
-    if request.user.role == "LANDLORD":
-        bookings = Booking.objects.filter(apartment__landlord__user=request.user)
-    else:
-        bookings = Booking.objects.filter(tenant=request.user)
-
-    return render(request, 'bookings/booking_list.html', {'bookings': bookings})
+    bookings = Booking.objects.for_user(request.user)
+    page = bookings.page(request.GET.get('cursor'))
+    return render(request, 'bookings/booking_list.html', {
+        'bookings': page,
+        'status_counts': bookings.status_counts(),
+        'next_query': page.next_query(request) if page.has_next else '',
+    })
 
 
+@query_budget(6)
 @login_required
 def booking_detail(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(Booking.objects.with_related(), id=booking_id)
 
-    if request.user.role == "TENANT" and booking.tenant != request.user:
+    if request.user.role == "TENANT" and booking.tenant_id != request.user.pk:
         messages.error(request, "You do not have permission to view this booking.")
         return redirect('booking_list')
 
     return render(request, 'bookings/booking_detail.html', {'booking': booking})
 
 
+@query_budget(6)
 @login_required
 def booking_confirmation(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(Booking.objects.with_related(), id=booking_id)
 
-    if request.user.role == "TENANT" and booking.tenant != request.user:
+    if request.user.role == "TENANT" and booking.tenant_id != request.user.pk:
         messages.error(request, "You do not have permission to view this confirmation.")
         return redirect('booking_list')
 
     return render(request, 'bookings/booking_confirmation.html', {'booking': booking})
+
+
+# ---------- LANDLORD / TENANT ACTIONS ----------
+
+@query_budget(14)
+@login_required
+@require_POST
+def approve_booking(request, booking_id):
+    booking = get_object_or_404(Booking.objects.select_related('apartment__property'), id=booking_id)
+    if booking.apartment.property.landlord_id != request.user.pk:
+        messages.error(request, "Only the landlord can approve this booking.")
+        return redirect('booking_detail', booking_id=booking.id)
+
+    try:
+        services.approve_booking(booking)
+        messages.success(request, "Booking approved.")
+    except (services.BookingConflict, ValueError) as exc:
+        messages.error(request, str(exc))
+    return redirect('booking_detail', booking_id=booking.id)
+
+
+@query_budget(10)
+@login_required
+@require_POST
+def update_booking_status(request, booking_id, status):
+    """Landlord rejects, or tenant or landlord cancels, a booking."""
+    booking = get_object_or_404(Booking.objects.select_related('apartment__property'), id=booking_id)
+    is_landlord = booking.apartment.property.landlord_id == request.user.pk
+    allowed = is_landlord or (status == 'Cancelled' and booking.tenant_id == request.user.pk)
+    if not allowed:
+        messages.error(request, "You do not have permission to change this booking.")
+        return redirect('booking_detail', booking_id=booking.id)
+
+    try:
+        services.set_booking_status(booking, status, actor=request.user)
+        messages.success(request, f"Booking {status.lower()}.")
+    except ValueError as exc:
+        messages.error(request, str(exc))
+    return redirect('booking_detail', booking_id=booking.id)
@@ -1,3 +1,35 @@
 from django.contrib import admin
+from django.utils import timezone
+from .models import Job, OutboxEmail
 
-# Register your models here.
+# ---------- Job Admin ----------
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('result', 'last_error', 'locked_at', 'created_at', 'finished_at')
+    actions = ['retry_jobs']
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status='Running').update(
+            status='Queued', attempts=0, run_at=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f"{updated} jobs queued for retry.")
+
+
+# ---------- Outbox Admin ----------
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'kind', 'status', 'attempts', 'send_after', 'created_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('subject',)
+    readonly_fields = ('last_error', 'locked_at', 'created_at', 'sent_at')
+    actions = ['requeue_emails']
+
+    @admin.action(description="Requeue selected emails now")
+    def requeue_emails(self, request, queryset):
+        updated = queryset.exclude(status__in=['Sending', 'Sent']).update(
+            status='Queued', attempts=0, send_after=timezone.now(),
+        )
+        self.message_user(request, f"{updated} emails queued for sending.")
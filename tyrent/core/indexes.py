@@ -0,0 +1,22 @@
+"""
+Indexes that serve the SQL Django emits for case-insensitive lookups on
+PostgreSQL: `icontains`/`iexact` compile to UPPER("col"::text) LIKE/=
+UPPER(%s), which a plain index on the column cannot answer.
+"""
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models
+from django.db.models.functions import Cast, Upper
+
+
+def _upper(field):
+    return Upper(Cast(field, models.TextField()))
+
+
+def icontains_index(field, name):
+    """Trigram GIN index for field__icontains (admin search_fields). Needs pg_trgm."""
+    return GinIndex(OpClass(_upper(field), name='gin_trgm_ops'), name=name)
+
+
+def iexact_index(field, name):
+    """B-tree index for field__iexact ('=field' in admin search_fields)."""
+    return models.Index(_upper(field), name=name)
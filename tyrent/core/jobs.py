@@ -0,0 +1,176 @@
+"""
+A small job queue stored in the main database.
+
+enqueue() inserts a Job row in the caller's transaction, so a job only
+becomes visible to workers once the upload that created it has committed.
+Workers claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+of them can poll the table without handing out the same job twice. Failed
+jobs are retried with exponential backoff until max_attempts.
+"""
+import hashlib
+import logging
+import random
+import traceback
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import ExifTags, Image, ImageOps
+
+from .renditions import generate_renditions
+from .storage import content_storage, repoint
+
+logger = logging.getLogger('tyrent.jobs')
+
+BACKOFF_BASE = 10  # seconds; doubled on every attempt
+BACKOFF_MAX = 60 * 60
+# A job still Running after this long belongs to a worker that died.
+STALE_AFTER = timedelta(minutes=15)
+
+HANDLERS = {}
+
+
+def job(kind):
+    """Register a handler for a job kind. Handlers take the payload as kwargs."""
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, max_attempts=5, delay=None, **payload):
+    from .models import Job
+
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    run_at = timezone.now() + (delay or timedelta())
+    return Job.objects.create(kind=kind, payload=payload, max_attempts=max_attempts, run_at=run_at)
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number `attempts`, with jitter."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim(limit=1):
+    """Lock and mark as Running up to `limit` due jobs; returns them."""
+    from .models import Job
+
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.filter(
+                Q(status='Queued', run_at__lte=now) | Q(status='Running', locked_at__lt=now - STALE_AFTER)
+            )
+            .order_by('run_at')
+            .select_for_update(skip_locked=True)[:limit]
+        )
+        for claimed in jobs:
+            claimed.status = 'Running'
+            claimed.locked_at = now
+            claimed.attempts += 1
+        Job.objects.bulk_update(jobs, ['status', 'locked_at', 'attempts'])
+    return jobs
+
+
+def run(claimed):
+    """Run a claimed job and record its outcome."""
+    try:
+        result = HANDLERS[claimed.kind](**claimed.payload)
+    except Exception as exc:
+        claimed.last_error = ''.join(traceback.format_exception(exc))
+        if claimed.attempts >= claimed.max_attempts:
+            logger.error("Job %s failed permanently: %s", claimed, exc)
+            claimed.status = 'Failed'
+            claimed.finished_at = timezone.now()
+        else:
+            logger.warning("Job %s failed (attempt %d), retrying: %s", claimed, claimed.attempts, exc)
+            claimed.status = 'Queued'
+            claimed.run_at = timezone.now() + timedelta(seconds=backoff(claimed.attempts))
+    else:
+        claimed.status = 'Done'
+        claimed.result = result
+        claimed.finished_at = timezone.now()
+    claimed.locked_at = None
+    claimed.save(update_fields=['status', 'result', 'run_at', 'locked_at', 'last_error', 'finished_at'])
+    return claimed
+
+
+def run_pending(limit=None):
+    """Drain due jobs in this process; returns how many ran."""
+    count = 0
+    while limit is None or count < limit:
+        jobs = claim()
+        if not jobs:
+            break
+        run(jobs[0])
+        count += 1
+    return count
+
+
+# ---------- JOB TYPES ----------
+
+def enqueue_upload_processing(name, is_image=True):
+    """Queue the post-processing of a freshly uploaded file."""
+    if is_image:
+        enqueue('strip_metadata', name=name)
+    else:
+        enqueue('hash_file', name=name)
+
+
+@job('strip_metadata')
+def strip_metadata(name):
+    """
+    Store an EXIF-free copy of an uploaded photo (no GPS position or camera
+    serials), baking the EXIF orientation into the pixels, then queue its
+    renditions and hash, which must see the final bytes.
+    """
+    with content_storage.open(name, 'rb') as f:
+        with Image.open(f) as image:
+            exif = image.getexif()
+            stripped = bool(exif)
+            if stripped:
+                options = {'icc_profile': image.info.get('icc_profile')}
+                if exif.get(ExifTags.Base.Orientation, 1) != 1:
+                    output = ImageOps.exif_transpose(image)
+                    if image.format == 'JPEG':
+                        options['quality'] = 90
+                else:
+                    # Re-use the original quantization tables: no visible loss.
+                    output = image
+                    if image.format == 'JPEG':
+                        options['quality'] = 'keep'
+                buffer = BytesIO()
+                # Pillow only writes EXIF when passed exif=, so it is dropped here.
+                output.save(buffer, image.format, **options)
+    if stripped:
+        # New bytes, new content-addressed name: move every reference over.
+        # The original may be re-uploaded any moment, so it is left for
+        # `rehash_media --prune` rather than deleted here.
+        old_name, name = name, content_storage.save(name, ContentFile(buffer.getvalue()))
+        with transaction.atomic():
+            repoint(old_name, name)
+    enqueue('resize_image', name=name)
+    enqueue('hash_file', name=name)
+    return {'stripped': stripped, 'name': name}
+
+
+@job('resize_image')
+def resize_image(name):
+    rows = generate_renditions(name)
+    return {'renditions': len(rows)}
+
+
+@job('hash_file')
+def hash_file(name):
+    digest = hashlib.sha256()
+    size = 0
+    with content_storage.open(name, 'rb') as f:
+        for chunk in f.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+    return {'sha256': digest.hexdigest(), 'size': size}
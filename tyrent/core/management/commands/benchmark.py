@@ -0,0 +1,296 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import LandlordProfile, TenantProfile, User
+from bookings.models import Booking
+from core.stats import invalidate_homepage_stats
+from listings.cache import bump_data_version
+from listings.management.commands.benchmark_search import AREAS, FEATURES, STREETS, TOWNS
+from listings.models import Apartment, Property, PROPERTY_TYPES
+from listings.occupancy import rebuild_calendar
+
+USERNAME_PREFIX = 'benchmark'
+
+# (label, URL name, who is logged in, builds reverse() args and query string
+# from the seeded dataset). The label is the key in the report.
+SCENARIOS = [
+    ('home', 'home', None, lambda d: ((), {})),
+    ('property_list', 'property_list', 'tenant', lambda d: ((), {})),
+    ('property_list:filtered', 'property_list', 'tenant',
+     lambda d: ((), {'location': d['area'], 'max_price': '60000'})),
+    ('search_properties', 'search_properties', None, lambda d: ((), {'location': d['area']})),
+    ('search_availability', 'search_availability', None,
+     lambda d: ((), {'start': d['start'], 'end': d['end'], 'location': d['area']})),
+    ('property_detail', 'property_detail', 'landlord', lambda d: ((d['property'],), {})),
+    ('apartment_detail', 'apartment_detail', 'tenant', lambda d: ((d['apartment'],), {})),
+    ('landlord_dashboard', 'landlord_dashboard', 'landlord', lambda d: ((), {})),
+    ('booking_list:landlord', 'booking_list', 'landlord', lambda d: ((), {})),
+    ('tenant_dashboard', 'tenant_dashboard', 'tenant', lambda d: ((), {})),
+    ('booking_list:tenant', 'booking_list', 'tenant', lambda d: ((), {})),
+    ('booking_detail', 'booking_detail', 'tenant', lambda d: ((d['booking'],), {})),
+]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(int(round(len(sorted_values) * fraction)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a deterministic dataset, request every user-facing view through the test "
+        "client and report p50/p95 latency, query counts and peak memory as JSON. "
+        "Everything is rolled back unless --keep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--landlords', type=int, default=20)
+        parser.add_argument('--properties-per-landlord', type=int, default=25)
+        parser.add_argument('--units-per-property', type=int, default=8)
+        parser.add_argument('--tenants', type=int, default=200)
+        parser.add_argument('--bookings-per-tenant', type=int, default=5)
+        parser.add_argument('--requests', type=int, default=50, help="Timed requests per view.")
+        parser.add_argument('--warmup', type=int, default=3, help="Untimed requests per view before timing.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--only', action='append', metavar='LABEL',
+                            help="Only run this scenario (repeatable).")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--baseline', help="Compare against a JSON report written earlier.")
+        parser.add_argument('--max-regression', type=float, default=None, metavar='PERCENT',
+                            help="With --baseline, fail if any p95 grew by more than this or any query count grew.")
+        parser.add_argument('--keep', action='store_true', help="Commit the seeded rows instead of rolling back.")
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options['only']:
+            unknown = set(options['only']) - {label for label, *_ in SCENARIOS}
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+            scenarios = [s for s in SCENARIOS if s[0] in options['only']]
+        if options['requests'] < 1:
+            raise CommandError("--requests must be at least 1.")
+
+        rng = random.Random(options['seed'])
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        try:
+            with transaction.atomic(), override_settings(ALLOWED_HOSTS=hosts):
+                dataset = self.seed(rng, options)
+                results = {
+                    label: self.measure(dataset, url_name, role, build, options)
+                    for label, url_name, role, build in scenarios
+                }
+                if not options['keep']:
+                    transaction.set_rollback(True)
+        finally:
+            # Cached pages and stats may describe rows that were just rolled back.
+            invalidate_homepage_stats()
+            bump_data_version()
+
+        report = {
+            'meta': {
+                'seed': options['seed'],
+                'dataset': {key: options[key] for key in (
+                    'landlords', 'properties_per_landlord', 'units_per_property', 'tenants', 'bookings_per_tenant',
+                )},
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+                'database': connection.vendor,
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['max_regression'])
+
+    # ---------- SEEDING ----------
+
+    def seed(self, rng, options):
+        prefix = f"{USERNAME_PREFIX}-{options['seed']}"
+        if User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f"Users named {prefix}-* already exist (kept from an earlier --keep run?).")
+        n_landlords, n_tenants = options['landlords'], options['tenants']
+        if n_landlords < 1 or n_tenants < 1 or options['properties_per_landlord'] < 1 or options['units_per_property'] < 1:
+            raise CommandError("The dataset needs at least one landlord, tenant, property and unit.")
+        self.stderr.write(
+            f"Seeding {n_landlords} landlords x {options['properties_per_landlord']} properties x "
+            f"{options['units_per_property']} units, {n_tenants} tenants x {options['bookings_per_tenant']} bookings..."
+        )
+        now = timezone.now()
+        unusable = make_password(None)
+
+        def users(role, n):
+            return User.objects.bulk_create([
+                User(
+                    username=f'{prefix}-{role.lower()}-{i}', email=f'{prefix}-{role.lower()}-{i}@example.com',
+                    full_name=f'Benchmark {role.title()} {i}', role=role, password=unusable,
+                )
+                for i in range(n)
+            ], batch_size=2000)
+
+        landlords = users('LANDLORD', n_landlords)
+        tenants = users('TENANT', n_tenants)
+        LandlordProfile.objects.bulk_create([LandlordProfile(user=u) for u in landlords], batch_size=2000)
+        TenantProfile.objects.bulk_create([TenantProfile(user=u) for u in tenants], batch_size=2000)
+
+        properties = Property.objects.bulk_create([
+            Property(
+                landlord=landlord,
+                title=f"{rng.choice(AREAS)} {rng.choice(['Court', 'Heights', 'Gardens', 'Residence', 'Towers'])}",
+                description=' '.join(rng.sample(FEATURES, 4)),
+                property_type=rng.choice(PROPERTY_TYPES)[0],
+                address=f"{rng.randint(1, 999)} {rng.choice(STREETS)}, {rng.choice(AREAS)}, {rng.choice(TOWNS)}",
+                date_added=now - timedelta(minutes=i),
+            )
+            for i, landlord in enumerate(l for l in landlords for _ in range(options['properties_per_landlord']))
+        ], batch_size=2000)
+        apartments = Apartment.objects.bulk_create([
+            Apartment(
+                property=prop,
+                title=f"Unit {u + 1}",
+                unit_number=str(u + 1),
+                bedrooms=rng.randint(1, 4),
+                rent=rng.randrange(8000, 150000, 500),
+                location=rng.choice(AREAS),
+                status=rng.choice(['Vacant', 'Occupied']),
+                description=' '.join(rng.choices(FEATURES, k=30)),
+                date_added=prop.date_added,
+            )
+            for prop in properties
+            for u in range(options['units_per_property'])
+        ], batch_size=5000)
+
+        # At most one approved booking per apartment keeps the exclusion constraint happy.
+        today = date.today()
+        approved, bookings = set(), []
+        for tenant in tenants:
+            for apartment in rng.sample(apartments, min(options['bookings_per_tenant'], len(apartments))):
+                status = rng.choice(['Pending', 'Approved', 'Rejected', 'Cancelled'])
+                if status == 'Approved' and apartment.pk in approved:
+                    status = 'Pending'
+                if status == 'Approved':
+                    approved.add(apartment.pk)
+                start = today + timedelta(days=rng.randint(-180, 180))
+                bookings.append(Booking(
+                    tenant=tenant, apartment=apartment, status=status, start_date=start,
+                    end_date=start + timedelta(days=rng.randint(30, 365)), message="Benchmark booking",
+                    created_at=now - timedelta(minutes=len(bookings)),
+                ))
+        bookings = Booking.objects.bulk_create(bookings, batch_size=5000)
+
+        # bulk_create skips save() and the signal receivers that keep these current.
+        seeded = Property.objects.filter(landlord__in=landlords)
+        seeded.refresh_stats(batch_size=2000)
+        seeded.refresh_search_vector()
+        rebuild_calendar([a.pk for a in apartments])
+        with connection.cursor() as cursor:
+            for model in (User, Property, Apartment, Booking):
+                cursor.execute('ANALYZE %s' % model._meta.db_table)
+
+        tenant = tenants[0]
+        tenant_bookings = [b for b in bookings if b.tenant_id == tenant.pk]
+        return {
+            'users': {'landlord': landlords[0], 'tenant': tenant},
+            'property': properties[0].pk,
+            'apartment': apartments[0].pk,
+            'booking': tenant_bookings[0].pk if tenant_bookings else bookings[0].pk,
+            'area': rng.choice(AREAS),
+            'start': (today + timedelta(days=30)).isoformat(),
+            'end': (today + timedelta(days=90)).isoformat(),
+        }
+
+    # ---------- MEASURING ----------
+
+    def measure(self, dataset, url_name, role, build, options):
+        args, params = build(dataset)
+        url = reverse(url_name, args=args)
+        client = Client()
+        if role:
+            client.force_login(dataset['users'][role])
+
+        started = time.perf_counter()
+        response = client.get(url, params)
+        cold_ms = (time.perf_counter() - started) * 1000
+        for _ in range(options['warmup']):
+            client.get(url, params)
+
+        timings, query_counts = [], []
+        for _ in range(options['requests']):
+            started = time.perf_counter()
+            response = client.get(url, params)
+            timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(response.wsgi_request.query_stats['count'])
+        if response.status_code != 200:
+            self.stderr.write(self.style.WARNING(f"{url_name} answered {response.status_code}"))
+
+        # A separate traced request: tracemalloc slows everything it watches.
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            client.get(url, params)
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'url': url,
+            'params': params,
+            'status': response.status_code,
+            'cold_ms': round(cold_ms, 2),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'queries': max(query_counts),
+            'query_budget': response.wsgi_request.query_stats['budget'],
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
+
+    # ---------- BASELINE ----------
+
+    def compare(self, results, path, max_regression):
+        try:
+            with open(path) as f:
+                baseline = json.load(f)['results']
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Could not read the baseline {path}: {exc}")
+
+        regressions = []
+        self.stderr.write(f"{'scenario':<24} {'p50 ms':>18} {'p95 ms':>18} {'queries':>9} {'peak KiB':>20}")
+        for label, result in results.items():
+            before = baseline.get(label)
+            if before is None:
+                self.stderr.write(f"{label:<24} (not in baseline)")
+                continue
+            change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+            self.stderr.write(
+                f"{label:<24} {before['p50_ms']:>8.2f} -> {result['p50_ms']:<7.2f}"
+                f" {before['p95_ms']:>8.2f} -> {result['p95_ms']:<7.2f}"
+                f" {before['queries']:>3} -> {result['queries']:<3}"
+                f" {before['peak_memory_kib']:>8.1f} -> {result['peak_memory_kib']:<8.1f} ({change:+.1f}% p95)"
+            )
+            if result['queries'] > before['queries']:
+                regressions.append(f"{label}: {before['queries']} -> {result['queries']} queries")
+            if max_regression is not None and change > max_regression:
+                regressions.append(f"{label}: p95 {change:+.1f}%")
+
+        if max_regression is not None and regressions:
+            raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
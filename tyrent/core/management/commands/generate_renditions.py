@@ -0,0 +1,72 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from core.models import ImageRendition
+from core.renditions import RENDITIONS_ROOT, save_renditions, write_variants
+from core.storage import CONTENT_ROOT
+
+SOURCE_DIRS = (CONTENT_ROOT, 'properties', 'apartments', 'houses')
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+
+
+def _render(name):
+    # Runs in a worker process; returns rows for the parent to record.
+    try:
+        return name, write_variants(name), None
+    except OSError as exc:
+        return name, [], str(exc)
+
+
+class Command(BaseCommand):
+    help = "Backfill resized JPEG/WebP renditions for uploaded property, apartment and house photos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help="Number of worker processes (default: CPU count).")
+        parser.add_argument('--force', action='store_true',
+                            help="Regenerate renditions that already exist.")
+        parser.add_argument('--dirs', nargs='+', default=list(SOURCE_DIRS),
+                            help="Directories under MEDIA_ROOT to scan.")
+
+    def handle(self, *args, **options):
+        sources = self.find_sources(options['dirs'])
+        if not options['force']:
+            done = set(ImageRendition.objects.values_list('source', flat=True).distinct())
+            sources = [name for name in sources if name not in done]
+        if not sources:
+            self.stdout.write("Nothing to do.")
+            return
+
+        self.stdout.write(f"Rendering {len(sources)} images with {options['workers']} workers...")
+        # Workers never touch the database; don't hand them our connection.
+        connections.close_all()
+        rendered = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            futures = [pool.submit(_render, name) for name in sources]
+            for future in as_completed(futures):
+                name, rows, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f"{name}: {error}")
+                    continue
+                save_renditions(rows)
+                rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} images, {failed} failed."))
+
+    def find_sources(self, dirs):
+        """Storage names (relative to MEDIA_ROOT) of every image under `dirs`."""
+        names = []
+        for directory in dirs:
+            if directory == RENDITIONS_ROOT:
+                continue
+            for root, _, files in os.walk(os.path.join(settings.MEDIA_ROOT, directory)):
+                for filename in files:
+                    if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+                        path = os.path.relpath(os.path.join(root, filename), settings.MEDIA_ROOT)
+                        names.append(path.replace(os.sep, '/'))
+        return sorted(names)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from core.stats import cache_counters, reset_cache_counters
+
+
+class Command(BaseCommand):
+    help = "Show (or reset) the hit/miss counters of the cached homepage stats."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters.")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_cache_counters()
+            self.stdout.write("Counters reset.")
+            return
+        counters = cache_counters()
+        self.stdout.write(
+            f"hits {counters['hits']}  misses {counters['misses']}  hit rate {counters['hit_rate']:.2%}"
+        )
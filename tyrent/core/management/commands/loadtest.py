@@ -0,0 +1,141 @@
+"""
+Compare servers under concurrent load, e.g. the WSGI and ASGI deployments of
+the same code against the same database:
+
+    gunicorn tyrent.wsgi -w 4 --threads 8 -b 127.0.0.1:8000
+    uvicorn tyrent.asgi:application --workers 4 --port 8001
+    manage.py loadtest --target wsgi=http://127.0.0.1:8000 \\
+        --target asgi=http://127.0.0.1:8001 --concurrency 500
+
+The client is plain asyncio, one connection per request, so it can keep
+thousands of requests in flight from one process.
+"""
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Read-only pages served by async views; --path replaces the list.
+DEFAULT_PATHS = [
+    '/',
+    '/listings/',
+    '/listings/search/?location=Kilimani',
+    '/listings/search/?property_type=apartment&max_price=60000',
+    '/listings/map/?bbox=36.65,-1.45,37.0,-1.15&zoom=12',
+]
+
+
+def percentile(sorted_values, fraction):
+    index = max(int(round(len(sorted_values) * fraction)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+async def fetch(url, timeout):
+    """GET `url` over a fresh connection; returns (status code, seconds)."""
+    parts = urlsplit(url)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    started = time.perf_counter()
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, port, ssl=parts.scheme == 'https' or None), timeout,
+    )
+    try:
+        writer.write(
+            f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n"
+            f"User-Agent: tyrent-loadtest\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        # Drain the body so the server-side timing covers the whole response.
+        while await asyncio.wait_for(reader.read(65536), timeout):
+            pass
+    finally:
+        writer.close()
+    return int(status_line.split()[1]), time.perf_counter() - started
+
+
+async def hammer(url, requests, concurrency, timeout):
+    """Send `requests` GETs with at most `concurrency` in flight."""
+    timings, statuses, errors = [], {}, {}
+    remaining = iter(range(requests))
+
+    async def client():
+        for _ in remaining:
+            try:
+                status, elapsed = await fetch(url, timeout)
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError) as exc:
+                name = type(exc).__name__
+                errors[name] = errors.get(name, 0) + 1
+                continue
+            statuses[status] = statuses.get(status, 0) + 1
+            timings.append(elapsed * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    timings.sort()
+    summary = {
+        'requests': requests,
+        'concurrency': concurrency,
+        'statuses': {str(status): n for status, n in sorted(statuses.items())},
+        'errors': errors,
+        'requests_per_second': round(len(timings) / wall, 1) if wall else 0,
+    }
+    if timings:
+        summary.update({
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'max_ms': round(timings[-1], 2),
+        })
+    return summary
+
+
+class Command(BaseCommand):
+    help = "Load-test running servers with concurrent GETs and compare their throughput and latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, metavar='NAME=URL',
+                            help="A server to test, e.g. asgi=http://127.0.0.1:8001 (repeatable).")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Path (with query string) to request (repeatable).")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per path and target.")
+        parser.add_argument('--concurrency', type=int, default=200, help="Requests in flight at once.")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Seconds before a request counts as failed.")
+        parser.add_argument('--output', help="Also write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, sep, base = target.partition('=')
+            if not sep or not base.startswith(('http://', 'https://')):
+                raise CommandError(f"--target must look like NAME=http://host:port, not {target!r}.")
+            targets.append((name, base.rstrip('/')))
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--requests and --concurrency must be at least 1.")
+        paths = options['paths'] or DEFAULT_PATHS
+
+        results = {}
+        for path in paths:
+            for name, base in targets:
+                summary = asyncio.run(hammer(
+                    base + path, options['requests'], options['concurrency'], options['timeout'],
+                ))
+                results.setdefault(path, {})[name] = summary
+                self.stdout.write(
+                    f"{path:<50} {name:<8} {summary['requests_per_second']:>8.1f} req/s  "
+                    f"p50 {summary.get('p50_ms', 0):>8.2f} ms  p95 {summary.get('p95_ms', 0):>8.2f} ms  "
+                    f"p99 {summary.get('p99_ms', 0):>8.2f} ms  "
+                    f"statuses {summary['statuses']}  errors {summary['errors'] or 0}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write('\n')
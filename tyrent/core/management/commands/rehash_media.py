@@ -0,0 +1,107 @@
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Value, When
+from core.models import ImageRendition
+from core.renditions import delete_renditions, forget_renditions
+from core.stats import invalidate_homepage_stats
+from core.storage import CONTENT_ROOT, MEDIA_FIELDS, content_storage, is_content_addressed
+from listings.cache import bump_data_version
+
+
+class Command(BaseCommand):
+    help = ("Move uploaded media into content-addressed storage: hash every file referenced by a "
+            "media field, store it once under its SHA-256 name and rewrite the paths in bulk.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Paths rewritten per UPDATE statement.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Hash and report, but store and rewrite nothing.")
+        parser.add_argument('--delete-originals', action='store_true',
+                            help="Delete the old files once every reference has moved.")
+        parser.add_argument('--prune', action='store_true',
+                            help=f"Delete files under {CONTENT_ROOT}/ that no row references. "
+                                 "Run while no uploads are in flight.")
+
+    def handle(self, *args, **options):
+        mapping = self.store_files(options['dry_run'])
+        if mapping and not options['dry_run']:
+            self.rewrite_paths(mapping, options['batch_size'])
+            if options['delete_originals']:
+                for old_name in mapping:
+                    content_storage.delete(old_name)
+                self.stdout.write(f"Deleted {len(mapping)} original files.")
+        if options['prune'] and not options['dry_run']:
+            self.prune()
+
+    def store_files(self, dry_run):
+        """{old name: content-addressed name} for every legacy file that exists."""
+        legacy = set()
+        for label, field in MEDIA_FIELDS:
+            names = apps.get_model(label).objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            legacy.update(n for n in names.values_list(field, flat=True).distinct() if not is_content_addressed(n))
+
+        mapping, missing = {}, []
+        for old_name in sorted(legacy):
+            if not content_storage.exists(old_name):
+                missing.append(old_name)
+                continue
+            if dry_run:
+                mapping[old_name] = None
+                continue
+            with content_storage.open(old_name, 'rb') as f:
+                mapping[old_name] = content_storage.save(old_name, f)
+
+        for old_name in missing:
+            self.stderr.write(f"Missing file, left as is: {old_name}")
+        unique = len(set(mapping.values())) if not dry_run else 'n/a'
+        self.stdout.write(f"{len(mapping)} files hashed, {unique} unique, {len(missing)} missing.")
+        return mapping
+
+    def rewrite_paths(self, mapping, batch_size):
+        items = list(mapping.items())
+        with transaction.atomic():
+            updated = 0
+            for label, field in MEDIA_FIELDS:
+                model = apps.get_model(label)
+                for start in range(0, len(items), batch_size):
+                    batch = items[start:start + batch_size]
+                    updated += model.objects.filter(**{f'{field}__in': [old for old, _ in batch]}).update(
+                        **{field: Case(*[When(**{field: old}, then=Value(new)) for old, new in batch])}
+                    )
+
+            # Several originals can collapse into one file; keep one set of renditions.
+            rendered = set(ImageRendition.objects.values_list('source', flat=True).distinct())
+            for old, new in items:
+                if old not in rendered:
+                    continue
+                if new in rendered:
+                    delete_renditions(old)
+                else:
+                    ImageRendition.objects.filter(source=old).update(source=new)
+                    rendered.add(new)
+                forget_renditions(old)
+                forget_renditions(new)
+
+            invalidate_homepage_stats()
+            bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"Rewrote {updated} file references."))
+
+    def prune(self):
+        referenced = set()
+        for label, field in MEDIA_FIELDS:
+            referenced.update(apps.get_model(label).objects.values_list(field, flat=True).distinct())
+
+        pruned = 0
+        for root, _, files in os.walk(os.path.join(settings.MEDIA_ROOT, CONTENT_ROOT)):
+            for filename in files:
+                name = os.path.relpath(os.path.join(root, filename), settings.MEDIA_ROOT).replace(os.sep, '/')
+                if name not in referenced:
+                    delete_renditions(name)
+                    content_storage.delete(name)
+                    pruned += 1
+        self.stdout.write(f"Pruned {pruned} unreferenced files.")
@@ -0,0 +1,78 @@
+import multiprocessing
+import signal
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from core import jobs
+
+
+class Shutdown:
+    """Signal handler that only flips a flag, so it is safe at any point."""
+
+    def __init__(self, *signals):
+        self.requested = False
+        for signum in signals:
+            signal.signal(signum, self)
+
+    def __call__(self, signum, frame):
+        self.requested = True
+
+
+def work(poll_interval, stop):
+    """Worker process loop: run due jobs, sleep when the queue is empty."""
+    django.setup()
+    # The parent handles Ctrl-C and tells us to stop via `stop`; a direct
+    # SIGTERM also lets the current job finish.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    shutdown = Shutdown(signal.SIGTERM)
+    while not (shutdown.requested or stop.is_set()):
+        close_old_connections()
+        claimed = jobs.claim()
+        if claimed:
+            jobs.run(claimed[0])
+        else:
+            time.sleep(poll_interval)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run background job workers that process the core.Job queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Number of worker processes.")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds a worker sleeps when no job is due.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Run every due job in this process, then exit.")
+
+    def handle(self, *args, **options):
+        if options['burst']:
+            count = jobs.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs."))
+            return
+
+        # Children open their own connections; don't let them share ours.
+        connections.close_all()
+        stop = multiprocessing.Event()
+        processes = [self.start_worker(i, options['poll_interval'], stop) for i in range(options['workers'])]
+        self.stdout.write(f"Started {len(processes)} workers. Ctrl-C to stop.")
+
+        shutdown = Shutdown(signal.SIGINT, signal.SIGTERM)
+        while not shutdown.requested:
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    self.stderr.write(f"{process.name} exited ({process.exitcode}), restarting.")
+                    processes[i] = self.start_worker(i, options['poll_interval'], stop)
+            time.sleep(1)
+
+        self.stdout.write("Stopping workers after their current job...")
+        stop.set()
+        for process in processes:
+            process.join()
+
+    def start_worker(self, index, poll_interval, stop):
+        process = multiprocessing.Process(target=work, args=(poll_interval, stop), name=f'job-worker-{index}')
+        process.start()
+        return process
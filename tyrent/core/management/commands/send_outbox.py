@@ -0,0 +1,37 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core import outbox
+from core.management.commands.run_workers import Shutdown
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails in batches over one SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=outbox.BATCH_SIZE,
+                            help="Messages claimed (and sent over one connection) at a time.")
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help="Seconds to sleep when nothing is due.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Send everything that is due, then exit.")
+
+    def handle(self, *args, **options):
+        if options['burst']:
+            sent, failed = outbox.send_pending(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} emails, {failed} failed."))
+            return
+
+        self.stdout.write("Sending outbox emails. Ctrl-C to stop.")
+        shutdown = Shutdown(signal.SIGINT, signal.SIGTERM)
+        while not shutdown.requested:
+            close_old_connections()
+            # The SMTP connection stays open while there is a backlog and
+            # is closed whenever the outbox runs dry.
+            sent, failed = outbox.send_pending(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed.")
+            else:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,176 @@
+"""
+Serving of uploaded media with HTTP Range and conditional request support,
+so browsers can seek in apartment videos without downloading them whole.
+
+settings.MEDIA_SENDFILE_BACKEND hands the transfer to the front proxy:
+'x-accel-redirect' (nginx, with MEDIA_ACCEL_REDIRECT_PREFIX as the internal
+location) or 'x-sendfile' (Apache mod_xsendfile, lighttpd).
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+from .renditions import RENDITIONS_ROOT
+from .shortcuts import is_asgi
+from .storage import CONTENT_ROOT, is_content_addressed
+
+STREAM_CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def resolve_media_path(path):
+    """Absolute path of an existing file under MEDIA_ROOT, else 404."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Media file not found.")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found.")
+    return full_path
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single-range `Range` header, None to serve
+    the whole file (no header, or a form we don't honour such as multiple
+    ranges), or ValueError when the range is unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def if_range_matches(request, etag, last_modified):
+    """True if the Range header applies: no If-Range, or it names this version."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Weak validators never match If-Range.
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def iter_file_range(full_path, start, length, chunk_size=STREAM_CHUNK_SIZE):
+    with open(full_path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def aiter_file_range(full_path, start, length, chunk_size=STREAM_CHUNK_SIZE):
+    """iter_file_range() for ASGI: file reads run in a worker thread."""
+    f = await sync_to_async(open, thread_sensitive=False)(full_path, 'rb')
+    try:
+        await sync_to_async(f.seek, thread_sensitive=False)(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await sync_to_async(f.read, thread_sensitive=False)(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def media_response(request, path):
+    full_path = resolve_media_path(path)
+    stat = os.stat(full_path)
+    size = stat.st_size
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _finish(not_modified, path, etag, last_modified)
+
+    backend = getattr(settings, 'MEDIA_SENDFILE_BACKEND', None)
+    if backend:
+        # The proxy does Range, streaming and conditional requests itself.
+        response = HttpResponse(content_type=content_type)
+        if backend == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + path)
+        elif backend == 'x-sendfile':
+            response['X-Sendfile'] = full_path
+        else:
+            raise ValueError(f"Unknown MEDIA_SENDFILE_BACKEND {backend!r}")
+        return _finish(response, path, etag, last_modified)
+
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return _finish(response, path, etag, last_modified)
+
+    if byte_range is None or not if_range_matches(request, etag, last_modified):
+        byte_range = None
+    if byte_range is None and not is_asgi(request):
+        # FileResponse uses wsgi.file_wrapper (sendfile) when the server has it.
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        # Under ASGI a sync iterator would be read whole into memory first.
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1
+        chunks = aiter_file_range if is_asgi(request) else iter_file_range
+        response = StreamingHttpResponse(
+            chunks(full_path, start, length), status=206 if byte_range else 200, content_type=content_type,
+        )
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return _finish(response, path, etag, last_modified)
+
+
+def is_immutable(path):
+    """Content-addressed files, and renditions of them, never change under their name."""
+    return is_content_addressed(path) or path.startswith(f'{RENDITIONS_ROOT}/{CONTENT_ROOT}/')
+
+
+def _finish(response, path, etag, last_modified):
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if is_immutable(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600))
+    return response
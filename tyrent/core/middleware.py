@@ -0,0 +1,52 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .querybudget import arecord_queries, get_query_budget, record_queries
+
+logger = logging.getLogger('tyrent.querybudget')
+
+
+class QueryBudgetMiddleware:
+    """
+    Record query count, DB time and duplicate statements for each request,
+    keyed by URL name, and log a warning when the view's @query_budget is
+    exceeded. The numbers are left on request.query_stats for tests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Under ASGI, a sync-only middleware here would push every async view
+        # below it back through async_to_sync.
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        self.report(request, recorder)
+        return response
+
+    async def __acall__(self, request):
+        async with arecord_queries() as recorder:
+            response = await self.get_response(request)
+        self.report(request, recorder)
+        return response
+
+    def report(self, request, recorder):
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.url_name if match else None
+        budget = get_query_budget(match.func if match else None, url_name)
+        request.query_stats = {'url_name': url_name, 'budget': budget, **recorder.summary()}
+
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                "Query budget exceeded for %s: %d queries (budget %d), %.1f ms DB time, duplicates: %s",
+                url_name, recorder.count, budget, recorder.total_time,
+                recorder.duplicates() or 'none',
+            )
@@ -1,3 +1,97 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class ImageRendition(models.Model):
+    """A resized variant of an uploaded image; see core.renditions."""
+
+    FORMAT_CHOICES = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+
+    source = models.CharField(max_length=255, db_index=True)
+    width = models.PositiveIntegerField()
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    file = models.ImageField(upload_to='renditions/', max_length=255)
+    actual_width = models.PositiveIntegerField()
+    actual_height = models.PositiveIntegerField()
+    size = models.PositiveIntegerField(help_text="File size in bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'width', 'format'], name='unique_image_rendition'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} @ {self.width}w ({self.format})"
+
+
+class Job(models.Model):
+    """A unit of background work, claimed by `manage.py run_workers`; see core.jobs."""
+
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Running', 'Running'),
+        ('Done', 'Done'),
+        ('Failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers only ever look for due queued jobs and stale running ones.
+            models.Index(fields=['run_at'], name='job_queued_run_at_idx', condition=models.Q(status='Queued')),
+            models.Index(fields=['locked_at'], name='job_running_locked_idx', condition=models.Q(status='Running')),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class OutboxEmail(models.Model):
+    """An email waiting to be sent by `manage.py send_outbox`; see core.outbox."""
+
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Sending', 'Sending'),
+        ('Sent', 'Sent'),
+        ('Dead', 'Dead'),
+    ]
+
+    kind = models.CharField(max_length=50, blank=True, help_text="What triggered it, e.g. contact or booking_approved")
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    send_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Outbox email"
+        indexes = [
+            models.Index(fields=['send_after'], name='outbox_queued_idx', condition=models.Q(status='Queued')),
+            models.Index(fields=['locked_at'], name='outbox_sending_idx', condition=models.Q(status='Sending')),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,161 @@
+"""
+Transactional email outbox.
+
+queue_email() inserts an OutboxEmail row in the caller's transaction, so a
+message exists exactly when the change it reports was committed, and a
+request never waits on SMTP. `manage.py send_outbox` drains the table in
+batches over one reused connection. Claims use SELECT ... FOR UPDATE SKIP
+LOCKED, as core.jobs does, so several senders can run side by side. Failed
+messages are retried with backoff and marked Dead after max_attempts,
+where they stay for inspection and a manual requeue from the admin.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .jobs import STALE_AFTER, backoff
+
+logger = logging.getLogger('tyrent.outbox')
+
+BATCH_SIZE = 50
+
+
+def _outbox_email(subject, body, to, from_email=None, reply_to=(), kind='', max_attempts=5):
+    from .models import OutboxEmail
+
+    return OutboxEmail(
+        kind=kind,
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        reply_to=list(reply_to),
+        max_attempts=max_attempts,
+    )
+
+
+def queue_email(subject, body, to, **kwargs):
+    """
+    Add a message to the outbox; `to` is a list of addresses. Takes
+    from_email, reply_to, kind and max_attempts as keywords.
+    """
+    email = _outbox_email(subject, body, to, **kwargs)
+    email.save(force_insert=True)
+    return email
+
+
+async def aqueue_email(subject, body, to, **kwargs):
+    """queue_email() for async views."""
+    email = _outbox_email(subject, body, to, **kwargs)
+    await email.asave(force_insert=True)
+    return email
+
+
+def claim(limit=BATCH_SIZE):
+    """Lock and mark as Sending up to `limit` due messages; returns them."""
+    from .models import OutboxEmail
+
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.filter(
+                Q(status='Queued', send_after__lte=now) | Q(status='Sending', locked_at__lt=now - STALE_AFTER)
+            )
+            .order_by('send_after')
+            .select_for_update(skip_locked=True)[:limit]
+        )
+        for email in emails:
+            email.status = 'Sending'
+            email.locked_at = now
+            email.attempts += 1
+        OutboxEmail.objects.bulk_update(emails, ['status', 'locked_at', 'attempts'])
+    return emails
+
+
+def to_message(email, connection=None):
+    return EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        reply_to=email.reply_to,
+        connection=connection,
+    )
+
+
+def _open(connection):
+    # A refused connection is not fatal here: send_messages() retries the
+    # open and its error is recorded against each message.
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning("Could not connect to the mail server: %s", exc)
+
+
+def _reconnect(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+    _open(connection)
+
+
+def send_batch(emails, connection):
+    """
+    Send claimed messages over an open connection and record each outcome.
+    After a failure the connection is reopened, since SMTP errors often
+    leave it unusable. Returns (sent, failed).
+    """
+    from .models import OutboxEmail
+
+    sent = failed = 0
+    now = timezone.now()
+    _open(connection)
+    for email in emails:
+        try:
+            connection.send_messages([to_message(email, connection)])
+        except Exception as exc:
+            failed += 1
+            email.last_error = f"{type(exc).__name__}: {exc}"
+            if email.attempts >= email.max_attempts:
+                logger.error("Outbox email %s is dead after %d attempts: %s", email.pk, email.attempts, exc)
+                email.status = 'Dead'
+            else:
+                logger.warning("Outbox email %s failed (attempt %d), retrying: %s", email.pk, email.attempts, exc)
+                email.status = 'Queued'
+                email.send_after = timezone.now() + timedelta(seconds=backoff(email.attempts))
+            _reconnect(connection)
+        else:
+            sent += 1
+            email.status = 'Sent'
+            email.sent_at = now
+            email.last_error = ''
+        email.locked_at = None
+    OutboxEmail.objects.bulk_update(emails, ['status', 'send_after', 'sent_at', 'locked_at', 'last_error'])
+    return sent, failed
+
+
+def send_pending(batch_size=BATCH_SIZE, limit=None, connection=None):
+    """
+    Drain due messages in this process, one connection for all batches.
+    Returns (sent, failed).
+    """
+    sent = failed = 0
+    connection = connection or get_connection()
+    try:
+        while limit is None or sent + failed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - sent - failed)
+            emails = claim(size)
+            if not emails:
+                break
+            batch_sent, batch_failed = send_batch(emails, connection)
+            sent += batch_sent
+            failed += batch_failed
+    finally:
+        connection.close()
+    return sent, failed
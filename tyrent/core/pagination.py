@@ -0,0 +1,96 @@
+import datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.db.models import Q
+from django.http import Http404
+
+CURSOR_SALT = 'core.pagination.cursor'
+
+
+class CursorPage:
+    """One page of a CursorPaginator: the rows plus the token for the next page."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def next_query(self, request, param='cursor'):
+        """Current query string with `param` set to the next cursor."""
+        query = request.GET.copy()
+        query[param] = self.next_cursor
+        return query.urlencode()
+
+
+class CursorPaginator:
+    """
+    Keyset pagination: each page filters on the ordering values of the last
+    row of the previous page instead of using OFFSET, so page N costs the
+    same as page 1. `ordering` must end with a unique field (normally pk);
+    fields may be annotations, e.g. ('-rank', '-pk').
+    """
+
+    def __init__(self, queryset, ordering, per_page=24):
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = [(f.lstrip('-'), f.startswith('-')) for f in ordering]
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        return self._page(list(self._slice(cursor)))
+
+    async def apage(self, cursor=None):
+        """page() for async views, fetched with the async ORM."""
+        return self._page([row async for row in self._slice(cursor)])
+
+    def _slice(self, cursor):
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode(cursor)))
+        return queryset[:self.per_page + 1]
+
+    def _page(self, rows):
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self.encode(rows[-1])
+        return CursorPage(rows, next_cursor)
+
+    def _after(self, values):
+        # (a, b, c) after (x, y, z)  <=>  a > x  OR  (a = x AND b > y)  OR ...
+        condition = Q()
+        for i, (name, descending) in enumerate(self.ordering):
+            step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[i]})
+            for (prev_name, _), prev_value in zip(self.ordering[:i], values):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+        return condition
+
+    def encode(self, obj):
+        values = []
+        for name, _ in self.ordering:
+            value = getattr(obj, name)
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        return signing.dumps(values, salt=CURSOR_SALT, compress=True)
+
+    def decode(self, cursor):
+        try:
+            values = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            raise Http404("Invalid cursor.")
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise Http404("Invalid cursor.")
+        return values
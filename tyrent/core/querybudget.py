@@ -0,0 +1,125 @@
+import time
+from collections import Counter
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+
+def query_budget(max_queries):
+    """
+    Declare the most SQL queries a view may run per request. Read by
+    QueryBudgetMiddleware (which logs overruns) and QueryBudgetTestMixin.
+    settings.QUERY_BUDGETS = {'url_name': n} overrides it per URL name.
+    Queries run while a streaming response is consumed are not counted.
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def get_query_budget(view_func, url_name=None):
+    overrides = getattr(settings, 'QUERY_BUDGETS', {})
+    if url_name in overrides:
+        return overrides[url_name]
+    return getattr(view_func, 'query_budget', None)
+
+
+class QueryRecorder:
+    """execute_wrapper that records each query's SQL template and duration."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        """Total DB time in milliseconds."""
+        return sum(duration for _, duration in self.queries) * 1000
+
+    def duplicates(self):
+        """
+        {sql: times} for statements run more than once. SQL is recorded with
+        placeholders, so the same statement with different params (an N+1
+        loop) shares one fingerprint.
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: n for sql, n in counts.items() if n > 1}
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'time_ms': round(self.total_time, 2),
+            'duplicates': self.duplicates(),
+        }
+
+
+@contextmanager
+def record_queries():
+    """Record every query on every configured database inside the block."""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+@asynccontextmanager
+async def arecord_queries():
+    """
+    record_queries() for async code. Connections are per thread, and the
+    async ORM runs every query on the request's sync_to_async thread, so
+    the wrappers are installed (and removed) on that thread's connections.
+    """
+    recorder = QueryRecorder()
+    stack = ExitStack()
+
+    def install():
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+    await sync_to_async(install)()
+    try:
+        yield recorder
+    finally:
+        await sync_to_async(stack.close)()
+
+
+class QueryBudgetTestMixin:
+    """TestCase helpers for asserting query counts against budgets."""
+
+    @contextmanager
+    def assertMaxQueries(self, limit):
+        with record_queries() as recorder:
+            yield recorder
+        if recorder.count > limit:
+            self.fail(self._budget_message(f"{recorder.count} queries, expected at most {limit}", recorder))
+
+    def assertWithinQueryBudget(self, response):
+        """Check a test-client response against its view's declared budget."""
+        request = getattr(response, 'wsgi_request', None) or response.asgi_request
+        stats = getattr(request, 'query_stats', None)
+        if stats is None:
+            self.fail("No query stats recorded; is QueryBudgetMiddleware installed?")
+        budget = stats['budget']
+        if budget is None:
+            self.fail(f"View {stats['url_name']!r} has no query budget declared.")
+        if stats['count'] > budget:
+            self.fail(f"{stats['url_name']}: {stats['count']} queries, budget {budget}. "
+                      f"Duplicates: {stats['duplicates']}")
+
+    def _budget_message(self, headline, recorder):
+        lines = [headline] + [f"{n}x {sql}" for sql, n in recorder.duplicates().items()]
+        return '\n'.join(lines)
@@ -0,0 +1,161 @@
+"""
+Resized, recompressed variants ("renditions") of uploaded photos.
+
+Each source image is rendered at RENDITION_WIDTHS in every RENDITION_FORMATS
+format (never upscaled), stored under renditions/ and recorded in
+ImageRendition. The {% responsive_image %} tag turns them into srcset.
+"""
+import os
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+RENDITION_WIDTHS = (320, 640, 1024)
+RENDITION_FORMATS = {
+    # format: (Pillow format, extension, save options)
+    'webp': ('WEBP', 'webp', {'quality': 78, 'method': 6}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+RENDITIONS_ROOT = 'renditions'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def rendition_name(source_name, width, fmt):
+    stem, _ = os.path.splitext(source_name)
+    return f"{RENDITIONS_ROOT}/{stem}-{width}w.{RENDITION_FORMATS[fmt][1]}"
+
+
+def render_variants(source_file):
+    """
+    Yield (width, fmt, ContentFile, actual_width, actual_height) for every
+    rendition of an open image file. Pure Pillow work, no DB access, so it
+    can run in a worker process.
+    """
+    with Image.open(source_file) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        widths = [w for w in RENDITION_WIDTHS if w < image.width] or [image.width]
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt, (pil_format, _, options) in RENDITION_FORMATS.items():
+                buffer = BytesIO()
+                # Saving without exif= drops EXIF (GPS, camera serials) from the output.
+                resized.save(buffer, pil_format, **options)
+                yield width, fmt, ContentFile(buffer.getvalue()), width, height
+
+
+def write_variants(source_name, storage=default_storage):
+    """Render and store every rendition of `source_name`; returns row dicts."""
+    rows = []
+    with storage.open(source_name, 'rb') as source_file:
+        for width, fmt, content, actual_width, actual_height in render_variants(source_file):
+            name = rendition_name(source_name, width, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            rows.append({
+                'source': source_name,
+                'width': width,
+                'format': fmt,
+                'file': storage.save(name, content),
+                'actual_width': actual_width,
+                'actual_height': actual_height,
+                'size': content.size,
+            })
+    return rows
+
+
+def save_renditions(rows):
+    """Upsert ImageRendition rows from write_variants() and refresh the cache."""
+    from .models import ImageRendition
+
+    sources = {row['source'] for row in rows}
+    ImageRendition.objects.bulk_create(
+        [ImageRendition(**row) for row in rows],
+        update_conflicts=True,
+        unique_fields=['source', 'width', 'format'],
+        update_fields=['file', 'actual_width', 'actual_height', 'size'],
+    )
+    for source in sources:
+        forget_renditions(source)
+
+
+def generate_renditions(source_name, storage=default_storage):
+    """Render, store and record renditions for one uploaded file."""
+    rows = write_variants(source_name, storage)
+    save_renditions(rows)
+    return rows
+
+
+def renditions_for(source_name):
+    """
+    {fmt: [(url, width, height), ...]} for a source, smallest first. Served
+    from the cache so listing grids do not add a query per image.
+    """
+    return renditions_for_many([source_name])[source_name]
+
+
+def renditions_for_many(source_names):
+    """
+    {source: renditions_for(source)} for every source on a page: one cache
+    round trip, and one query for all the sources that were not cached.
+    """
+    keys = {_cache_key(name): name for name in source_names if name}
+    renditions = {keys[key]: value for key, value in cache.get_many(keys).items()}
+    missing = keys.values() - renditions.keys()
+    if missing:
+        from .models import ImageRendition
+
+        loaded = _group(missing, ImageRendition.objects.filter(source__in=missing).order_by('source', 'width'))
+        cache.set_many({_cache_key(name): value for name, value in loaded.items()}, CACHE_TIMEOUT)
+        renditions.update(loaded)
+    return renditions
+
+
+async def arenditions_for_many(source_names):
+    """renditions_for_many() for async views."""
+    keys = {_cache_key(name): name for name in source_names if name}
+    renditions = {keys[key]: value for key, value in (await cache.aget_many(keys)).items()}
+    missing = keys.values() - renditions.keys()
+    if missing:
+        from .models import ImageRendition
+
+        rows = [r async for r in ImageRendition.objects.filter(source__in=missing).order_by('source', 'width')]
+        loaded = _group(missing, rows)
+        await cache.aset_many({_cache_key(name): value for name, value in loaded.items()}, CACHE_TIMEOUT)
+        renditions.update(loaded)
+    return renditions
+
+
+def _group(source_names, rows):
+    # Sources without renditions are cached too, as an empty dict.
+    renditions = {name: {} for name in source_names}
+    for rendition in rows:
+        renditions[rendition.source].setdefault(rendition.format, []).append(
+            (rendition.file.url, rendition.actual_width, rendition.actual_height)
+        )
+    return renditions
+
+
+def delete_renditions(source_name, storage=default_storage):
+    """Remove the stored files and rows for a source that is gone."""
+    from .models import ImageRendition
+
+    renditions = ImageRendition.objects.filter(source=source_name)
+    for rendition in renditions:
+        storage.delete(rendition.file.name)
+    renditions.delete()
+    forget_renditions(source_name)
+
+
+def forget_renditions(source_name):
+    """Drop the cached rendition list of a source after its rows change."""
+    cache.delete(_cache_key(source_name))
+
+
+def _cache_key(source_name):
+    return f'core:renditions:{source_name}'
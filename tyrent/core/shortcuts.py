@@ -0,0 +1,23 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import render
+
+# Async views fetch their data with the async ORM first, then render here.
+# Templates stay synchronous: a tag may still fall back to the DB (e.g. a
+# rendition list missing from the cache), which is only allowed off the
+# event loop.
+arender = sync_to_async(render)
+
+
+async def alist(queryset):
+    """list(queryset) with the async ORM."""
+    return [obj async for obj in queryset]
+
+
+def is_asgi(request):
+    """
+    Whether `request` is served over ASGI. Streaming responses must then get
+    an async iterator: Django drains a sync one into a list first, holding
+    the whole body in memory.
+    """
+    return isinstance(request, ASGIRequest)
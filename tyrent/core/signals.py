@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import VacantHouse
+from listings.models import Property, Apartment
+from .jobs import enqueue_upload_processing
+from .renditions import delete_renditions
+from .storage import media_references
+from .stats import invalidate_homepage_stats
+
+# Uploaded file fields that get background post-processing, per model:
+# {field name: is_image}. Images are stripped, resized and hashed.
+UPLOAD_FIELDS = {
+    Property: {'main_image': True},
+    Apartment: {'image': True, 'video': False},
+    VacantHouse: {'image': True},
+}
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=Apartment)
+@receiver(post_delete, sender=Apartment)
+def invalidate_homepage_stats_on_listing_change(sender, **kwargs):
+    invalidate_homepage_stats()
+
+
+@receiver(pre_save, sender=Property)
+@receiver(pre_save, sender=Apartment)
+@receiver(pre_save, sender=VacantHouse)
+def note_new_uploads(sender, instance, **kwargs):
+    # Files are written to storage after pre_save; until then a fresh
+    # upload is the only kind of FieldFile that is not committed.
+    instance._new_uploads = [
+        field for field in UPLOAD_FIELDS[sender]
+        if getattr(instance, field) and not getattr(instance, field)._committed
+    ]
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_save, sender=Apartment)
+@receiver(post_save, sender=VacantHouse)
+def enqueue_upload_jobs(sender, instance, **kwargs):
+    # Enqueued in the saving transaction: workers see the jobs on commit.
+    for field in instance.__dict__.pop('_new_uploads', []):
+        enqueue_upload_processing(getattr(instance, field).name, is_image=UPLOAD_FIELDS[sender][field])
+
+
+@receiver(post_delete, sender=Property)
+@receiver(post_delete, sender=Apartment)
+@receiver(post_delete, sender=VacantHouse)
+def delete_renditions_on_delete(sender, instance, **kwargs):
+    for field, is_image in UPLOAD_FIELDS[sender].items():
+        image = getattr(instance, field)
+        if is_image and image:
+            transaction.on_commit(lambda name=image.name: _delete_unused_renditions(name))
+
+
+def _delete_unused_renditions(name):
+    # Content-addressed files are shared by every row that uploaded them.
+    if not media_references(name):
+        delete_renditions(name)
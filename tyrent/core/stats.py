@@ -0,0 +1,115 @@
+import asyncio
+
+from django.core.cache import cache
+from django.db import transaction
+from listings.models import Property
+from .shortcuts import alist
+
+HOMEPAGE_STATS_KEY = 'core:homepage-stats'
+HITS_KEY = 'core:homepage-stats:hits'
+MISSES_KEY = 'core:homepage-stats:misses'
+
+# Safety net only: writes invalidate the entry explicitly. With a per-process
+# cache (no REDIS_URL) other workers rely on this to pick up changes.
+HOMEPAGE_STATS_TIMEOUT = 300
+
+FEATURED_PROPERTIES = 6
+
+
+def _stats(totals, featured_properties):
+    total_units = totals['total_units']
+    occupied_units = totals['occupied_units']
+    occupancy_rate = round((occupied_units / total_units) * 100, 1) if total_units else 0
+    return {
+        'total_properties': totals['total_properties'],
+        'total_units': total_units,
+        'occupied_units': occupied_units,
+        'vacant_units': total_units - occupied_units,
+        'occupancy_rate': occupancy_rate,
+        'vacancy_rate': 100 - occupancy_rate if total_units else 0,
+        'featured_properties': featured_properties,
+    }
+
+
+def compute_homepage_stats():
+    """Platform totals and the featured-properties block, straight from the DB."""
+    return _stats(
+        Property.objects.totals(),
+        list(Property.objects.with_stats()[:FEATURED_PROPERTIES]),
+    )
+
+
+async def acompute_homepage_stats():
+    """compute_homepage_stats() with the two queries issued together."""
+    totals, featured = await asyncio.gather(
+        Property.objects.atotals(),
+        alist(Property.objects.with_stats()[:FEATURED_PROPERTIES]),
+    )
+    return _stats(totals, featured)
+
+
+def get_homepage_stats():
+    """Cached compute_homepage_stats(); counts hits and misses."""
+    stats = cache.get(HOMEPAGE_STATS_KEY)
+    if stats is not None:
+        _count(HITS_KEY)
+        return stats
+    _count(MISSES_KEY)
+    stats = compute_homepage_stats()
+    cache.set(HOMEPAGE_STATS_KEY, stats, HOMEPAGE_STATS_TIMEOUT)
+    return stats
+
+
+async def aget_homepage_stats():
+    """get_homepage_stats() for async views."""
+    stats = await cache.aget(HOMEPAGE_STATS_KEY)
+    if stats is not None:
+        await _acount(HITS_KEY)
+        return stats
+    await _acount(MISSES_KEY)
+    stats = await acompute_homepage_stats()
+    await cache.aset(HOMEPAGE_STATS_KEY, stats, HOMEPAGE_STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_homepage_stats():
+    """
+    Drop the cached stats now and again once the current transaction commits,
+    so a request that reads between the write and the commit cannot leave a
+    stale entry behind.
+    """
+    cache.delete(HOMEPAGE_STATS_KEY)
+    transaction.on_commit(lambda: cache.delete(HOMEPAGE_STATS_KEY))
+
+
+def cache_counters():
+    """Hit/miss counters for the homepage stats entry."""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0,
+    }
+
+
+def reset_cache_counters():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def _count(key):
+    # add() is a no-op if the key exists; incr() is atomic on shared backends.
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+async def _acount(key):
+    await cache.aadd(key, 0, timeout=None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, timeout=None)
@@ -0,0 +1,110 @@
+"""
+Content-addressed storage for uploaded listing media.
+
+Files are named by the SHA-256 of their bytes, under CONTENT_ROOT, whatever
+their original name or the field's upload_to. The same photo uploaded for
+twenty units is stored once, and since a name can never point at different
+bytes, serve_media marks these files immutable.
+
+Because one file can back many rows, nothing may delete or rewrite it in
+place: check media_references() before deleting, and use repoint() to move
+every reference to a new version.
+"""
+import hashlib
+import os
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+CONTENT_ROOT = 'content'
+HASH_CHUNK_SIZE = 64 * 1024
+EXTENSION_ALIASES = {'.jpeg': '.jpg', '.jpe': '.jpg', '.tif': '.tiff'}
+
+# Every FileField stored in ContentAddressedStorage, as (model label, field).
+MEDIA_FIELDS = [
+    ('listings.Property', 'main_image'),
+    ('listings.Apartment', 'image'),
+    ('listings.Apartment', 'video'),
+    ('accounts.VacantHouse', 'image'),
+]
+
+
+def content_hash(content):
+    """SHA-256 hex digest of a File, read in chunks; rewinds it afterwards."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def content_name(digest, original_name):
+    ext = os.path.splitext(original_name)[1].lower()
+    ext = EXTENSION_ALIASES.get(ext, ext)
+    return f'{CONTENT_ROOT}/{digest[:2]}/{digest}{ext}'
+
+
+def is_content_addressed(name):
+    return bool(name) and name.startswith(f'{CONTENT_ROOT}/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by content hash and skips duplicates."""
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        target = content_name(content_hash(content), name or content.name)
+        if self.exists(target):
+            return target
+        # A concurrent identical upload can still win the race; FileSystemStorage
+        # then stores ours under a suffixed name, which is merely a duplicate.
+        return super().save(target, content, max_length=max_length)
+
+
+content_storage = ContentAddressedStorage()
+
+
+def get_content_storage():
+    """Callable for FileField(storage=...), keeps the instance out of migrations."""
+    return content_storage
+
+
+def media_references(name):
+    """How many rows across MEDIA_FIELDS point at `name`."""
+    total = 0
+    for label, field in MEDIA_FIELDS:
+        total += apps.get_model(label).objects.filter(**{field: name}).count()
+    return total
+
+
+def repoint(old_name, new_name):
+    """
+    Move every reference from one stored file to another, carrying its
+    renditions over. Returns the number of rows updated.
+    """
+    from listings.cache import bump_data_version
+    from .models import ImageRendition
+    from .renditions import delete_renditions, forget_renditions
+    from .stats import invalidate_homepage_stats
+
+    updated = 0
+    for label, field in MEDIA_FIELDS:
+        updated += apps.get_model(label).objects.filter(**{field: old_name}).update(**{field: new_name})
+
+    if ImageRendition.objects.filter(source=new_name).exists():
+        delete_renditions(old_name)
+    else:
+        ImageRendition.objects.filter(source=old_name).update(source=new_name)
+        forget_renditions(old_name)
+        forget_renditions(new_name)
+
+    if updated:
+        # Cached pages and search results embed the old URL.
+        invalidate_homepage_stats()
+        bump_data_version()
+    return updated
@@ -0,0 +1,58 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from core.renditions import renditions_for
+
+register = template.Library()
+
+
+def _renditions(context, image):
+    # Views put renditions_for_many() of the page's images in the context as
+    # `image_renditions`, so a grid costs one lookup instead of one per image.
+    prefetched = context.get('image_renditions') or {}
+    if image.name in prefetched:
+        return prefetched[image.name]
+    return renditions_for(image.name)
+
+
+def _srcset(variants):
+    return ', '.join(f'{url} {width}w' for url, width, _ in variants)
+
+
+@register.simple_tag(takes_context=True)
+def responsive_image(context, image, sizes='100vw', **attrs):
+    """
+    <picture> with WebP and JPEG srcsets for an uploaded image, lazy-loaded
+    and with intrinsic width/height so the layout does not shift. Falls back
+    to the original file until its renditions exist.
+
+        {% responsive_image property.main_image sizes="(max-width: 768px) 100vw, 33vw" class="card-img-top" %}
+    """
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    renditions = _renditions(context, image)
+    jpeg = renditions.get('jpeg')
+    if not jpeg:
+        return format_html('<img src="{}"{}>', image.url, flatatt(attrs))
+
+    # Largest rendition as src: it is what a browser without srcset gets.
+    src, width, height = jpeg[-1]
+    attrs.update({'srcset': _srcset(jpeg), 'sizes': sizes, 'width': width, 'height': height})
+    webp = renditions.get('webp')
+    source = format_html(
+        '<source type="image/webp" srcset="{}" sizes="{}">', _srcset(webp), sizes,
+    ) if webp else ''
+    return format_html('<picture>{}<img src="{}"{}></picture>', source, src, flatatt(attrs))
+
+
+@register.simple_tag(takes_context=True)
+def rendition_url(context, image, width=640, fmt='jpeg'):
+    """URL of the smallest rendition at least `width` wide, e.g. for a video poster."""
+    variants = _renditions(context, image).get(fmt)
+    if not variants:
+        return image.url
+    for url, rendition_width, _ in variants:
+        if rendition_width >= width:
+            return url
+    return variants[-1][0]
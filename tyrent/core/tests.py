@@ -1,3 +1,797 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import random
+import shutil
+import smtplib
+import tempfile
+import unittest
+from unittest import mock
+from io import BytesIO, StringIO
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.messages import get_messages
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import Http404
+from django.template import Context, Template
+from django.test import AsyncRequestFactory, LiveServerTestCase, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from accounts.models import LandlordProfile, TenantProfile, User, VacantHouse
+from accounts.testing import make_landlord
+from bookings.models import Booking
+from listings.models import Property, Apartment
+from listings.services import update_statuses
+from . import jobs, outbox
+from .admin_tools import EstimatedCountPaginator
+from .models import ImageRendition, Job, OutboxEmail
+from .querybudget import QueryBudgetTestMixin, record_queries
+from .renditions import rendition_name, renditions_for, renditions_for_many
+from .stats import HOMEPAGE_STATS_KEY, cache_counters, get_homepage_stats
+from .storage import content_storage, is_content_addressed
+from .views import serve_media
+
+LARGE_TABLES = {
+    Property._meta.db_table,
+    Apartment._meta.db_table,
+    Booking._meta.db_table,
+}
+
+
+def seq_scans(plan):
+    """Relation names of every Seq Scan node in an EXPLAIN (FORMAT JSON) plan."""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan':
+        found.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        found.extend(seq_scans(child))
+    return found
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Query plans are checked on PostgreSQL only")
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN the main query of each hot view against a seeded dataset and fail
+    if the planner falls back to a sequential scan on a large table.
+    """
+
+    LANDLORDS = 50
+    PROPERTIES_PER_LANDLORD = 40
+    UNITS_PER_PROPERTY = 10
+    TENANTS = 200
+    BOOKINGS_PER_TENANT = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        now = timezone.now()
+        users = User.objects.bulk_create(
+            [User(username=f'landlord{i}', email=f'landlord{i}@example.com', full_name=f'Landlord {i}', role='LANDLORD')
+             for i in range(cls.LANDLORDS)]
+            + [User(username=f'tenant{i}', email=f'tenant{i}@example.com', full_name=f'Tenant {i}', role='TENANT')
+               for i in range(cls.TENANTS)]
+        )
+        landlords, tenants = users[:cls.LANDLORDS], users[cls.LANDLORDS:]
+        properties = Property.objects.bulk_create([
+            Property(
+                landlord=landlord, title=f'Property {i}', address=f'{i} Ngong Road, Nairobi',
+                property_type=rng.choice(['House', 'Apartment', 'Studio']),
+                date_added=now - timedelta(minutes=rng.randint(0, 500000)),
+            )
+            for landlord in landlords for i in range(cls.PROPERTIES_PER_LANDLORD)
+        ])
+        apartments = Apartment.objects.bulk_create([
+            Apartment(
+                property=prop, title=f'Unit {u}', rent=rng.randrange(8000, 90000, 500), location='Kilimani',
+                # Mostly occupied, as in production: vacant units are the minority
+                status='Vacant' if rng.random() < 0.1 else 'Occupied',
+                date_added=now - timedelta(minutes=rng.randint(0, 500000)),
+            )
+            for prop in properties for u in range(cls.UNITS_PER_PROPERTY)
+        ])
+        Booking.objects.bulk_create([
+            Booking(
+                tenant=tenant, apartment=rng.choice(apartments), start_date=date(2025, 1, 1),
+                created_at=now - timedelta(minutes=rng.randint(0, 500000)),
+            )
+            for tenant in tenants for _ in range(cls.BOOKINGS_PER_TENANT)
+        ])
+        with connection.cursor() as cursor:
+            for table in LARGE_TABLES:
+                cursor.execute(f'ANALYZE {table}')
+        cls.landlord = landlords[0]
+        cls.tenant = tenants[0]
+        cls.property = properties[0]
+
+    def assertNoSeqScan(self, queryset):
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        scanned = [name for name in seq_scans(plan) if name in LARGE_TABLES]
+        self.assertEqual(scanned, [], f"Sequential scan on {scanned}:\n{queryset.explain()}")
+
+    def test_homepage_vacant_grid(self):
+        self.assertNoSeqScan(
+            Apartment.objects.filter(status='Vacant').select_related('property')
+            .order_by('-date_added', '-id')[:13]
+        )
+
+    def test_property_list_default_order(self):
+        self.assertNoSeqScan(Property.objects.with_stats().order_by('-date_added', '-pk')[:25])
+
+    def test_property_list_by_type(self):
+        self.assertNoSeqScan(
+            Property.objects.with_stats().search(property_type='studio').order_by('-date_added', '-pk')[:25]
+        )
+
+    def test_property_detail_apartments(self):
+        self.assertNoSeqScan(self.property.apartments.all())
+
+    def test_property_vacant_units(self):
+        self.assertNoSeqScan(Apartment.objects.filter(property=self.property, status='Vacant'))
+
+    def test_landlord_properties(self):
+        self.assertNoSeqScan(Property.objects.filter(landlord=self.landlord).order_by('-date_added'))
+
+    def test_landlord_dashboard_apartments(self):
+        properties = Property.objects.filter(landlord=self.landlord)
+        self.assertNoSeqScan(
+            Apartment.objects.filter(property__in=properties).order_by('-date_added', '-id')[:25]
+        )
+
+    def test_tenant_bookings(self):
+        self.assertNoSeqScan(Booking.objects.filter(tenant=self.tenant).order_by('-created_at'))
+
+
+class QueryBudgetMiddlewareTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord()
+        cls.property = Property.objects.create(
+            landlord=cls.landlord, title='Riverside Court', property_type='House', address='Ngong Road',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.landlord)
+
+    def test_stats_recorded_per_url_name(self):
+        response = self.client.get(reverse('property_list'))
+        stats = response.wsgi_request.query_stats
+        self.assertEqual(stats['url_name'], 'property_list')
+        self.assertEqual(stats['budget'], 6)
+        self.assertGreater(stats['count'], 0)
+        self.assertGreaterEqual(stats['time_ms'], 0)
+
+    @override_settings(QUERY_BUDGETS={'property_list': 1})
+    def test_overrun_is_logged(self):
+        with self.assertLogs('tyrent.querybudget', level='WARNING') as logs:
+            self.client.get(reverse('property_list'))
+        self.assertIn('Query budget exceeded for property_list', logs.output[0])
+
+    def test_within_budget_is_silent(self):
+        with self.assertNoLogs('tyrent.querybudget', level='WARNING'):
+            self.client.get(reverse('property_list'))
+
+    def test_duplicate_fingerprints(self):
+        with record_queries() as recorder:
+            for _ in range(3):
+                list(Property.objects.filter(pk=self.property.pk))
+            list(Apartment.objects.all())
+        [(sql, times)] = recorder.duplicates().items()
+        self.assertIn(Property._meta.db_table, sql)
+        self.assertEqual(times, 3)
+
+    def test_assert_max_queries_fails_over_limit(self):
+        with self.assertRaises(AssertionError):
+            with self.assertMaxQueries(1):
+                list(Property.objects.all())
+                list(Apartment.objects.all())
+
+
+class MediaServingTests(SimpleTestCase):
+    CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        with open(f'{self.media_root}/tour.mp4', 'wb') as f:
+            f.write(self.CONTENT)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE_BACKEND=None)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.factory = RequestFactory()
+
+    def get(self, path='tour.mp4', **headers):
+        return serve_media(self.factory.get(f'/media/{path}', headers=headers), path)
+
+    def test_full_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+
+    def test_byte_ranges(self):
+        for header, start, end in [('bytes=0-99', 0, 99), ('bytes=10000-', 10000, 10239),
+                                   ('bytes=-40', 10200, 10239), ('bytes=10200-99999', 10200, 10239)]:
+            with self.subTest(header):
+                response = self.get(range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/10240')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+                self.assertEqual(b''.join(response.streaming_content), self.CONTENT[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(range='bytes=20000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10240')
+
+    def test_conditional_get(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(if_none_match=etag).status_code, 304)
+
+    def test_stale_if_range_serves_whole_file(self):
+        response = self.get(range='bytes=0-99', if_range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.get(range='bytes=0-99', if_range=etag).status_code, 206)
+
+    async def test_asgi_streams_with_async_iterator(self):
+        factory = AsyncRequestFactory()
+        for headers, status, body in [({}, 200, self.CONTENT), ({'range': 'bytes=100-199'}, 206, self.CONTENT[100:200])]:
+            with self.subTest(headers=headers):
+                response = serve_media(factory.get('/media/tour.mp4', headers=headers), 'tour.mp4')
+                self.assertEqual(response.status_code, status)
+                self.assertTrue(response.is_async)
+                self.assertEqual(response['Content-Length'], str(len(body)))
+                self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), body)
+
+    def test_path_traversal_is_404(self):
+        with self.assertRaises(Http404):
+            self.get('../settings.py')
+
+    def test_accel_redirect(self):
+        with override_settings(MEDIA_SENDFILE_BACKEND='x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX='/protected/'):
+            response = self.get(range='bytes=0-99')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/tour.mp4')
+        self.assertEqual(response.content, b'')
+
+
+def jpeg_bytes(size=(1200, 800), exif=None):
+    buffer = BytesIO()
+    image = Image.new('RGB', size, 'teal')
+    image.save(buffer, 'JPEG', exif=exif or Image.Exif())
+    return buffer.getvalue()
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.landlord = make_landlord()
+
+    def test_upload_enqueues_processing_instead_of_running_it(self):
+        prop = Property.objects.create(
+            landlord=self.landlord, title='Riverside Court', property_type='House', address='Ngong Road',
+            main_image=SimpleUploadedFile('front.jpg', jpeg_bytes()),
+        )
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.payload), ('strip_metadata', {'name': prop.main_image.name}))
+
+        # Saving again without a new upload queues nothing.
+        prop.save()
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_strip_metadata_then_resize_and_hash(self):
+        exif = Image.Exif()
+        exif[0x8825] = {2: (1.0, 17.0, 0.0)}  # GPSInfo
+        exif[0x0112] = 6  # Orientation: rotate 90
+        prop = Property.objects.create(
+            landlord=self.landlord, title='Riverside Court', property_type='House', address='Ngong Road',
+            main_image=SimpleUploadedFile('geo.jpg', jpeg_bytes(exif=exif)),
+        )
+        original = prop.main_image.name
+
+        self.assertEqual(jobs.run_pending(), 3)
+        self.assertFalse(Job.objects.exclude(status='Done').exists())
+        prop.refresh_from_db()
+        self.assertNotEqual(prop.main_image.name, original)
+        with prop.main_image.open() as f, Image.open(f) as image:
+            self.assertFalse(image.getexif())
+            self.assertEqual(image.size, (800, 1200))
+        self.assertEqual(Job.objects.get(kind='resize_image').result, {'renditions': 4})  # 320w, 640w x JPEG, WebP
+        hashed = Job.objects.get(kind='hash_file').result['sha256']
+        self.assertEqual(prop.main_image.name, f'content/{hashed[:2]}/{hashed}.jpg')
+
+    def test_failure_is_retried_with_backoff_then_failed(self):
+        job = jobs.enqueue('hash_file', max_attempts=2, name='missing.jpg')
+        with self.assertLogs('tyrent.jobs', level='WARNING'):
+            jobs.run(jobs.claim()[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('Queued', 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('missing.jpg', job.last_error)
+        self.assertEqual(jobs.claim(), [])  # not due yet
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('tyrent.jobs', level='ERROR'):
+            jobs.run(jobs.claim()[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('Failed', 2))
+
+    def test_stale_running_job_is_reclaimed(self):
+        job = jobs.enqueue('hash_file', name='missing.jpg')
+        Job.objects.filter(pk=job.pk).update(status='Running', locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual([j.pk for j in jobs.claim()], [job.pk])
+        self.assertEqual(jobs.claim(), [])
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('send_fax')
+
+
+class ResponsiveImageTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord()
+        cls.properties = Property.objects.bulk_create([
+            Property(landlord=cls.landlord, title=f'Block {i}', property_type='House', address=f'{i} Ngong Road',
+                     main_image=f'properties/block-{i}.jpg')
+            for i in range(12)
+        ])
+        ImageRendition.objects.bulk_create([
+            ImageRendition(source=prop.main_image.name, width=width, format=fmt, actual_width=width,
+                           actual_height=width // 2, size=1000,
+                           file=rendition_name(prop.main_image.name, width, fmt))
+            for prop in cls.properties[:10] for width in (320, 640) for fmt in ('webp', 'jpeg')
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, image, **context):
+        template = Template('{% load renditions %}{% responsive_image image sizes="50vw" class="card" %}')
+        return template.render(Context({'image': image, **context}))
+
+    def test_picture_with_srcsets(self):
+        html = self.render(self.properties[0].main_image)
+        self.assertInHTML(
+            '<picture>'
+            '<source type="image/webp" srcset="/media/renditions/properties/block-0-320w.webp 320w, '
+            '/media/renditions/properties/block-0-640w.webp 640w" sizes="50vw">'
+            '<img src="/media/renditions/properties/block-0-640w.jpg" class="card" loading="lazy" decoding="async" '
+            'srcset="/media/renditions/properties/block-0-320w.jpg 320w, /media/renditions/properties/block-0-640w.jpg 640w" '
+            'sizes="50vw" width="640" height="320">'
+            '</picture>',
+            html,
+        )
+
+    def test_original_until_renditions_exist(self):
+        html = self.render(self.properties[11].main_image)
+        self.assertInHTML(
+            '<img src="/media/properties/block-11.jpg" class="card" loading="lazy" decoding="async">', html,
+        )
+
+    def test_lookups_are_batched_and_cached(self):
+        names = [prop.main_image.name for prop in self.properties]
+        with self.assertNumQueries(1):
+            renditions = renditions_for_many(names)
+        self.assertEqual(renditions[names[11]], {})
+        self.assertEqual([width for _, width, _ in renditions[names[0]]['jpeg']], [320, 640])
+        with self.assertNumQueries(0):
+            self.assertEqual(renditions_for_many(names), renditions)
+            self.assertEqual(renditions_for(names[3]), renditions[names[3]])
+
+    def test_prefetched_renditions_are_used_by_the_tag(self):
+        image = self.properties[0].main_image
+        renditions = renditions_for_many([image.name])
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertIn('<picture>', self.render(image, image_renditions=renditions))
+
+    def test_property_list_looks_up_renditions_once(self):
+        self.client.force_login(self.landlord)
+        with self.assertMaxQueries(6):
+            response = self.client.get(reverse('property_list'))
+        self.assertContains(response, '<picture>', count=10)
+        self.assertWithinQueryBudget(response)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.landlord = make_landlord()
+        self.property = Property.objects.create(
+            landlord=self.landlord, title='Riverside Court', property_type='House', address='Ngong Road',
+        )
+
+    def test_identical_uploads_are_stored_once(self):
+        photo = jpeg_bytes()
+        units = [
+            Apartment.objects.create(
+                property=self.property, title=f'Unit {i}', rent=10000, location='Kilimani',
+                image=SimpleUploadedFile(f'IMG_{i}.JPEG', photo),
+            )
+            for i in range(3)
+        ]
+        names = {unit.image.name for unit in units}
+        self.assertEqual(len(names), 1)
+        [name] = names
+        self.assertRegex(name, r'^content/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, os.path.dirname(name)))), 1)
+
+    def test_content_files_are_immutable(self):
+        name = content_storage.save('anything.mp4', ContentFile(b'video'))
+        response = serve_media(RequestFactory().get(f'/media/{name}'), name)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+    def test_rehash_media_rewrites_legacy_paths(self):
+        photo = jpeg_bytes()
+        for folder in ('properties', 'apartments'):
+            os.makedirs(os.path.join(self.media_root, folder))
+            with open(os.path.join(self.media_root, folder, 'same.jpg'), 'wb') as f:
+                f.write(photo)
+        Property.objects.filter(pk=self.property.pk).update(main_image='properties/same.jpg')
+        unit = Apartment.objects.create(property=self.property, title='Unit 1', rent=10000, location='Kilimani')
+        Apartment.objects.filter(pk=unit.pk).update(image='apartments/same.jpg')
+
+        call_command('rehash_media', '--delete-originals', stdout=StringIO(), stderr=StringIO())
+
+        self.property.refresh_from_db()
+        unit.refresh_from_db()
+        self.assertEqual(self.property.main_image.name, unit.image.name)
+        self.assertTrue(is_content_addressed(unit.image.name))
+        self.assertTrue(content_storage.exists(unit.image.name))
+        self.assertFalse(content_storage.exists('properties/same.jpg'))
+
+
+class CSVExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass', full_name='Admin', role='ADMIN',
+        )
+        landlord = make_landlord(full_name='=Land Lord')
+        tenant = User.objects.create_user(
+            username='tenant', email='tenant@example.com', password='pass', full_name='Ten Ant', role='TENANT',
+        )
+        prop = Property.objects.create(landlord=landlord, title='Riverside Court', property_type='House', address='Ngong Road')
+        cls.apartments = Apartment.objects.bulk_create([
+            Apartment(property=prop, title=f'Unit {i}', rent=10000 + i, location='Kilimani')
+            for i in range(60)
+        ])
+        Property.objects.refresh_stats()
+        Booking.objects.bulk_create([
+            Booking(tenant=tenant, apartment=apartment, start_date=date(2026, 6, 1),
+                    status='Pending' if i % 2 else 'Rejected')
+            for i, apartment in enumerate(cls.apartments)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def export(self, response):
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content).decode()
+        return list(csv.DictReader(StringIO(content)))
+
+    def test_export_all_matching_filter(self):
+        url = reverse('admin:bookings_booking_export_csv')
+        changelist = self.client.get(reverse('admin:bookings_booking_changelist'), {'status__exact': 'Pending'})
+        self.assertContains(changelist, f'{url}?status__exact=Pending')
+
+        rows = self.export(self.client.get(url, {'status__exact': 'Pending'}))
+        self.assertEqual(len(rows), 30)
+        self.assertEqual({r['status'] for r in rows}, {'Pending'})
+        self.assertEqual(rows[0]['property'], 'Riverside Court')
+        self.assertEqual(rows[0]['landlord'], "'=Land Lord")
+        self.assertEqual(rows[0]['tenant'], 'Ten Ant')
+
+    def test_export_selected_action(self):
+        ids = [a.pk for a in self.apartments[:5]]
+        response = self.client.post(reverse('admin:listings_apartment_changelist'),
+                                    {'action': 'export_csv', '_selected_action': ids})
+        rows = self.export(response)
+        self.assertEqual(sorted(int(r['id']) for r in rows), ids)
+
+    def test_users_and_properties_export(self):
+        rows = self.export(self.client.get(reverse('admin:accounts_user_export_csv'), {'role__exact': 'LANDLORD'}))
+        self.assertEqual([r['username'] for r in rows], ['landlord'])
+        rows = self.export(self.client.get(reverse('admin:listings_property_export_csv')))
+        self.assertEqual(rows[0]['units'], '60')
+
+    def test_export_needs_admin(self):
+        self.client.logout()
+        response = self.client.get(reverse('admin:bookings_booking_export_csv'))
+        self.assertEqual(response.status_code, 302)
+
+
+class AdminChangelistScalingTests(TestCase):
+    """Changelists cost the same number of queries at 5 rows as at 50."""
+
+    CHANGELISTS = [
+        ('admin:accounts_user_changelist', {}),
+        ('admin:accounts_user_changelist', {'q': 'tenant'}),
+        ('admin:accounts_tenantprofile_changelist', {}),
+        ('admin:accounts_landlordprofile_changelist', {}),
+        ('admin:accounts_vacanthouse_changelist', {'q': 'house'}),
+        ('admin:listings_property_changelist', {}),
+        ('admin:listings_apartment_changelist', {}),
+        ('admin:listings_apartment_changelist', {'status__exact': 'Vacant', 'location': 'Kilimani', 'q': 'Jane'}),
+        ('admin:bookings_booking_changelist', {}),
+        ('admin:bookings_booking_changelist', {'status__exact': 'Pending'}),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass', full_name='Admin', role='ADMIN',
+        )
+        cls.batch = 0
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def add_rows(self, n):
+        for i in range(self.batch, self.batch + n):
+            landlord = User.objects.create_user(
+                username=f'landlord{i}', email=f'landlord{i}@example.com', password=None,
+                full_name=f'Landlord {i}', role='LANDLORD',
+            )
+            tenant = User.objects.create_user(
+                username=f'tenant{i}', email=f'tenant{i}@example.com', password=None,
+                full_name=f'Tenant {i}', role='TENANT',
+            )
+            profile = LandlordProfile.objects.create(user=landlord)
+            TenantProfile.objects.create(user=tenant)
+            VacantHouse.objects.create(landlord=profile, title=f'House {i}', description='Spacious')
+            prop = Property.objects.create(landlord=landlord, title=f'Court {i}', property_type='House', address='Ngong Road')
+            apartment = Apartment.objects.create(property=prop, title=f'Unit {i}', rent=10000, location='Kilimani',
+                                                 tenant_name='Jane')
+            Booking.objects.create(tenant=tenant, apartment=apartment, start_date=date(2026, 6, 1))
+        self.batch += n
+
+    def query_counts(self):
+        counts = []
+        for name, params in self.CHANGELISTS:
+            cache.clear()
+            with record_queries() as recorder:
+                response = self.client.get(reverse(name), params)
+            self.assertEqual(response.status_code, 200, name)
+            counts.append(recorder.count)
+        return counts
+
+    def test_changelists_render_in_fixed_queries(self):
+        self.add_rows(5)
+        small = self.query_counts()
+        self.add_rows(45)
+        self.assertEqual(self.query_counts(), small)
+        for (name, params), count in zip(self.CHANGELISTS, small):
+            self.assertLessEqual(count, 10, f"{name} {params}")
+
+    def test_filters_apply(self):
+        self.add_rows(3)
+        response = self.client.get(reverse('admin:listings_apartment_changelist'),
+                                   {'property': str(Property.objects.get(title='Court 1').pk)})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get(reverse('admin:listings_apartment_changelist'), {'location': 'Kilimani'})
+        self.assertEqual(response.context['cl'].result_count, 3)
+        self.assertContains(response, 'name="property"')
+
+    def test_profile_search_fields(self):
+        self.add_rows(3)
+        LandlordProfile.objects.filter(user__username='landlord1').update(
+            company_name='Acme Estates', business_permit_number='NBI-2291',
+        )
+        TenantProfile.objects.filter(user__username='tenant2').update(preferred_location='Westlands')
+        for name, q, username in [
+            ('admin:accounts_landlordprofile_changelist', 'acme', 'landlord1'),
+            ('admin:accounts_landlordprofile_changelist', 'nbi-2291', 'landlord1'),
+            ('admin:accounts_tenantprofile_changelist', 'westlands', 'tenant2'),
+        ]:
+            response = self.client.get(reverse(name), {'q': q})
+            self.assertEqual([p.user.username for p in response.context['cl'].result_list], [username], q)
+
+    def test_estimated_count_paginator(self):
+        self.add_rows(3)
+        with mock.patch('core.admin_tools.estimated_count', return_value=2_000_000):
+            self.assertEqual(EstimatedCountPaginator(Apartment.objects.order_by('pk'), 100).count, 2_000_000)
+            self.assertEqual(EstimatedCountPaginator(Apartment.objects.filter(status='Vacant').order_by('pk'), 100).count, 3)
+        with mock.patch('core.admin_tools.estimated_count', return_value=500):
+            self.assertEqual(EstimatedCountPaginator(Apartment.objects.order_by('pk'), 100).count, 3)
+
+
+class HomepageStatsCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord()
+        cls.prop = Property.objects.create(landlord=cls.landlord, title='Block', property_type='Apartment',
+                                           address='1 Ngong Road')
+        Apartment.objects.create(property=cls.prop, title='Unit 1', rent=10000, location='Kilimani')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hits_and_misses_are_counted(self):
+        self.assertEqual(get_homepage_stats()['total_units'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_homepage_stats()['total_units'], 1)
+        self.assertEqual(cache_counters(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+        self.client.get(reverse('home'))
+        self.assertEqual(cache_counters()['hits'], 2)
+
+    def test_listing_writes_invalidate(self):
+        get_homepage_stats()
+        apartment = Apartment.objects.create(property=self.prop, title='Unit 2', rent=10000, location='Kilimani')
+        self.assertEqual(get_homepage_stats()['total_units'], 2)
+
+        apartment.status = 'Occupied'
+        apartment.save()
+        self.assertEqual(get_homepage_stats()['occupancy_rate'], 50.0)
+
+        apartment.delete()
+        self.assertEqual(get_homepage_stats()['total_units'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update_statuses({Apartment.objects.get().pk: ('Occupied', 'Jane')})
+        self.assertEqual(get_homepage_stats()['occupancy_rate'], 100.0)
+        self.assertEqual(cache_counters()['misses'], 5)
+
+    def test_command_reports_and_resets_counters(self):
+        get_homepage_stats()
+        get_homepage_stats()
+        out = StringIO()
+        call_command('homepage_cache_stats', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'hits 1  misses 1  hit rate 50.00%')
+
+        call_command('homepage_cache_stats', '--reset', stdout=StringIO())
+        self.assertEqual(cache_counters(), {'hits': 0, 'misses': 0, 'hit_rate': 0})
+        self.assertIsNotNone(cache.get(HOMEPAGE_STATS_KEY))
+
+
+class BenchmarkCommandTests(TestCase):
+    ARGS = [
+        '--landlords', '2', '--properties-per-landlord', '2', '--units-per-property', '2',
+        '--tenants', '3', '--bookings-per-tenant', '2', '--requests', '2', '--warmup', '0',
+    ]
+
+    def run_benchmark(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('benchmark', *self.ARGS, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_reports_every_view_and_rolls_back(self):
+        output, _ = self.run_benchmark()
+        report = json.loads(output)
+        self.assertEqual(report['meta']['dataset']['landlords'], 2)
+        for label, result in report['results'].items():
+            self.assertEqual(result['status'], 200, label)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['queries'], result['query_budget'], label)
+            self.assertGreater(result['peak_memory_kib'], 0)
+        self.assertIn('landlord_dashboard', report['results'])
+        self.assertFalse(User.objects.filter(username__startswith='benchmark-').exists())
+
+    def test_baseline_flags_query_regressions(self):
+        output, _ = self.run_benchmark('--only', 'property_detail')
+        report = json.loads(output)
+        report['results']['property_detail']['queries'] -= 1
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(report, f)
+        self.addCleanup(os.unlink, f.name)
+
+        with self.assertRaisesMessage(CommandError, 'property_detail'):
+            self.run_benchmark('--only', 'property_detail', '--baseline', f.name, '--max-regression', '1000')
+
+
+class FlakyEmailBackend(locmem.EmailBackend):
+    """locmem backend that counts opens and fails messages whose subject says so."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'fail' in message.subject:
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+class OutboxTests(TestCase):
+    def test_contact_form_queues_instead_of_sending(self):
+        response = self.client.post('/', {
+            'name': 'Jane\nBcc: spam@example.com', 'email': 'jane@example.com', 'message': 'Is Unit 4 free?',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.kind, email.status, email.reply_to), ('contact', 'Queued', ['jane@example.com']))
+        self.assertEqual(email.subject, 'Contact Form Submission from Jane Bcc: spam@example.com')
+
+        self.assertEqual(outbox.send_pending(), (1, 0))
+        self.assertEqual(mail.outbox[0].reply_to, ['jane@example.com'])
+        self.assertEqual(OutboxEmail.objects.get().status, 'Sent')
+
+    def test_contact_form_rejects_bad_reply_address(self):
+        for email in ('not-an-address', 'jane@example.com\nBcc: spam@example.com'):
+            with self.subTest(email=email):
+                response = self.client.post('/', {'name': 'Jane', 'email': email, 'message': 'Hello'})
+                self.assertEqual([str(m) for m in get_messages(response.wsgi_request)],
+                                 ['Please enter a valid email address.'])
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_batches_share_one_connection(self):
+        for i in range(5):
+            outbox.queue_email(f"Message {i}", "Body", ['tenant@example.com'])
+        connection = FlakyEmailBackend()
+        self.assertEqual(outbox.send_pending(batch_size=3, connection=connection), (5, 0))
+        self.assertEqual(connection.opened, 2)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_failures_retry_with_backoff_then_dead_letter(self):
+        email = outbox.queue_email("Please fail", "Body", ['tenant@example.com'], max_attempts=2)
+        outbox.queue_email("Fine", "Body", ['tenant@example.com'])
+        with self.assertLogs('tyrent.outbox', level='WARNING'):
+            self.assertEqual(outbox.send_pending(connection=FlakyEmailBackend()), (1, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('Queued', 1))
+        self.assertGreater(email.send_after, timezone.now())
+        self.assertIn('SMTPServerDisconnected', email.last_error)
+        self.assertEqual(outbox.claim(), [])  # not due yet
+
+        OutboxEmail.objects.filter(pk=email.pk).update(send_after=timezone.now())
+        with self.assertLogs('tyrent.outbox', level='ERROR'):
+            self.assertEqual(outbox.send_pending(connection=FlakyEmailBackend()), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('Dead', 2))
+        self.assertEqual(outbox.claim(), [])
+
+    def test_send_outbox_command(self):
+        outbox.queue_email("Hello", "Body", ['tenant@example.com'])
+        stdout = StringIO()
+        call_command('send_outbox', '--burst', stdout=stdout)
+        self.assertIn('Sent 1 emails, 0 failed.', stdout.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    def test_reports_each_path_and_target(self):
+        stdout = StringIO()
+        output = os.path.join(tempfile.mkdtemp(), 'load.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(output))
+        call_command(
+            'loadtest', '--target', f'live={self.live_server_url}', '--path', '/listings/search/?property_type=house',
+            '--path', '/missing/', '--requests', '12', '--concurrency', '4', '--output', output, stdout=stdout,
+        )
+        with open(output) as f:
+            results = json.load(f)
+        search = results['/listings/search/?property_type=house']['live']
+        self.assertEqual((search['statuses'], search['errors']), ({'200': 12}, {}))
+        self.assertLessEqual(search['p50_ms'], search['p99_ms'])
+        self.assertEqual(results['/missing/']['live']['statuses'], {'404': 12})
+
+    def test_rejects_malformed_target(self):
+        with self.assertRaises(CommandError):
+            call_command('loadtest', '--target', 'localhost:8000', stdout=StringIO())
@@ -1,16 +1,30 @@
 # core/views.py and accounts/views.py combined
+import asyncio
+
 from django.shortcuts import render, redirect
-from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from listings.models import Property, Apartment
-from django.db.models import Avg
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from listings.models import Apartment
+from listings.portfolio import apartment_page, portfolio
+from django.views.decorators.http import require_safe
 from accounts.models import LandlordProfile
+from .media import media_response
+from .outbox import aqueue_email
+from .pagination import CursorPaginator
+from .querybudget import query_budget
+from .renditions import arenditions_for_many, renditions_for_many
+from .shortcuts import arender
+from .stats import aget_homepage_stats
+
+VACANT_APARTMENTS_PER_PAGE = 12
 
 # ====================== CORE VIEWS ======================
 
-def home(request):
+@query_budget(7)
+async def home(request):
     # ---------- CONTACT FORM ----------
     if request.method == "POST":
         name = request.POST.get("name")
@@ -19,47 +33,47 @@ def home(request):
 
         if name and email and message:
             try:
-                send_mail(
-                    subject=f"Contact Form Submission from {name}",
-                    message=message,
-                    from_email=email,
-                    recipient_list=[settings.DEFAULT_FROM_EMAIL],
+                # A bad address would fail every send attempt of the message.
+                validate_email(email)
+            except ValidationError:
+                messages.error(request, "Please enter a valid email address.")
+            else:
+                # Sent by `manage.py send_outbox`; the visitor's address goes in
+                # Reply-To, since we cannot send mail as them.
+                await aqueue_email(
+                    subject=f"Contact Form Submission from {' '.join(name.split())}",
+                    body=message,
+                    to=[settings.DEFAULT_FROM_EMAIL],
+                    reply_to=[email],
+                    kind='contact',
                 )
                 messages.success(request, "Your message has been sent successfully!")
-            except Exception:
-                messages.error(request, "Error sending message. Please try again later.")
-
-    # ---------- PROPERTY STATS ----------
-    total_properties = Property.objects.count()
-    total_units = Apartment.objects.count()
-    occupied_units = Apartment.objects.filter(status='Occupied').count()
-    vacant_units = total_units - occupied_units
-
-    occupancy_rate = round((occupied_units / total_units) * 100, 1) if total_units > 0 else 0
-    vacancy_rate = 100 - occupancy_rate if total_units > 0 else 0
-
-    # ---------- FEATURED PROPERTIES ----------
-    featured_properties = Property.objects.all()[:6]
-    properties_with_avg_rent = []
-    for p in featured_properties:
-        avg_rent = p.apartments.aggregate(avg_rent=Avg('rent'))['avg_rent'] or 0
-        p.avg_rent = avg_rent
-        properties_with_avg_rent.append(p)
 
+    # ---------- PROPERTY STATS & FEATURED PROPERTIES (cached) ----------
     # ---------- VACANT APARTMENTS ----------
-    vacant_apartments = Apartment.objects.filter(status='Vacant').order_by('-id')  # all vacant apartments
+    stats, vacant_apartments, _ = await asyncio.gather(
+        aget_homepage_stats(),
+        CursorPaginator(
+            Apartment.objects.filter(status='Vacant').select_related('property'),
+            ordering=('-date_added', '-id'),
+            per_page=VACANT_APARTMENTS_PER_PAGE,
+        ).apage(request.GET.get('cursor')),
+        request.auser(),
+    )
 
     context = {
-        'total_properties': total_properties,
-        'total_units': total_units,
-        'occupancy_rate': occupancy_rate,
-        'vacancy_rate': vacancy_rate,
-        'properties': properties_with_avg_rent,
+        'total_properties': stats['total_properties'],
+        'total_units': stats['total_units'],
+        'occupancy_rate': stats['occupancy_rate'],
+        'vacancy_rate': stats['vacancy_rate'],
+        'properties': stats['featured_properties'],
         'vacant_apartments': vacant_apartments,
+        'next_query': vacant_apartments.next_query(request) if vacant_apartments.has_next else '',
+        'image_renditions': await arenditions_for_many(a.image.name for a in vacant_apartments),
         'MEDIA_URL': settings.MEDIA_URL,
     }
 
-    return render(request, 'core/home.html', context)
+    return await arender(request, 'core/home.html', context)
 
 
 def about(request):
@@ -70,8 +84,16 @@ def contact(request):
     return render(request, 'core/contact.html')
 
 
+@query_budget(0)
+@require_safe
+def serve_media(request, path):
+    """Uploaded media with Range/conditional request support; see core.media."""
+    return media_response(request, path)
+
+
 # ====================== ACCOUNTS VIEWS ======================
 
+@query_budget(7)
 @login_required
 @login_required
 def landlord_dashboard(request):
@@ -86,28 +108,17 @@ def landlord_dashboard(request):
         messages.error(request, "Landlord profile not found.")
         return redirect("home")
 
-    # Use request.user for queries since Property.landlord is a User FK
-    properties = Property.objects.filter(landlord=request.user)
-
-    vacant_apartments = Apartment.objects.filter(
-        property__landlord=request.user,
-        status='Vacant'
-    ).order_by('-id')
-
-    # Calculate total and vacant units per property
-    properties_data = []
-    for prop in properties:
-        total_units = prop.apartments.count()
-        vacant_units = prop.apartments.filter(status='Vacant').count()
-        properties_data.append({
-            'property': prop,
-            'total_units': total_units,
-            'vacant_units': vacant_units,
-        })
+    summaries, totals = portfolio(request.user)
+    vacant_apartments = apartment_page(request.user, request.GET.get('cursor'), status='Vacant')
 
     context = {
-        'properties': properties_data,
+        'landlord': landlord_profile,
+        'properties': summaries,
+        'totals': totals,
+        'apartments': vacant_apartments,
         'vacant_apartments': vacant_apartments,
+        'next_query': vacant_apartments.next_query(request) if vacant_apartments.has_next else '',
+        'image_renditions': renditions_for_many(a.image.name for a in vacant_apartments),
         'landlord_profile': landlord_profile,  # optional, for template
     }
 
@@ -1,17 +1,98 @@
-from django.contrib import admin
-from .models import Property, Apartment
+from django.contrib import admin, messages
+from django.contrib.postgres.search import SearchQuery
+from core.admin_tools import EstimatedCountPaginator, InputListFilter, TopValuesListFilter
+from core.csv_export import CSVExportMixin
+from .models import SEARCH_CONFIG, Property, Apartment
+from .services import update_statuses
+
+
+class PropertyFilter(InputListFilter):
+    """Property id, or words matched against the property search vector."""
+    title = 'property'
+    parameter_name = 'property'
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if value.isdigit():
+            return queryset.filter(property_id=int(value))
+        if value:
+            query = SearchQuery(value, search_type='websearch', config=SEARCH_CONFIG)
+            return queryset.filter(property__search_vector=query)
+        return queryset
+
+
+class LocationFilter(TopValuesListFilter):
+    title = 'location'
+    parameter_name = 'location'
+    field = 'location'
+
 
 # ---------- Property Admin ----------
 @admin.register(Property)
-class PropertyAdmin(admin.ModelAdmin):
-    list_display = ('title', 'property_type', 'address', 'date_added')
+class PropertyAdmin(CSVExportMixin, admin.ModelAdmin):
+    list_display = ('title', 'property_type', 'address', 'unit_count', 'occupied_count', 'date_added')
     list_filter = ('property_type', 'date_added')
     search_fields = ('title', 'address', 'description')
+    autocomplete_fields = ('landlord',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    export_columns = [
+        ('id', 'pk'),
+        ('title', 'title'),
+        ('property_type', 'property_type'),
+        ('address', 'address'),
+        ('latitude', 'latitude'),
+        ('longitude', 'longitude'),
+        ('landlord', 'landlord__full_name'),
+        ('landlord_email', 'landlord__email'),
+        ('units', 'unit_count'),
+        ('occupied', 'occupied_count'),
+        ('vacant', 'vacant_count'),
+        ('average_rent', 'avg_rent'),
+        ('date_added', 'date_added'),
+    ]
+
+    def get_search_results(self, request, queryset, search_term):
+        # search_vector and the address trigram index instead of icontains scans.
+        if not search_term.strip():
+            return queryset, False
+        return queryset.full_text(search_term), False
 
 # ---------- Apartment Admin ----------
 @admin.register(Apartment)
-class ApartmentAdmin(admin.ModelAdmin):
+class ApartmentAdmin(CSVExportMixin, admin.ModelAdmin):
     list_display = ('property', 'unit_number', 'status', 'rent', 'location', 'tenant_name', 'date_added')
-    list_filter = ('status', 'property', 'location')
-    search_fields = ('unit_number', 'tenant_name', 'property__title', 'location')
+    list_filter = ('status', PropertyFilter, LocationFilter)
+    search_fields = ('=unit_number', 'tenant_name', 'location')
     fields = ('property', 'unit_number', 'rent', 'location', 'status', 'tenant_name', 'notes')
+    list_select_related = ('property',)
+    autocomplete_fields = ('property',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    export_columns = [
+        ('id', 'pk'),
+        ('property', 'property__title'),
+        ('landlord', 'property__landlord__full_name'),
+        ('title', 'title'),
+        ('unit_number', 'unit_number'),
+        ('bedrooms', 'bedrooms'),
+        ('rent', 'rent'),
+        ('location', 'location'),
+        ('status', 'status'),
+        ('tenant_name', 'tenant_name'),
+        ('date_added', 'date_added'),
+    ]
+    actions = ['mark_vacant', 'mark_occupied']
+
+    def _set_status(self, request, queryset, status):
+        changes = {pk: (status, tenant_name) for pk, tenant_name in queryset.values_list('pk', 'tenant_name')}
+        updated = update_statuses(changes)
+        self.message_user(request, f"{updated} apartments marked {status.lower()}.", messages.SUCCESS)
+
+    @admin.action(description="Mark selected apartments vacant")
+    def mark_vacant(self, request, queryset):
+        self._set_status(request, queryset, 'Vacant')
+
+    @admin.action(description="Mark selected apartments occupied (keeps tenant names)")
+    def mark_occupied(self, request, queryset):
+        self._set_status(request, queryset, 'Occupied')
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+DATA_VERSION_KEY = 'listings:data-version'
+LAST_WRITE_KEY = 'listings:last-write'
+
+# Cached search bodies and the version key both expire, so a worker with a
+# per-process cache that missed a bump converges within this window.
+SEARCH_CACHE_TIMEOUT = 300
+
+
+async def aget_data_version():
+    """
+    Token that changes on every Property/Apartment write and is part of
+    every search cache key. It expires, so a new token can appear without
+    a write; see aget_last_write() for the write time itself.
+    """
+    version = await cache.aget(DATA_VERSION_KEY)
+    if version is None:
+        await cache.aadd(DATA_VERSION_KEY, time.time(), SEARCH_CACHE_TIMEOUT)
+        version = await cache.aget(DATA_VERSION_KEY)
+    return version
+
+
+async def aget_last_write():
+    """
+    Time of the last Property/Apartment write, the Last-Modified and ETag
+    basis of listing responses. Only bump_data_version() moves it; it is
+    seeded with the current time after a cache flush.
+    """
+    last_write = await cache.aget(LAST_WRITE_KEY)
+    if last_write is None:
+        await cache.aadd(LAST_WRITE_KEY, time.time(), None)
+        last_write = await cache.aget(LAST_WRITE_KEY)
+    return last_write
+
+
+def _bump():
+    now = time.time()
+    cache.set(DATA_VERSION_KEY, now, SEARCH_CACHE_TIMEOUT)
+    cache.set(LAST_WRITE_KEY, now, None)
+
+
+def bump_data_version():
+    """Invalidate every cached search response now and again on commit."""
+    _bump()
+    transaction.on_commit(_bump)
+
+
+async def asearch_cache_key(params, cursor=''):
+    """Cache key for a normalized search: same filters, same key."""
+    canonical = json.dumps({**params, 'cursor': cursor}, sort_keys=True)
+    digest = hashlib.sha1(canonical.encode()).hexdigest()
+    return f'listings:search:{await aget_data_version()!r}:{digest}'
+
+
+async def asearch_validators(params, cursor=''):
+    """
+    (ETag, Last-Modified timestamp) of a search response. Same filters and
+    no write since: same ETag, however often the cache turned over.
+    """
+    last_write = await aget_last_write()
+    canonical = json.dumps({**params, 'cursor': cursor, 'last_write': last_write}, sort_keys=True)
+    return hashlib.sha1(canonical.encode()).hexdigest(), int(last_write)
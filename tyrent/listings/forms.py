@@ -4,7 +4,18 @@ from .models import Property, Apartment
 class PropertyForm(forms.ModelForm):
     class Meta:
         model = Property
-        fields = ['title', 'description', 'property_type', 'address', 'main_image']
+        fields = ['title', 'description', 'property_type', 'address', 'latitude', 'longitude', 'main_image']
+        help_texts = {
+            'latitude': "Decimal degrees, e.g. -1.2921. Leave both blank to place the property from its address.",
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        latitude, longitude = cleaned_data.get('latitude'), cleaned_data.get('longitude')
+        if (latitude is None) != (longitude is None) and not self.errors:
+            self.add_error('longitude' if longitude is None else 'latitude',
+                           "Enter both latitude and longitude, or neither.")
+        return cleaned_data
 
 class ApartmentForm(forms.ModelForm):
     class Meta:
@@ -14,6 +25,22 @@ class ApartmentForm(forms.ModelForm):
             'description': forms.Textarea(attrs={'rows': 3}),
         }
 
+class ApartmentImportForm(ApartmentForm):
+    """One spreadsheet row: ApartmentForm rules, text columns only."""
+    class Meta(ApartmentForm.Meta):
+        fields = ['title', 'unit_number', 'bedrooms', 'rent', 'location', 'status', 'tenant_name', 'description', 'notes']
+
+
+class UploadSpreadsheetForm(forms.Form):
+    file = forms.FileField(help_text="CSV or XLSX with a header row: title, unit_number, bedrooms, rent, "
+                                     "location, status, tenant_name, description, notes.")
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError("Upload a .csv or .xlsx file.")
+        return upload
+
 class VacantHouseForm(forms.ModelForm):
     class Meta:
         model = Apartment
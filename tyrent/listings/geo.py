@@ -0,0 +1,165 @@
+"""
+Coordinates for listings without PostGIS.
+
+Property.geohash holds the geohash of the property's latitude/longitude. A
+geohash prefix is a rectangular grid cell, and nearby points share
+prefixes, so a bounding box becomes a handful of `geohash LIKE 'abc%'`
+ranges on a plain btree index (varchar_pattern_ops), followed by an exact
+latitude/longitude check. Radius searches take the bounding box of the
+circle and then filter on the haversine distance. Map clusters group
+properties by a geohash prefix whose length follows the zoom level.
+
+Boxes are (min_lon, min_lat, max_lon, max_lat), the GeoJSON order. Boxes
+crossing the antimeridian are not supported.
+
+Coordinates come from manual entry or from an offline gazetteer (a CSV of
+place names) matched against addresses; nothing here calls a geocoding
+service.
+"""
+import csv
+import math
+from collections import namedtuple
+from pathlib import Path
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Stored precision: 9 characters is a cell of about 5 x 5 m.
+GEOHASH_PRECISION = 9
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+# Most prefixes a bounding-box filter may OR together; larger boxes are
+# covered with coarser (shorter) prefixes.
+MAX_COVER_CELLS = 16
+
+MAX_RADIUS_KM = 100
+MAX_ZOOM = 20
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+
+BBox = namedtuple('BBox', 'min_lon min_lat max_lon max_lat')
+
+
+def encode(lat, lon, precision=GEOHASH_PRECISION):
+    """Geohash of (lat, lon) with `precision` characters."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, interval = (lon, lon_range) if even else (lat, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            interval[0] = mid
+        else:
+            bits <<= 1
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = bit_count = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell with `precision` characters."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def _cell_indexes(bbox, precision):
+    height, width = cell_size(precision)
+    rows = range(int((bbox.min_lat + 90) // height), int(min(bbox.max_lat + 90, 179.999999) // height) + 1)
+    cols = range(int((bbox.min_lon + 180) // width), int(min(bbox.max_lon + 180, 359.999999) // width) + 1)
+    return rows, cols, height, width
+
+
+def covering_cells(bbox, max_cells=MAX_COVER_CELLS):
+    """
+    The geohash prefixes of the cells that together cover `bbox`, at the
+    longest precision needing no more than `max_cells` of them.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        rows, cols, height, width = _cell_indexes(bbox, precision)
+        if len(rows) * len(cols) <= max_cells or precision == 1:
+            break
+    return sorted({
+        encode(-90 + (row + 0.5) * height, -180 + (col + 0.5) * width, precision)
+        for row in rows for col in cols
+    })
+
+
+def bbox_around(lat, lon, radius_km):
+    """Bounding box of the circle of `radius_km` around (lat, lon)."""
+    dlat = radius_km / KM_PER_DEGREE
+    dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return BBox(
+        max(lon - dlon, -180.0), max(lat - dlat, -90.0),
+        min(lon + dlon, 180.0), min(lat + dlat, 90.0),
+    )
+
+
+def distance_expression(lat, lon):
+    """Haversine distance in km from (lat, lon) to Property.latitude/longitude."""
+    lat0, lon0 = Value(math.radians(lat)), Value(math.radians(lon))
+    dlat = Radians(F('latitude')) - lat0
+    dlon = Radians(F('longitude')) - lon0
+    a = Power(Sin(dlat / 2), 2) + Value(math.cos(math.radians(lat))) * Cos(Radians(F('latitude'))) * Power(Sin(dlon / 2), 2)
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def parse_bbox(text):
+    """BBox from 'min_lon,min_lat,max_lon,max_lat'; ValueError if malformed."""
+    parts = text.split(',')
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    bbox = BBox(*(float(part) for part in parts))
+    if not (-180 <= bbox.min_lon < bbox.max_lon <= 180 and -90 <= bbox.min_lat < bbox.max_lat <= 90):
+        raise ValueError("bbox is out of range or inverted")
+    return bbox
+
+
+def zoom_precision(zoom):
+    """
+    Cluster prefix length for a web-map zoom level: cells about an eighth of
+    a 256px tile wide, so a screenful holds at most a few hundred clusters.
+    """
+    # A tile spans 360 / 2**zoom degrees of longitude and a cell 360 / 2**ceil(5p/2).
+    return max(1, min(GEOHASH_PRECISION, round((zoom + 3) * 2 / 5)))
+
+
+# ---------- GAZETTEER ----------
+
+def _place_key(text):
+    return ', '.join(' '.join(part.split()).lower() for part in text.split(',') if part.strip())
+
+
+def load_gazetteer(path=GAZETTEER_PATH):
+    """
+    {place name: (lat, lon)} from a CSV with name, latitude and longitude
+    columns. Names may be qualified ("Milimani, Kisumu") to tell apart
+    places that share a name.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        return {
+            _place_key(row['name']): (float(row['latitude']), float(row['longitude']))
+            for row in csv.DictReader(f)
+        }
+
+
+def lookup(gazetteer, text):
+    """
+    Coordinates of the most specific place named in `text`, an address
+    like "12 Ngong Road, Kilimani, Nairobi": parts are tried left to right,
+    each first qualified by the part after it. None if nothing matches.
+    """
+    parts = _place_key(text).split(', ')
+    for i, part in enumerate(parts):
+        for name in (', '.join(parts[i:i + 2]), part):
+            if name in gazetteer:
+                return gazetteer[name]
+    return None
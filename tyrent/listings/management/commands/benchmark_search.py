@@ -0,0 +1,116 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from accounts.models import User
+from listings.models import Property, Apartment, PROPERTY_TYPES
+
+AREAS = [
+    'Westlands', 'Kilimani', 'Kileleshwa', 'Lavington', 'Karen', 'Langata', 'Parklands',
+    'Embakasi', 'Kasarani', 'Ruaka', 'Rongai', 'Syokimau', 'Nyali', 'Bamburi', 'Milimani',
+]
+TOWNS = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika']
+STREETS = ['Riverside Drive', 'Ngong Road', 'Waiyaki Way', 'Moi Avenue', 'Argwings Kodhek Road', 'Links Road']
+FEATURES = ['spacious', 'furnished', 'balcony', 'parking', 'borehole', 'gym', 'rooftop', 'garden', 'security']
+
+
+def _typo(word, rng):
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset and compare the legacy address__icontains search "
+        "against the full-text/trigram search. Everything is rolled back unless --keep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=20000)
+        parser.add_argument('--units-per-property', type=int, default=4)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=50,
+                            help="Rows fetched per query, i.e. one result page (0 = all).")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help="Commit the seeded rows instead of rolling back.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            self.seed(rng, options['properties'], options['units_per_property'])
+            terms = self.query_terms(rng, options['queries'])
+            for label, run in (('icontains', self.icontains), ('full_text', self.full_text)):
+                timings, hits = self.measure(run, terms, options['limit'])
+                self.report(label, timings, hits)
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def seed(self, rng, n_properties, units_per_property):
+        self.stdout.write(f"Seeding {n_properties} properties x {units_per_property} units...")
+        landlord, _ = User.objects.get_or_create(
+            username='benchmark-landlord',
+            defaults={'email': 'benchmark-landlord@example.com', 'full_name': 'Benchmark Landlord', 'role': 'LANDLORD'},
+        )
+        properties = Property.objects.bulk_create([
+            Property(
+                landlord=landlord,
+                title=f"{rng.choice(AREAS)} {rng.choice(['Court', 'Heights', 'Gardens', 'Residence', 'Towers'])}",
+                description=' '.join(rng.sample(FEATURES, 4)),
+                property_type=rng.choice(PROPERTY_TYPES)[0],
+                address=f"{rng.randint(1, 999)} {rng.choice(STREETS)}, {rng.choice(AREAS)}, {rng.choice(TOWNS)}",
+            )
+            for _ in range(n_properties)
+        ], batch_size=2000)
+        Apartment.objects.bulk_create([
+            Apartment(
+                property=prop,
+                title=f"Unit {u + 1}",
+                unit_number=str(u + 1),
+                bedrooms=rng.randint(1, 4),
+                rent=rng.randrange(8000, 150000, 500),
+                location=rng.choice(AREAS),
+                status=rng.choice(['Vacant', 'Occupied']),
+            )
+            for prop in properties
+            for u in range(units_per_property)
+        ], batch_size=5000)
+        seeded = Property.objects.filter(landlord=landlord)
+        seeded.refresh_stats(batch_size=2000)
+        seeded.refresh_search_vector()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE %s' % Property._meta.db_table)
+            cursor.execute('ANALYZE %s' % Apartment._meta.db_table)
+
+    def query_terms(self, rng, n):
+        vocabulary = AREAS + TOWNS
+        terms = []
+        for _ in range(n):
+            word = rng.choice(vocabulary)
+            terms.append(_typo(word, rng) if rng.random() < 0.25 else word)
+        return terms
+
+    def icontains(self, term):
+        return Property.objects.with_stats().filter(address__icontains=term)
+
+    def full_text(self, term):
+        return Property.objects.with_stats().full_text(term)
+
+    def measure(self, run, terms, limit):
+        timings, hits = [], []
+        for term in terms:
+            started = time.perf_counter()
+            results = list(run(term)[:limit] if limit else run(term))
+            timings.append((time.perf_counter() - started) * 1000)
+            hits.append(len(results))
+        return timings, hits
+
+    def report(self, label, timings, hits):
+        timings = sorted(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+        zero_hits = sum(1 for h in hits if h == 0)
+        self.stdout.write(
+            f"{label:>10}: p50 {statistics.median(timings):7.2f} ms  p95 {p95:7.2f} ms  "
+            f"mean hits {statistics.mean(hits):8.1f}  zero-hit queries {zero_hits}/{len(hits)}"
+        )
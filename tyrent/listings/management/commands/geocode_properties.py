@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+from listings import geo
+from listings.cache import bump_data_version
+from listings.models import Apartment, Property
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in Property latitude/longitude by matching addresses (then apartment "
+        "locations) against an offline gazetteer CSV. No network geocoding."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gazetteer', default=str(geo.GAZETTEER_PATH),
+                            help="CSV with name, latitude and longitude columns.")
+        parser.add_argument('--overwrite', action='store_true',
+                            help="Also re-place properties that already have coordinates.")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of properties updated per query.")
+
+    def handle(self, *args, **options):
+        try:
+            gazetteer = geo.load_gazetteer(options['gazetteer'])
+        except (OSError, KeyError, ValueError) as exc:
+            raise CommandError(f"Could not read the gazetteer: {exc}")
+
+        properties = Property.objects.order_by('pk')
+        if not options['overwrite']:
+            properties = properties.filter(latitude__isnull=True)
+        ids = list(properties.values_list('pk', flat=True))
+
+        batch_size = options['batch_size']
+        placed = unmatched = 0
+        for start in range(0, len(ids), batch_size):
+            batch = list(
+                Property.objects.filter(pk__in=ids[start:start + batch_size])
+                .only('pk', 'address', 'latitude', 'longitude', 'geohash')
+                .prefetch_related(Prefetch('apartments', Apartment.objects.only('pk', 'property', 'location')))
+            )
+            changed = []
+            for prop in batch:
+                point = geo.lookup(gazetteer, prop.address)
+                for apartment in prop.apartments.all():
+                    if point is not None:
+                        break
+                    point = geo.lookup(gazetteer, apartment.location or '')
+                if point is None:
+                    unmatched += 1
+                    continue
+                prop.latitude, prop.longitude = point
+                prop.set_geohash()
+                changed.append(prop)
+            Property.objects.bulk_update(changed, ['latitude', 'longitude', 'geohash'])
+            placed += len(changed)
+
+        if placed:
+            # bulk_update skips save(), so cached search responses are dropped here.
+            bump_data_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Placed {placed} properties; {unmatched} addresses matched no gazetteer entry."
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from listings.occupancy import rebuild_calendar
+
+
+class Command(BaseCommand):
+    help = "Rebuild the apartment occupancy calendar from approved bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apartment', type=int, action='append', dest='apartments',
+                            help="Only rebuild this apartment (repeatable).")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_calendar(options['apartments'])
+        self.stdout.write(self.style.SUCCESS(f"Applied {count} approved bookings to the calendar."))
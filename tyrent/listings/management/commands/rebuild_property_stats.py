@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from listings.models import Property, ROLLUP_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or with --verify, check) the Property unit/occupancy/rent rollup columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of properties recomputed per transaction.")
+        parser.add_argument('--verify', action='store_true',
+                            help="Report properties whose stored rollups are stale without writing.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(Property.objects.order_by('pk').values_list('pk', flat=True))
+
+        if options['verify']:
+            stale = []
+            for start in range(0, len(ids), batch_size):
+                batch = Property.objects.filter(pk__in=ids[start:start + batch_size])
+                stats = batch.compute_stats()
+                for prop in batch.only('pk', *ROLLUP_FIELDS):
+                    if not prop.stats_match(stats.get(prop.pk)):
+                        stale.append(prop.pk)
+            if stale:
+                raise CommandError(f"{len(stale)} properties have stale stats: {stale[:20]}")
+            self.stdout.write(self.style.SUCCESS(f"All {len(ids)} properties are up to date."))
+            return
+
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            batch = Property.objects.filter(pk__in=ids[start:start + batch_size])
+            updated += batch.refresh_stats(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {updated} properties."))
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:16
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Max, Min, Q
+
+
+def backfill_property_rollups(apps, schema_editor):
+    Property = apps.get_model('listings', 'Property')
+    Apartment = apps.get_model('listings', 'Apartment')
+    rows = (
+        Apartment.objects.order_by()
+        .values('property')
+        .annotate(
+            unit_count=Count('pk'),
+            occupied_count=Count('pk', filter=Q(status='Occupied')),
+            avg_rent=Avg('rent'),
+            min_rent=Min('rent'),
+            max_rent=Max('rent'),
+        )
+    )
+    for row in rows.iterator():
+        Property.objects.filter(pk=row['property']).update(
+            unit_count=row['unit_count'],
+            occupied_count=row['occupied_count'],
+            vacant_count=row['unit_count'] - row['occupied_count'],
+            avg_rent=row['avg_rent'].quantize(Decimal('0.01')),
+            min_rent=row['min_rent'],
+            max_rent=row['max_rent'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0010_apartment_description_apartment_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='avg_rent',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='max_rent',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='min_rent',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='occupied_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='unit_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='vacant_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_property_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_search_vector(apps, schema_editor):
+    Property = apps.get_model('listings', 'Property')
+    Apartment = apps.get_model('listings', 'Apartment')
+    locations = (
+        Apartment.objects.filter(property=OuterRef('pk'))
+        .order_by()
+        .values('property')
+        .annotate(text=StringAgg('location', delimiter=' ', distinct=True))
+        .values('text')
+    )
+    Property.objects.update(search_vector=(
+        SearchVector('title', weight='A', config='english')
+        + SearchVector('address', weight='A', config='english')
+        + SearchVector(Subquery(locations), weight='B', config='english')
+        + SearchVector('description', weight='C', config='english')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_property_rollups'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='property',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='property',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='property_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['address'], name='property_address_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0012_property_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apartment',
+            index=models.Index(fields=['property', 'status'], name='apartment_property_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apartment',
+            index=models.Index(condition=models.Q(('status', 'Vacant')), fields=['-date_added', '-id'], name='apartment_vacant_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['-date_added', '-id'], name='property_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['property_type', '-date_added'], name='property_type_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['landlord', '-date_added'], name='property_landlord_recent_idx'),
+        ),
+    ]
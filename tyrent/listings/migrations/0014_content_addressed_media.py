@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:37
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0013_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='apartment',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.get_content_storage, upload_to='apartments/'),
+        ),
+        migrations.AlterField(
+            model_name='apartment',
+            name='video',
+            field=models.FileField(blank=True, null=True, storage=core.storage.get_content_storage, upload_to='apartments/videos/'),
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='main_image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.get_content_storage, upload_to='properties/'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:52
+
+import calendar
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def month_masks(start, end):
+    # A copy of listings.occupancy.month_masks() as of this migration, so
+    # later changes to that module cannot alter the backfill.
+    masks = []
+    month = start.replace(day=1)
+    while month <= end:
+        last_day = calendar.monthrange(month.year, month.month)[1]
+        first = start.day if month == start.replace(day=1) else 1
+        last = end.day if month == end.replace(day=1) else last_day
+        masks.append((month, ((1 << last) - 1) ^ ((1 << (first - 1)) - 1)))
+        month += timedelta(days=last_day)
+    return masks
+
+
+def backfill_occupancy(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    Apartment = apps.get_model('listings', 'Apartment')
+    OccupancyMonth = apps.get_model('listings', 'OccupancyMonth')
+
+    months = {}
+    approved = Booking.objects.filter(status='Approved').values_list('apartment_id', 'start_date', 'end_date')
+    for apartment_id, start, end in approved.iterator():
+        if end is None:
+            Apartment.objects.filter(pk=apartment_id).update(booked_indefinitely_from=start)
+            continue
+        for month, mask in month_masks(start, end):
+            months[apartment_id, month] = months.get((apartment_id, month), 0) | mask
+    OccupancyMonth.objects.bulk_create(
+        [OccupancyMonth(apartment_id=a, month=m, booked=mask) for (a, m), mask in months.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0014_content_addressed_media'),
+        ('bookings', '0003_booking_overlap_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartment',
+            name='booked_indefinitely_from',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='OccupancyMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('booked', models.IntegerField(default=0, help_text='Bit d-1 is set when day d is booked')),
+                ('apartment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='listings.apartment')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('apartment', 'month'), name='unique_occupancy_month')],
+            },
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:57
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0015_occupancy_calendar'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apartment',
+            index=models.Index(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('unit_number', models.TextField())), name='apartment_unit_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apartment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('tenant_name', models.TextField())), name='gin_trgm_ops'), name='apartment_tenant_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='apartment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('location', models.TextField())), name='gin_trgm_ops'), name='apartment_location_trgm'),
+        ),
+    ]
@@ -1,6 +1,20 @@
-from django.db import models
+from decimal import Decimal
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, SearchVectorField, TrigramWordSimilarity,
+)
+from django.db import models, transaction
+from django.db.models import Avg, Case, Count, Exists, F, FloatField, Max, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Left
 from django.utils import timezone
 from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from core.indexes import icontains_index, iexact_index
+from core.storage import get_content_storage
+from . import geo
+from .occupancy import month_masks, overlap_expression
 
 PROPERTY_TYPES = [
     ('House', 'House'),
@@ -13,6 +27,172 @@ STATUS_CHOICES = [
     ('Occupied', 'Occupied'),
 ]
 
+# Text search configuration used for Property.search_vector and queries.
+SEARCH_CONFIG = 'english'
+
+ROLLUP_FIELDS = ['unit_count', 'occupied_count', 'vacant_count', 'avg_rent', 'min_rent', 'max_rent']
+
+
+class PropertyQuerySet(models.QuerySet):
+    """Listing queries that need per-property apartment stats."""
+
+    def with_stats(self):
+        """
+        Annotate status ("Vacant" if any unit is vacant, else "Occupied") on
+        top of the rollup columns, so listings need no per-row queries.
+        """
+        return self.annotate(
+            status=Case(
+                When(vacant_count__gt=0, then=Value('Vacant')),
+                default=Value('Occupied'),
+                output_field=models.CharField(),
+            ),
+        )
+
+    def search(self, location='', property_type='', max_price=None, near=None, bbox=None):
+        """
+        Apply the public search filters; a location query is ranked. `near`
+        is (lat, lon, radius_km) and `bbox` a geo.BBox-like 4-tuple.
+        """
+        qs = self
+        if location:
+            qs = qs.full_text(location)
+        if property_type:
+            # Stored values are the capitalized choices; an exact match keeps
+            # the property_type index usable (iexact wraps the column in UPPER).
+            qs = qs.filter(property_type=property_type.capitalize())
+        if max_price is not None:
+            qs = qs.filter(avg_rent__lte=max_price)
+        if bbox is not None:
+            qs = qs.within_bbox(geo.BBox(*bbox))
+        if near is not None:
+            qs = qs.within_radius(*near)
+        return qs
+
+    def within_bbox(self, bbox):
+        """
+        Properties inside `bbox`. The geohash prefixes narrow the scan to
+        a few index ranges; the coordinate check trims the cell edges.
+        """
+        cells = Q()
+        for prefix in geo.covering_cells(bbox):
+            cells |= Q(geohash__startswith=prefix)
+        return self.filter(
+            cells,
+            latitude__range=(bbox.min_lat, bbox.max_lat),
+            longitude__range=(bbox.min_lon, bbox.max_lon),
+        )
+
+    def within_radius(self, lat, lon, radius_km):
+        """Properties within `radius_km` of (lat, lon), annotated with distance_km."""
+        return self.within_bbox(geo.bbox_around(lat, lon, radius_km)).annotate(
+            distance_km=geo.distance_expression(lat, lon),
+        ).filter(distance_km__lte=radius_km)
+
+    def clusters(self, precision):
+        """
+        One row per geohash cell of `precision` characters holding located
+        properties: cell, count, mean lat/lon, and property_id (the lowest
+        pk, i.e. the property itself when count is 1). Largest first.
+        """
+        return (
+            self.exclude(geohash='')
+            .order_by()
+            .annotate(cell=Left('geohash', precision))
+            .values('cell')
+            .annotate(count=Count('pk'), lat=Avg('latitude'), lon=Avg('longitude'), property_id=Min('pk'))
+            .order_by('-count', 'cell')
+        )
+
+    def full_text(self, text):
+        """
+        Match `text` against title/address/description/apartment locations
+        via search_vector, or fuzzily against the address via pg_trgm, and
+        order by relevance. Both conditions are served by GIN indexes.
+        """
+        query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+        return self.filter(
+            Q(search_vector=query) | Q(address__trigram_word_similar=text)
+        ).annotate(
+            # Both scores are float4. A cursor sends the rank back as float8,
+            # which never equals the float4 value, so keyset paging would
+            # repeat or skip tied rows; rank in float8 throughout instead.
+            rank=Cast(Greatest(
+                SearchRank(F('search_vector'), query),
+                TrigramWordSimilarity(text, 'address'),
+            ), FloatField()),
+        ).order_by('-rank', '-pk')
+
+    def refresh_search_vector(self):
+        """Rebuild search_vector for every property in the queryset."""
+        locations = (
+            Apartment.objects.filter(property=OuterRef('pk'))
+            .order_by()
+            .values('property')
+            .annotate(text=StringAgg('location', delimiter=' ', distinct=True))
+            .values('text')
+        )
+        return self.update(search_vector=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('address', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(Subquery(locations), weight='B', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+        ))
+
+    def _totals(self):
+        return {
+            'total_properties': Count('pk'),
+            'total_units': Coalesce(Sum('unit_count'), 0),
+            'occupied_units': Coalesce(Sum('occupied_count'), 0),
+        }
+
+    def totals(self):
+        """Property, unit and occupied-unit totals read from the rollups."""
+        return self.aggregate(**self._totals())
+
+    async def atotals(self):
+        return await self.aaggregate(**self._totals())
+
+    def compute_stats(self):
+        """
+        Aggregate the rollup values for every property in the queryset from
+        its apartments, in one grouped query. Returns {property_id: stats}.
+        """
+        rows = (
+            Apartment.objects.filter(property__in=self.values('pk'))
+            .order_by()
+            .values('property')
+            .annotate(
+                unit_count=Count('pk'),
+                occupied_count=Count('pk', filter=Q(status='Occupied')),
+                avg_rent=Avg('rent'),
+                min_rent=Min('rent'),
+                max_rent=Max('rent'),
+            )
+        )
+        stats = {}
+        for row in rows:
+            property_id = row.pop('property')
+            row['vacant_count'] = row['unit_count'] - row['occupied_count']
+            row['avg_rent'] = row['avg_rent'].quantize(Decimal('0.01'))
+            stats[property_id] = row
+        return stats
+
+    def refresh_stats(self, batch_size=500):
+        """
+        Recompute and store the rollup columns for every property in the
+        queryset. Rows are locked for the duration so concurrent apartment
+        writes on the same property serialize. Returns the number updated.
+        """
+        with transaction.atomic(using=self.db):
+            properties = list(self.select_for_update().only('pk', *ROLLUP_FIELDS))
+            stats = self.compute_stats()
+            for prop in properties:
+                prop.set_stats(stats.get(prop.pk))
+            Property.objects.bulk_update(properties, ROLLUP_FIELDS, batch_size=batch_size)
+        return len(properties)
+
+
 class Property(models.Model):
     landlord = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -23,17 +203,102 @@ class Property(models.Model):
     description = models.TextField(blank=True, null=True)
     property_type = models.CharField(max_length=50, choices=PROPERTY_TYPES)
     address = models.CharField(max_length=300)
-    main_image = models.ImageField(upload_to='properties/', blank=True, null=True)
+    # From `manage.py geocode_properties` (offline gazetteer) or the form.
+    latitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    # geo.encode(latitude, longitude), or '' without coordinates; set by save().
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
+    main_image = models.ImageField(upload_to='properties/', storage=get_content_storage, blank=True, null=True)
     date_added = models.DateTimeField(default=timezone.now)
 
+    # Rollups over self.apartments, kept current by Apartment.save() and the
+    # post_delete signal. Rebuild with `manage.py rebuild_property_stats`.
+    unit_count = models.PositiveIntegerField(default=0, editable=False)
+    occupied_count = models.PositiveIntegerField(default=0, editable=False)
+    vacant_count = models.PositiveIntegerField(default=0, editable=False)
+    avg_rent = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    min_rent = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    max_rent = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+
+    # Weighted tsvector over title/address (A), apartment locations (B) and
+    # description (C), refreshed on every Property/Apartment write.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PropertyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='property_search_vector_gin'),
+            GinIndex(fields=['address'], name='property_address_trgm', opclasses=['gin_trgm_ops']),
+            # property_list / search_properties default keyset order
+            models.Index(fields=['-date_added', '-id'], name='property_recent_idx'),
+            models.Index(fields=['property_type', '-date_added'], name='property_type_recent_idx'),
+            models.Index(fields=['landlord', '-date_added'], name='property_landlord_recent_idx'),
+            # geohash__startswith prefix scans for bounding-box and radius search
+            models.Index(fields=['geohash'], name='property_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.set_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            Property.objects.filter(pk=self.pk).refresh_search_vector()
+
+    @property
+    def has_location(self):
+        return self.latitude is not None and self.longitude is not None
+
+    def set_geohash(self):
+        """Recompute geohash from the coordinates; bulk writers must call it."""
+        self.geohash = geo.encode(self.latitude, self.longitude) if self.has_location else ''
+
     def total_units(self):
-        return self.apartments.count()
+        return self.unit_count
 
     def occupied_units(self):
-        return self.apartments.filter(status='Occupied').count()
+        return self.occupied_count
+
+    def set_stats(self, stats=None):
+        """Assign rollup values as returned by compute_stats() (None = no units)."""
+        stats = stats or {}
+        self.unit_count = stats.get('unit_count', 0)
+        self.occupied_count = stats.get('occupied_count', 0)
+        self.vacant_count = stats.get('vacant_count', 0)
+        self.avg_rent = stats.get('avg_rent') or 0
+        self.min_rent = stats.get('min_rent')
+        self.max_rent = stats.get('max_rent')
+
+    def stats_match(self, stats=None):
+        """True if the stored rollups equal freshly computed `stats`."""
+        expected = Property()
+        expected.set_stats(stats)
+        return all(getattr(self, f) == getattr(expected, f) for f in ROLLUP_FIELDS)
+
+class ApartmentQuerySet(models.QuerySet):
+    def available_between(self, start, end):
+        """
+        Apartments with no approved booking on any day from start to end
+        inclusive, answered from the occupancy calendar.
+        """
+        masks = month_masks(start, end)
+        booked = OccupancyMonth.objects.filter(
+            apartment=OuterRef('pk'), month__range=(masks[0][0], masks[-1][0]),
+        ).alias(overlap=overlap_expression(masks)).filter(overlap__gt=0)
+        return self.filter(
+            Q(booked_indefinitely_from__isnull=True) | Q(booked_indefinitely_from__gt=end),
+            ~Exists(booked),
+        )
+
 
 class Apartment(models.Model):
     property = models.ForeignKey(
@@ -49,10 +314,75 @@ class Apartment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Vacant')
     tenant_name = models.CharField(max_length=100, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
-    image = models.ImageField(upload_to='apartments/', blank=True, null=True)
-    video = models.FileField(upload_to='apartments/videos/', blank=True, null=True)
+    image = models.ImageField(upload_to='apartments/', storage=get_content_storage, blank=True, null=True)
+    video = models.FileField(upload_to='apartments/videos/', storage=get_content_storage, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
     date_added = models.DateTimeField(default=timezone.now)
+    # Start of an approved open-ended booking; dated ones live in OccupancyMonth.
+    booked_indefinitely_from = models.DateField(null=True, blank=True, editable=False)
+
+    objects = ApartmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Dashboards and rollups: a property's units, optionally by status
+            models.Index(fields=['property', 'status'], name='apartment_property_status_idx'),
+            # Homepage vacant grid keyset order; vacant units only
+            models.Index(
+                fields=['-date_added', '-id'],
+                name='apartment_vacant_recent_idx',
+                condition=Q(status='Vacant'),
+            ),
+            # Admin search_fields
+            iexact_index('unit_number', 'apartment_unit_upper_idx'),
+            icontains_index('tenant_name', 'apartment_tenant_trgm'),
+            icontains_index('location', 'apartment_location_trgm'),
+        ]
+
+    # Fields mirrored onto the parent Property: rollup columns and search_vector.
+    STATS_FIELDS = ('property_id', 'status', 'rent')
+    SEARCH_FIELDS = ('property_id', 'location')
 
     def __str__(self):
         return f"{self.property.title} - {self.title or self.unit_number or 'Apartment'}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stats_snapshot = instance._get_stats_snapshot()
+        return instance
+
+    def _get_stats_snapshot(self):
+        return {f: self.__dict__.get(f) for f in self.STATS_FIELDS + self.SEARCH_FIELDS}
+
+    def save(self, *args, **kwargs):
+        snapshot = getattr(self, '_stats_snapshot', None)
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            current = self._get_stats_snapshot()
+            changed = {f for f in current if snapshot is None or snapshot[f] != current[f]}
+            if changed:
+                property_ids = {current['property_id']}
+                if snapshot and snapshot['property_id']:
+                    property_ids.add(snapshot['property_id'])
+                affected = Property.objects.filter(pk__in=property_ids)
+                if changed.intersection(self.STATS_FIELDS):
+                    affected.refresh_stats()
+                if changed.intersection(self.SEARCH_FIELDS):
+                    affected.refresh_search_vector()
+        self._stats_snapshot = current
+
+
+class OccupancyMonth(models.Model):
+    """One month of an apartment's occupancy calendar; see listings.occupancy."""
+    apartment = models.ForeignKey(Apartment, on_delete=models.CASCADE, related_name='occupancy')
+    month = models.DateField(help_text="First day of the month")
+    booked = models.IntegerField(default=0, help_text="Bit d-1 is set when day d is booked")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['apartment', 'month'], name='unique_occupancy_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.apartment_id} {self.month:%Y-%m}: {self.booked:031b}"
@@ -0,0 +1,117 @@
+"""
+Per-apartment occupancy calendar, kept in step with approved bookings.
+
+Each OccupancyMonth row holds one month of one apartment as a bitmask, bit
+d-1 set when day d is booked. An open-ended booking is recorded as
+Apartment.booked_indefinitely_from instead. Availability queries test a few
+small rows per apartment instead of scanning Booking.
+
+Approved bookings never overlap (see bookings.services), so freeing a
+booking's days can simply clear its bits.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.db.models import Case, F, IntegerField, Value, When
+
+# Longest span an availability search may ask about.
+MAX_SEARCH_DAYS = 731
+
+
+def month_masks(start, end):
+    """[(first of month, day bitmask), ...] covering start..end inclusive."""
+    masks = []
+    month = start.replace(day=1)
+    while month <= end:
+        last_day = calendar.monthrange(month.year, month.month)[1]
+        first = start.day if month == start.replace(day=1) else 1
+        last = end.day if month == end.replace(day=1) else last_day
+        masks.append((month, ((1 << last) - 1) ^ ((1 << (first - 1)) - 1)))
+        month += timedelta(days=last_day)
+    return masks
+
+
+def overlap_expression(masks):
+    """Booked days of an OccupancyMonth row that fall in `masks`, 0 if none."""
+    return Case(
+        *[When(month=month, then=F('booked').bitand(mask)) for month, mask in masks],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def mark_booked(apartment_id, start, end):
+    """Record an approved booking in the calendar."""
+    from .models import Apartment, OccupancyMonth
+
+    if end is None:
+        Apartment.objects.filter(pk=apartment_id).update(booked_indefinitely_from=start)
+        return
+    masks = month_masks(start, end)
+    OccupancyMonth.objects.bulk_create(
+        [OccupancyMonth(apartment_id=apartment_id, month=month) for month, _ in masks],
+        ignore_conflicts=True,
+    )
+    OccupancyMonth.objects.filter(apartment_id=apartment_id, month__in=[m for m, _ in masks]).update(
+        booked=Case(*[When(month=month, then=F('booked').bitor(mask)) for month, mask in masks])
+    )
+
+
+def mark_free(apartment_id, start, end):
+    """Remove a no-longer-approved booking from the calendar."""
+    from .models import Apartment, OccupancyMonth
+
+    if end is None:
+        Apartment.objects.filter(pk=apartment_id, booked_indefinitely_from=start).update(
+            booked_indefinitely_from=None,
+        )
+        return
+    masks = month_masks(start, end)
+    OccupancyMonth.objects.filter(apartment_id=apartment_id, month__in=[m for m, _ in masks]).update(
+        booked=Case(*[When(month=month, then=F('booked').bitand(~mask)) for month, mask in masks])
+    )
+
+
+def rebuild_calendar(apartment_ids=None):
+    """Recompute the calendar from approved bookings; returns bookings applied."""
+    from bookings.models import Booking
+    from .models import Apartment, OccupancyMonth
+
+    apartments = Apartment.objects.all()
+    if apartment_ids is not None:
+        apartments = apartments.filter(pk__in=apartment_ids)
+
+    months = {}
+    indefinite = {}
+    bookings = Booking.objects.approved().filter(apartment__in=apartments)
+    count = 0
+    for apartment_id, start, end in bookings.values_list('apartment_id', 'start_date', 'end_date').iterator():
+        count += 1
+        if end is None:
+            indefinite[apartment_id] = start
+            continue
+        for month, mask in month_masks(start, end):
+            months[apartment_id, month] = months.get((apartment_id, month), 0) | mask
+
+    OccupancyMonth.objects.filter(apartment__in=apartments).delete()
+    OccupancyMonth.objects.bulk_create(
+        [OccupancyMonth(apartment_id=a, month=m, booked=mask) for (a, m), mask in months.items()],
+        batch_size=1000,
+    )
+    apartments.update(booked_indefinitely_from=None)
+    for apartment_id, start in indefinite.items():
+        Apartment.objects.filter(pk=apartment_id).update(booked_indefinitely_from=start)
+    return count
+
+
+def parse_period(start, end):
+    """Validate an availability search period; returns (start, end) dates or raises ValueError."""
+    try:
+        start, end = date.fromisoformat(start), date.fromisoformat(end)
+    except ValueError:
+        raise ValueError("start and end must be dates as YYYY-MM-DD")
+    if end < start:
+        raise ValueError("end must not be before start")
+    if (end - start).days >= MAX_SEARCH_DAYS:
+        raise ValueError(f"period is limited to {MAX_SEARCH_DAYS} days")
+    return start, end
@@ -0,0 +1,84 @@
+"""
+Landlord portfolio summary shared by the landlord dashboards: per-property
+unit counts and rent totals in one grouped query, plus a paginated
+apartment grid that leaves the large text columns in the database.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, Left
+
+from core.pagination import CursorPaginator
+from .models import Apartment, Property
+
+PORTFOLIO_APARTMENTS_PER_PAGE = 24
+
+# Characters of Apartment.description loaded for grid cards.
+EXCERPT_LENGTH = 200
+
+OCCUPIED = Q(apartments__status='Occupied')
+VACANT = Q(apartments__status='Vacant')
+
+
+def _rent_sum(condition=None):
+    return Coalesce(
+        Sum('apartments__rent', filter=condition),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def property_summaries(landlord):
+    """
+    The landlord's properties, newest first, each annotated with
+    units_total/units_vacant/units_occupied and rent_total/rent_occupied/
+    rent_vacant (monthly rent of the units in that state).
+    """
+    return (
+        Property.objects.filter(landlord=landlord)
+        .only('pk', 'title', 'address', 'property_type', 'date_added')
+        .annotate(
+            units_total=Count('apartments'),
+            units_vacant=Count('apartments', filter=VACANT),
+            units_occupied=Count('apartments', filter=OCCUPIED),
+            rent_total=_rent_sum(),
+            rent_occupied=_rent_sum(OCCUPIED),
+            rent_vacant=_rent_sum(VACANT),
+        )
+        .order_by('-date_added', '-id')
+    )
+
+
+def portfolio_totals(summaries):
+    """Landlord-wide totals over evaluated property_summaries() rows."""
+    totals = {
+        'properties': len(summaries),
+        'units_total': sum(p.units_total for p in summaries),
+        'units_vacant': sum(p.units_vacant for p in summaries),
+        'units_occupied': sum(p.units_occupied for p in summaries),
+        'rent_total': sum((p.rent_total for p in summaries), Decimal('0.00')),
+        'rent_occupied': sum((p.rent_occupied for p in summaries), Decimal('0.00')),
+    }
+    units = totals['units_total']
+    totals['occupancy_rate'] = round(totals['units_occupied'] / units * 100, 1) if units else 0
+    return totals
+
+
+def portfolio(landlord):
+    """(property summaries list, totals) for the dashboard header."""
+    summaries = list(property_summaries(landlord))
+    return summaries, portfolio_totals(summaries)
+
+
+def apartment_page(landlord, cursor=None, status=None, per_page=PORTFOLIO_APARTMENTS_PER_PAGE):
+    """
+    One CursorPage of the landlord's apartments, newest first. description
+    and notes are deferred; cards read the `excerpt` annotation instead.
+    """
+    apartments = Apartment.objects.filter(property__landlord=landlord)
+    if status:
+        apartments = apartments.filter(status=status)
+    apartments = apartments.defer('description', 'notes').annotate(
+        excerpt=Left('description', EXCERPT_LENGTH),
+    )
+    return CursorPaginator(apartments, ordering=('-date_added', '-id'), per_page=per_page).page(cursor)
@@ -0,0 +1,65 @@
+"""
+Batch changes to apartments. Writes go through bulk_update, which skips
+Apartment.save() and the post_save receivers, so the per-property rollups
+and the listing caches are refreshed here once per batch.
+"""
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+
+from core.stats import invalidate_homepage_stats
+from .cache import bump_data_version
+from .models import STATUS_CHOICES, Apartment, Property
+
+STATUSES = {value for value, _ in STATUS_CHOICES}
+TENANT_NAME_MAX_LENGTH = Apartment._meta.get_field('tenant_name').max_length
+
+
+def update_statuses(changes, landlord=None):
+    """
+    Apply {apartment id: (status, tenant name)} in one transaction. Vacant
+    units lose their tenant name, as with the single-unit form. With a
+    `landlord`, every apartment must be theirs (PermissionDenied otherwise).
+    Returns the number of apartments changed.
+    """
+    for status, tenant_name in changes.values():
+        if status not in STATUSES:
+            raise ValueError(f"Unknown status {status!r}.")
+        if len(tenant_name or '') > TENANT_NAME_MAX_LENGTH:
+            raise ValueError(f"Tenant names are limited to {TENANT_NAME_MAX_LENGTH} characters.")
+
+    with transaction.atomic():
+        apartments = list(
+            Apartment.objects.select_for_update(of=('self',))
+            .filter(pk__in=changes)
+            .select_related('property')
+            .only('pk', 'status', 'tenant_name', 'property__landlord_id')
+        )
+        missing = changes.keys() - {a.pk for a in apartments}
+        if missing:
+            raise PermissionDenied(f"These apartments do not exist: {_id_list(missing)}.")
+        if landlord is not None:
+            foreign = {a.pk for a in apartments if a.property.landlord_id != landlord.pk}
+            if foreign:
+                raise PermissionDenied(f"You can only update your own apartments, not {_id_list(foreign)}.")
+
+        changed = []
+        for apartment in apartments:
+            status, tenant_name = changes[apartment.pk]
+            tenant_name = (tenant_name or '') if status == 'Occupied' else ''
+            if (apartment.status, apartment.tenant_name or '') != (status, tenant_name):
+                apartment.status, apartment.tenant_name = status, tenant_name
+                changed.append(apartment)
+        if not changed:
+            return 0
+
+        Apartment.objects.bulk_update(changed, ['status', 'tenant_name'], batch_size=500)
+        Property.objects.filter(pk__in={a.property_id for a in changed}).refresh_stats()
+        invalidate_homepage_stats()
+        bump_data_version()
+    return len(changed)
+
+
+def _id_list(ids, limit=10):
+    ids = sorted(ids)
+    text = ', '.join(f'#{pk}' for pk in ids[:limit])
+    return f"{text} and {len(ids) - limit} more" if len(ids) > limit else text
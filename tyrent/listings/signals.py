@@ -0,0 +1,25 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import bump_data_version
+from .models import Property, Apartment
+
+
+@receiver(post_delete, sender=Apartment)
+def refresh_property_on_apartment_delete(sender, instance, origin=None, **kwargs):
+    # Cascades from a deleted Property have nothing left to keep current.
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is Property:
+        return
+    # Runs inside the deletion transaction opened by the collector.
+    affected = Property.objects.filter(pk=instance.property_id)
+    affected.refresh_stats()
+    affected.refresh_search_vector()
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=Apartment)
+@receiver(post_delete, sender=Apartment)
+def bump_data_version_on_listing_change(sender, **kwargs):
+    bump_data_version()
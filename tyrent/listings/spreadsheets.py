@@ -0,0 +1,189 @@
+"""
+Bulk apartment import from CSV/XLSX and streaming CSV export (see
+core.csv_export).
+
+An import is all or nothing: every row is validated with the
+ApartmentForm rules first, and only if none has errors are the apartments
+inserted with bulk_create, in batches, inside one transaction. bulk_create
+skips Apartment.save(), so the property rollups, search vectors and caches
+are refreshed once at the end instead.
+
+XLSX files are read with the standard library (an .xlsx is a zip of XML),
+first worksheet only.
+"""
+import csv
+import io
+import re
+import zipfile
+from xml.etree import ElementTree
+
+from django.db import transaction
+
+from core.csv_export import csv_rows
+from core.stats import invalidate_homepage_stats
+from .cache import bump_data_version
+from .forms import ApartmentImportForm
+from .models import Apartment, Property
+
+IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_ROWS = 50000
+MAX_REPORTED_ERRORS = 100
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = [
+    ('id', 'pk'),
+    ('property', 'property__title'),
+    ('title', 'title'),
+    ('unit_number', 'unit_number'),
+    ('bedrooms', 'bedrooms'),
+    ('rent', 'rent'),
+    ('location', 'location'),
+    ('status', 'status'),
+    ('tenant_name', 'tenant_name'),
+    ('description', 'description'),
+    ('notes', 'notes'),
+]
+
+# Blank cells fall back to the model default rather than failing "required".
+IMPORT_DEFAULTS = {'bedrooms': '1', 'status': 'Vacant'}
+
+XLSX_NS = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+OFFICE_REL_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+CELL_REF_RE = re.compile(r'([A-Z]+)')
+
+
+class SpreadsheetError(Exception):
+    """The upload could not be read as a spreadsheet at all."""
+
+
+def _header(name):
+    return re.sub(r'\W+', '_', str(name or '').strip().lower()).strip('_')
+
+
+def read_csv(f):
+    """Rows of a CSV upload as lists of strings."""
+    try:
+        text = io.TextIOWrapper(getattr(f, 'file', f), encoding='utf-8-sig', newline='')
+        yield from csv.reader(text)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise SpreadsheetError(f"Could not read the CSV file: {exc}")
+
+
+def _column_index(ref):
+    letters = CELL_REF_RE.match(ref).group(1)
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def _first_sheet(archive):
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    rel_id = workbook.find('main:sheets/main:sheet', XLSX_NS).get(OFFICE_REL_ID)
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.findall('rel:Relationship', XLSX_NS):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            return target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+    raise SpreadsheetError("The workbook has no worksheet.")
+
+
+def _shared_strings(archive):
+    try:
+        root = ElementTree.fromstring(archive.read('xl/sharedStrings.xml'))
+    except KeyError:
+        return []
+    return [''.join(t.text or '' for t in si.iter(f"{{{XLSX_NS['main']}}}t"))
+            for si in root.findall('main:si', XLSX_NS)]
+
+
+def _cell_value(cell, strings):
+    kind = cell.get('t')
+    if kind == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(f"{{{XLSX_NS['main']}}}t"))
+    value = cell.findtext('main:v', default='', namespaces=XLSX_NS)
+    if kind == 's':
+        return strings[int(value)]
+    if kind == 'b':
+        return 'TRUE' if value == '1' else 'FALSE'
+    if kind in (None, 'n') and value.endswith('.0'):
+        # Whole numbers are often stored as floats.
+        return value[:-2]
+    return value
+
+
+def read_xlsx(f):
+    """Rows of the first worksheet of an XLSX upload as lists of strings."""
+    try:
+        archive = zipfile.ZipFile(getattr(f, 'file', f))
+        strings = _shared_strings(archive)
+        sheet = archive.open(_first_sheet(archive))
+        row_tag = f"{{{XLSX_NS['main']}}}row"
+        for _, element in ElementTree.iterparse(sheet):
+            if element.tag != row_tag:
+                continue
+            row = []
+            for cell in element.findall('main:c', XLSX_NS):
+                index = _column_index(cell.get('r')) if cell.get('r') else len(row)
+                row.extend([''] * (index - len(row)))
+                row.append(_cell_value(cell, strings))
+            element.clear()
+            yield row
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError, AttributeError) as exc:
+        raise SpreadsheetError(f"Could not read the XLSX file: {exc}")
+
+
+def read_rows(upload):
+    """{header: value} dicts, one per non-empty data row of an uploaded file."""
+    reader = read_xlsx if upload.name.lower().endswith('.xlsx') else read_csv
+    rows = reader(upload)
+    header = [_header(name) for name in next(rows, [])]
+    if 'title' not in header:
+        raise SpreadsheetError("The first row must be a header with at least a 'title' column.")
+    for row in rows:
+        if any(str(value).strip() for value in row):
+            yield dict(zip(header, (str(value).strip() for value in row)))
+
+
+def import_apartments(property, upload):
+    """
+    Validate and insert the apartments in `upload` under `property`.
+    Returns (created count, [(row number, {field: [messages]}), ...], error
+    count); only the first MAX_REPORTED_ERRORS rows are listed, and nothing is
+    inserted when there are errors. Raises SpreadsheetError for unreadable files.
+    """
+    apartments, errors, error_count = [], [], 0
+    for number, row in enumerate(read_rows(upload), start=2):
+        if number - 1 > MAX_IMPORT_ROWS:
+            raise SpreadsheetError(f"Imports are limited to {MAX_IMPORT_ROWS} rows.")
+        data = {**row, **{f: v for f, v in IMPORT_DEFAULTS.items() if not row.get(f)}}
+        form = ApartmentImportForm(data)
+        if form.is_valid():
+            apartment = form.save(commit=False)
+            apartment.property = property
+            apartments.append(apartment)
+            continue
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append((number, {field: list(messages) for field, messages in form.errors.items()}))
+    if error_count or not apartments:
+        return 0, errors, error_count
+
+    with transaction.atomic():
+        for start in range(0, len(apartments), IMPORT_BATCH_SIZE):
+            Apartment.objects.bulk_create(apartments[start:start + IMPORT_BATCH_SIZE])
+        affected = Property.objects.filter(pk=property.pk)
+        affected.refresh_stats()
+        affected.refresh_search_vector()
+        invalidate_homepage_stats()
+        bump_data_version()
+    return len(apartments), [], 0
+
+
+def export_rows(apartments, asynchronous=False):
+    """CSV lines (header first) for `apartments`, read in chunks; see csv_rows()."""
+    return csv_rows(apartments.order_by('property_id', 'pk'), EXPORT_COLUMNS,
+                    chunk_size=EXPORT_CHUNK_SIZE, asynchronous=asynchronous)
@@ -1,3 +1,970 @@
+import asyncio
+import csv
+import io
+import json
+import time
+import zipfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.urls import resolve, reverse
+from accounts.models import LandlordProfile, User
+from accounts.testing import make_landlord
+from core.querybudget import QueryBudgetTestMixin
+from bookings.models import Booking
+from bookings.services import approve_booking, set_booking_status
+from . import geo
+from .cache import DATA_VERSION_KEY
+from .forms import PropertyForm
+from .models import Property, PropertyQuerySet, Apartment, OccupancyMonth
+from .occupancy import month_masks, rebuild_calendar
+from .portfolio import apartment_page, portfolio
+from .services import update_statuses
+from .views import PROPERTIES_PER_PAGE
+
+
+class PropertyStatsQueryTests(TestCase):
+    """with_stats() and the search filters that run on the rollups."""
+
+    @classmethod
+    def setUpTestData(cls):
+        landlord = make_landlord()
+        cls.full, cls.half, cls.flat = (
+            Property.objects.create(landlord=landlord, title=title, property_type=kind, address='Ngong Road')
+            for title, kind in [('Full', 'House'), ('Half', 'House'), ('Flat', 'Apartment')]
+        )
+        for prop, units in [
+            (cls.full, [(30000, 'Occupied'), (50000, 'Occupied')]),
+            (cls.half, [(10000, 'Occupied'), (14000, 'Vacant')]),
+            (cls.flat, [(20000, 'Vacant')]),
+        ]:
+            for rent, status in units:
+                Apartment.objects.create(property=prop, title='Unit', rent=rent, status=status, location='Kilimani')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stats_and_status_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = {
+                p.title: (p.status, p.unit_count, p.vacant_count, p.avg_rent, p.min_rent, p.max_rent)
+                for p in Property.objects.with_stats()
+            }
+        self.assertEqual(rows, {
+            'Full': ('Occupied', 2, 0, 40000, 30000, 50000),
+            'Half': ('Vacant', 2, 1, 12000, 10000, 14000),
+            'Flat': ('Vacant', 1, 1, 20000, 20000, 20000),
+        })
+
+    def test_search_filters(self):
+        def titles(**filters):
+            return set(Property.objects.with_stats().search(**filters).values_list('title', flat=True))
+
+        self.assertEqual(titles(max_price=20000), {'Half', 'Flat'})
+        self.assertEqual(titles(max_price=11999.99), set())
+        self.assertEqual(titles(property_type='house'), {'Full', 'Half'})
+        self.assertEqual(titles(property_type='house', max_price=20000), {'Half'})
+
+    def test_search_view_filters_on_average_rent(self):
+        response = self.client.get(reverse('search_properties'), {'max_price': '20000'})
+        self.assertEqual({r['title'] for r in response.json()['results']}, {'Half', 'Flat'})
+        response = self.client.get(reverse('search_properties'), {'max_price': 'cheap'})
+        self.assertEqual(len(response.json()['results']), 3)
+
+
+class RankedSearchTests(TestCase):
+    """Location searches: relevance order and paging through ranked results."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord()
+
+    def setUp(self):
+        cache.clear()
+
+    def add(self, title, address='1 Ngong Road, Nairobi', **fields):
+        return Property.objects.create(landlord=self.landlord, title=title, property_type='House',
+                                       address=address, **fields)
+
+    def search(self, text):
+        return list(Property.objects.full_text(text).values_list('title', flat=True))
+
+    def test_better_match_ranks_first(self):
+        self.add('Garden Court', description='A short walk from Lavington.')
+        self.add('Lavington Heights')
+        self.add('Riverside Flats')
+        self.assertEqual(self.search('Lavington'), ['Lavington Heights', 'Garden Court'])
+
+        body = self.client.get(reverse('search_properties'), {'location': 'lavington'}).json()
+        self.assertEqual([r['title'] for r in body['results']], ['Lavington Heights', 'Garden Court'])
+
+    def test_stemmed_words_match(self):
+        self.add('Court', description='Furnished apartments with parking.')
+        self.assertEqual(self.search('furnishing'), ['Court'])
+
+    def test_property_save_refreshes_search_vector(self):
+        prop = self.add('Garden Court')
+        self.assertEqual(self.search('Westlands'), [])
+        prop.address = '4 Waiyaki Way, Westlands'
+        prop.save()
+        self.assertEqual(self.search('Westlands'), ['Garden Court'])
+
+    def test_apartment_locations_are_searchable(self):
+        prop = self.add('Garden Court')
+        apartment = Apartment.objects.create(property=prop, title='Unit 1', rent=10000, location='Parklands')
+        self.assertEqual(self.search('Parklands'), ['Garden Court'])
+        apartment.location = 'Runda'
+        apartment.save()
+        self.assertEqual(self.search('Parklands'), [])
+        self.assertEqual(self.search('Runda'), ['Garden Court'])
+
+    def test_misspelt_area_still_matches(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                self.skipTest("pg_trgm is not installed")
+        self.add('Garden Court', address='12 Argwings Kodhek Road, Kilimani, Nairobi')
+        self.add('Riverside Flats', address='3 Riverside Drive, Westlands, Nairobi')
+        self.assertEqual(self.search('Kilimanji'), ['Garden Court'])
+
+    def test_paging_through_tied_ranks_skips_nothing(self):
+        ids = {
+            Property.objects.create(
+                landlord=self.landlord, title=f'Court {i}', property_type='House',
+                address='Kilimani Road, Nairobi', description='quiet' * (i % 3),
+            ).pk
+            for i in range(PROPERTIES_PER_PAGE * 2 + 5)
+        }
+        seen, cursor = [], None
+        for _ in range(10):
+            params = {'location': 'Kilimani'}
+            if cursor:
+                params['cursor'] = cursor
+            body = self.client.get(reverse('search_properties'), params).json()
+            seen += [r['id'] for r in body['results']]
+            cursor = body['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), ids)
+
+
+class SearchPropertiesCachingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.landlord = make_landlord()
+        self.property = Property.objects.create(
+            landlord=self.landlord, title='Riverside Court', property_type='Apartment',
+            address='12 Riverside Drive, Nairobi',
+        )
+        self.apartment = Apartment.objects.create(
+            property=self.property, title='Unit 1', rent=20000, location='Westlands',
+        )
+        self.url = reverse('search_properties')
+
+    def search(self, params=None, **headers):
+        return self.client.get(self.url, params or {'property_type': 'apartment'}, **headers)
+
+    def test_response_carries_validators(self):
+        response = self.search()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertIn('must-revalidate', response['Cache-Control'])
+        self.assertEqual(response.json()['results'][0]['title'], 'Riverside Court')
+
+    def test_equivalent_queries_share_etag(self):
+        first = self.search({'property_type': 'apartment', 'max_price': '25000'})
+        second = self.search({'property_type': ' Apartment ', 'max_price': '25000.0'})
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_matching_etag_returns_304(self):
+        etag = self.search()['ETag']
+        response = self.search(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_validators_survive_version_expiry(self):
+        first = self.search()
+        cache.delete(DATA_VERSION_KEY)  # the token expired; nothing was written
+        with mock.patch('listings.cache.time.time', return_value=time.time() + 600):
+            second = self.search(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['Last-Modified'], first['Last-Modified'])
+
+    async def test_cache_is_not_called_on_the_event_loop(self):
+        def off_loop(method):
+            def call(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    return method(*args, **kwargs)
+                raise AssertionError(f"blocking cache.{method.__name__}() on the event loop")
+            return call
+
+        with mock.patch.multiple(cache, **{name: off_loop(getattr(cache, name)) for name in ('get', 'add', 'set')}):
+            first = await self.async_client.get(self.url, {'property_type': 'apartment'})
+            second = await self.async_client.get(self.url, {'property_type': 'apartment'},
+                                                 headers={'If-None-Match': first['ETag']})
+            bbox = await self.async_client.get(reverse('property_map'), {'bbox': '36,-2,37,-1', 'zoom': '10'})
+        self.assertEqual((first.status_code, second.status_code, bbox.status_code), (200, 304, 200))
+        self.assertEqual(second['Last-Modified'], first['Last-Modified'])
+
+    def test_property_edit_invalidates_cached_response(self):
+        etag = self.search()['ETag']
+
+        self.property.title = 'Riverside Heights'
+        self.property.save()
+
+        response = self.search(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['results'][0]['title'], 'Riverside Heights')
+
+    def test_apartment_rent_change_invalidates_cached_response(self):
+        params = {'max_price': '25000'}
+        self.assertEqual(len(self.search(params).json()['results']), 1)
+
+        self.apartment.rent = 30000
+        self.apartment.save()
+
+        self.assertEqual(self.search(params).json()['results'], [])
+
+    def test_apartment_create_invalidates_cached_response(self):
+        params = {'max_price': '10000'}
+        self.apartment.rent = 5000
+        self.apartment.save()
+        self.assertEqual(len(self.search(params).json()['results']), 1)
+
+        Apartment.objects.create(property=self.property, title='Unit 2', rent=40000, location='Westlands')
+
+        self.assertEqual(self.search(params).json()['results'], [])
+
+    def test_apartment_delete_invalidates_cached_response(self):
+        params = {'max_price': '17000'}
+        cheap = Apartment.objects.create(property=self.property, title='Unit 2', rent=10000, location='Westlands')
+        self.assertEqual(len(self.search(params).json()['results']), 1)  # average rent 15000
+
+        cheap.delete()
+
+        self.assertEqual(self.search(params).json()['results'], [])  # average rent 20000
+
+
+class ListingQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord()
+        cls.properties = Property.objects.bulk_create([
+            Property(landlord=cls.landlord, title=f'Property {i}', property_type='House', address=f'{i} Ngong Road')
+            for i in range(500)
+        ])
+        Apartment.objects.bulk_create([
+            Apartment(property=prop, title=f'Unit {u}', rent=10000 + u, location='Kilimani')
+            for prop in cls.properties[:50] for u in range(5)
+        ])
+        Property.objects.refresh_stats()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.landlord)
+
+    def test_property_list_renders_500_properties_in_5_queries(self):
+        with self.assertMaxQueries(5):
+            response = self.client.get(reverse('property_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_property_list_next_page_within_budget(self):
+        first = self.client.get(reverse('property_list'))
+        response = self.client.get(reverse('property_list'), {'cursor': first.context['page'].next_cursor})
+        self.assertWithinQueryBudget(response)
+
+    def test_property_detail_within_budget(self):
+        response = self.client.get(reverse('property_detail', args=[self.properties[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_search_within_budget(self):
+        response = self.client.get(reverse('search_properties'), {'property_type': 'house', 'max_price': '20000'})
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+
+class AsyncListingViewTests(QueryBudgetTestMixin, TestCase):
+    """The read-only listing views run on the event loop under ASGI."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord(password=None)
+        cls.property = Property.objects.create(
+            landlord=cls.landlord, title='Riverside Court', property_type='House', address='12 Ngong Road',
+        )
+        cls.apartment = Apartment.objects.create(
+            property=cls.property, title='Unit 1', rent=20000, location='Kilimani',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def urls(self):
+        return [
+            reverse('home'),
+            '/',
+            reverse('property_list'),
+            reverse('property_detail', args=[self.property.pk]),
+            reverse('apartment_detail', args=[self.apartment.pk]),
+            reverse('search_properties') + '?property_type=house',
+        ]
+
+    def test_views_are_coroutines(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                self.assertTrue(iscoroutinefunction(resolve(url.split('?')[0]).func))
+
+    async def test_views_under_asgi(self):
+        await self.async_client.aforce_login(self.landlord)
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertWithinQueryBudget(response)
+        response = await self.async_client.get(reverse('property_detail', args=[self.property.pk]))
+        self.assertContains(response, 'Unit 1')
+
+    async def test_anonymous_pages_under_asgi(self):
+        for url in (reverse('home'), '/', reverse('search_properties')):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(reverse('property_detail', args=[self.property.pk]))
+        self.assertEqual(response.status_code, 302)
+
+    async def test_warm_search_is_answered_from_cache(self):
+        url = reverse('search_properties') + '?property_type=house'
+        first = await self.async_client.get(url)
+        self.assertGreater(first.asgi_request.query_stats['count'], 0)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.asgi_request.query_stats['count'], 0)
+        self.assertEqual(json.loads(response.content)['results'][0]['title'], 'Riverside Court')
+
+
+class GeoSearchTests(QueryBudgetTestMixin, TestCase):
+    """Radius and bounding-box search on the geohash index, and map clusters."""
+
+    # Westlands/Kilimani/Karen (Nairobi), Nyali (Mombasa)
+    PLACES = {
+        'Westlands': (-1.2676, 36.8108),
+        'Kilimani': (-1.2921, 36.7856),
+        'Karen': (-1.3194, 36.7073),
+        'Nyali': (-4.0296, 39.7038),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord()
+        cls.props = {
+            name: Property.objects.create(
+                landlord=cls.landlord, title=f'{name} Court', property_type='House',
+                address=f'1 Main Road, {name}', latitude=lat, longitude=lon,
+            )
+            for name, (lat, lon) in cls.PLACES.items()
+        }
+        cls.unplaced = Property.objects.create(
+            landlord=cls.landlord, title='Unplaced', property_type='House', address='Somewhere',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, **params):
+        response = self.client.get(reverse('search_properties'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+        return [r['title'] for r in response.json()['results']]
+
+    def test_encode_matches_reference_geohash(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geo.encode(-1.2921, 36.7856, 5), 'kzf0t')
+        self.assertEqual(self.props['Kilimani'].geohash, geo.encode(-1.2921, 36.7856))
+        self.assertEqual(self.unplaced.geohash, '')
+
+    def test_covering_cells_contain_every_corner(self):
+        bbox = geo.BBox(36.70, -1.33, 36.82, -1.26)
+        cells = geo.covering_cells(bbox)
+        self.assertLessEqual(len(cells), geo.MAX_COVER_CELLS)
+        for lat in (bbox.min_lat, bbox.max_lat):
+            for lon in (bbox.min_lon, bbox.max_lon):
+                self.assertTrue(any(geo.encode(lat, lon).startswith(c) for c in cells))
+
+    def test_geohash_follows_coordinate_changes(self):
+        prop = self.props['Karen']
+        prop.latitude, prop.longitude = self.PLACES['Nyali']
+        prop.save(update_fields=['latitude', 'longitude'])
+        prop.refresh_from_db()
+        self.assertEqual(prop.geohash, geo.encode(*self.PLACES['Nyali']))
+
+    def test_radius_search_orders_by_distance(self):
+        lat, lon = self.PLACES['Kilimani']
+        self.assertEqual(self.search(lat=lat, lon=lon, radius_km=5), ['Kilimani Court', 'Westlands Court'])
+        self.assertEqual(
+            self.search(lat=lat, lon=lon, radius_km=15),
+            ['Kilimani Court', 'Westlands Court', 'Karen Court'],
+        )
+        response = self.client.get(reverse('search_properties'), {'lat': lat, 'lon': lon, 'radius_km': 5})
+        westlands = response.json()['results'][1]
+        self.assertAlmostEqual(westlands['distance_km'], 3.9, delta=0.2)
+
+    def test_radius_search_pages_by_distance(self):
+        lat, lon = self.PLACES['Kilimani']
+        Property.objects.bulk_create([
+            Property(landlord=self.landlord, title=f'Tower {i}', property_type='House', address='Kilimani',
+                     latitude=lat + i / 1000, longitude=lon, geohash=geo.encode(lat + i / 1000, lon))
+            for i in range(1, 30)
+        ])
+        url = reverse('search_properties')
+        first = self.client.get(url, {'lat': lat, 'lon': lon, 'radius_km': 5}).json()
+        second = self.client.get(url, {'lat': lat, 'lon': lon, 'radius_km': 5, 'cursor': first['next_cursor']}).json()
+        distances = [r['distance_km'] for r in first['results'] + second['results']]
+        self.assertEqual(len(distances), 31)
+        self.assertEqual(distances, sorted(distances))
+
+    def test_bbox_search(self):
+        self.assertEqual(
+            sorted(self.search(bbox='36.75,-1.30,36.82,-1.26')),
+            ['Kilimani Court', 'Westlands Court'],
+        )
+        self.assertEqual(self.search(bbox='39.6,-4.1,39.8,-4.0'), ['Nyali Court'])
+
+    def test_invalid_geo_params_are_ignored(self):
+        everything = self.search()
+        self.assertEqual(self.search(lat='x', lon='36.8', radius_km='5'), everything)
+        self.assertEqual(self.search(lat='-1.29', lon='36.78', radius_km='5000'), everything)
+        self.assertEqual(self.search(bbox='36.82,-1.26,36.75,-1.30'), everything)
+
+    def test_map_clusters_by_zoom(self):
+        url = reverse('property_map')
+        kenya = {'bbox': '33.9,-4.7,41.9,5.0'}
+        response = self.client.get(url, {**kenya, 'zoom': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+        clusters = response.json()['clusters']
+        self.assertEqual(sorted(c['count'] for c in clusters), [1, 3])
+        nyali = next(c for c in clusters if c['count'] == 1)
+        self.assertEqual(nyali['id'], self.props['Nyali'].pk)
+
+        clusters = self.client.get(url, {**kenya, 'zoom': 14}).json()['clusters']
+        self.assertEqual(len(clusters), 4)
+        self.assertEqual(sum(c['count'] for c in clusters), 4)
+
+        clusters = self.client.get(url, {**kenya, 'zoom': 5, 'location': 'karen'}).json()['clusters']
+        self.assertEqual([c['id'] for c in clusters], [self.props['Karen'].pk])
+
+    def test_map_requires_bbox_and_zoom(self):
+        url = reverse('property_map')
+        self.assertEqual(self.client.get(url, {'zoom': 5}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'bbox': '33.9,-4.7,41.9,5.0'}).status_code, 400)
+
+    def test_geocode_command_uses_gazetteer(self):
+        placed = Property.objects.create(
+            landlord=self.landlord, title='Lakeside', property_type='House', address='4 Oginga Road, Milimani, Kisumu',
+        )
+        via_unit = Property.objects.create(
+            landlord=self.landlord, title='Ruaka Flats', property_type='House', address='Plot 12',
+        )
+        Apartment.objects.create(property=via_unit, title='Unit 1', rent=9000, location='Ruaka')
+        out = io.StringIO()
+        call_command('geocode_properties', stdout=out)
+        self.assertIn('Placed 2 properties; 1 addresses', out.getvalue())
+
+        placed.refresh_from_db()
+        via_unit.refresh_from_db()
+        self.assertEqual((placed.latitude, placed.longitude), (-0.0976, 34.7616))
+        self.assertEqual(placed.geohash, geo.encode(-0.0976, 34.7616))
+        self.assertEqual(via_unit.latitude, -1.2053)
+        self.props['Karen'].refresh_from_db()
+        self.assertEqual(self.props['Karen'].latitude, self.PLACES['Karen'][0])
+
+    def test_form_needs_both_coordinates(self):
+        data = {'title': 'T', 'property_type': 'House', 'address': 'A', 'latitude': '-1.29'}
+        form = PropertyForm(data)
+        self.assertFalse(form.is_valid())
+        self.assertIn('longitude', form.errors)
+        self.assertTrue(PropertyForm({**data, 'longitude': '36.78'}).is_valid())
+
+
+class AvailabilitySearchTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        landlord = make_landlord()
+        cls.tenant = User.objects.create_user(
+            username='tenant', email='tenant@example.com', password='pass',
+            full_name='Ten Ant', role='TENANT',
+        )
+        prop = Property.objects.create(landlord=landlord, title='Riverside Court', property_type='House', address='Ngong Road')
+        cls.studio, cls.flat, cls.house = Apartment.objects.bulk_create([
+            Apartment(property=prop, title='Studio', rent=15000, bedrooms=1, location='Kilimani'),
+            Apartment(property=prop, title='Flat', rent=30000, bedrooms=2, location='Kilimani'),
+            Apartment(property=prop, title='House', rent=60000, bedrooms=4, location='Karen'),
+        ])
+
+    def approve(self, apartment, start, end):
+        return approve_booking(Booking.objects.create(
+            tenant=self.tenant, apartment=apartment, start_date=start, end_date=end,
+        ))
+
+    def available(self, start, end):
+        return set(Apartment.objects.available_between(start, end).values_list('title', flat=True))
+
+    def test_month_masks(self):
+        self.assertEqual(month_masks(date(2026, 6, 1), date(2026, 6, 3)), [(date(2026, 6, 1), 0b111)])
+        self.assertEqual(month_masks(date(2026, 1, 31), date(2026, 2, 1)), [
+            (date(2026, 1, 1), 1 << 30),
+            (date(2026, 2, 1), 1),
+        ])
+        self.assertEqual(month_masks(date(2028, 2, 1), date(2028, 2, 29)), [(date(2028, 2, 1), (1 << 29) - 1)])
+        self.assertEqual(len(month_masks(date(2026, 11, 15), date(2027, 2, 15))), 4)
+
+    def test_approved_booking_blocks_its_days(self):
+        self.approve(self.flat, date(2026, 6, 10), date(2026, 7, 20))
+        self.assertNotIn('Flat', self.available(date(2026, 7, 20), date(2026, 7, 25)))
+        self.assertNotIn('Flat', self.available(date(2026, 5, 1), date(2026, 6, 10)))
+        self.assertIn('Flat', self.available(date(2026, 7, 21), date(2026, 8, 31)))
+        self.assertIn('Flat', self.available(date(2026, 6, 1), date(2026, 6, 9)))
+        self.assertEqual(self.available(date(2026, 6, 15), date(2026, 6, 16)), {'Studio', 'House'})
+
+    def test_pending_booking_does_not_block(self):
+        Booking.objects.create(tenant=self.tenant, apartment=self.flat,
+                               start_date=date(2026, 6, 1), end_date=date(2026, 6, 30))
+        self.assertIn('Flat', self.available(date(2026, 6, 1), date(2026, 6, 30)))
+
+    def test_cancelling_frees_days(self):
+        booking = self.approve(self.flat, date(2026, 6, 10), date(2026, 6, 20))
+        self.approve(self.flat, date(2026, 6, 21), date(2026, 6, 25))
+        set_booking_status(booking, 'Cancelled')
+        self.assertIn('Flat', self.available(date(2026, 6, 10), date(2026, 6, 20)))
+        self.assertNotIn('Flat', self.available(date(2026, 6, 20), date(2026, 6, 21)))
+
+    def test_deleting_frees_days(self):
+        self.approve(self.flat, date(2026, 6, 10), date(2026, 6, 20)).delete()
+        self.assertIn('Flat', self.available(date(2026, 6, 10), date(2026, 6, 20)))
+
+    def test_open_ended_booking(self):
+        booking = self.approve(self.house, date(2026, 9, 1), None)
+        self.assertIn('House', self.available(date(2026, 8, 1), date(2026, 8, 31)))
+        self.assertNotIn('House', self.available(date(2026, 8, 25), date(2026, 9, 1)))
+        self.assertNotIn('House', self.available(date(2027, 9, 1), date(2027, 9, 2)))
+        set_booking_status(booking, 'Cancelled')
+        self.assertIn('House', self.available(date(2027, 9, 1), date(2027, 9, 2)))
+
+    def test_rebuild_matches_incremental_updates(self):
+        self.approve(self.flat, date(2026, 6, 10), date(2026, 7, 20))
+        self.approve(self.studio, date(2026, 12, 30), date(2027, 1, 2))
+        self.approve(self.house, date(2026, 9, 1), None)
+        expected = set(OccupancyMonth.objects.filter(booked__gt=0).values_list('apartment', 'month', 'booked'))
+        OccupancyMonth.objects.all().delete()
+        Apartment.objects.update(booked_indefinitely_from=None)
+        self.assertEqual(rebuild_calendar(), 3)
+        self.assertEqual(set(OccupancyMonth.objects.values_list('apartment', 'month', 'booked')), expected)
+        self.assertNotIn('House', self.available(date(2026, 10, 1), date(2026, 10, 2)))
+
+    def test_endpoint_filters_and_pages(self):
+        self.approve(self.flat, date(2026, 6, 10), date(2026, 6, 20))
+        url = reverse('search_availability')
+        response = self.client.get(url, {'start': '2026-06-01', 'end': '2026-06-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+        self.assertEqual([r['title'] for r in response.json()['results']], ['Studio', 'House'])
+
+        response = self.client.get(url, {'start': '2026-07-01', 'end': '2026-07-31', 'bedrooms': '2',
+                                         'max_rent': '50000', 'location': 'kilimani'})
+        self.assertEqual([r['title'] for r in response.json()['results']], ['Flat'])
+
+    def test_endpoint_rejects_bad_input(self):
+        url = reverse('search_availability')
+        for params in ({}, {'start': '2026-06-01'}, {'start': '2026-06-10', 'end': '2026-06-01'},
+                       {'start': '2026-01-01', 'end': '2030-01-01'},
+                       {'start': '2026-06-01', 'end': '2026-06-02', 'bedrooms': 'two'},
+                       {'start': '2026-06-01', 'end': '2026-06-02', 'max_rent': 'lots'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
+
+
+class LandlordPortfolioTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord()
+        LandlordProfile.objects.create(user=cls.landlord)
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='pass',
+            full_name='Other Landlord', role='LANDLORD',
+        )
+        cls.properties = Property.objects.bulk_create([
+            Property(landlord=cls.landlord, title=f'Property {i}', property_type='House', address=f'{i} Ngong Road')
+            for i in range(20)
+        ] + [Property(landlord=other, title='Elsewhere', property_type='House', address='Karen')])
+        Apartment.objects.bulk_create([
+            Apartment(property=prop, title=f'Unit {u}', rent=10000, location='Kilimani',
+                      status='Occupied' if u % 3 == 0 else 'Vacant', description='word ' * 5000)
+            for prop in cls.properties for u in range(15)
+        ])
+        cls.empty = Property.objects.create(landlord=cls.landlord, title='New build', property_type='House', address='Syokimau')
+
+    def test_summaries_in_one_query(self):
+        with self.assertNumQueries(1):
+            summaries, totals = portfolio(self.landlord)
+        self.assertEqual(len(summaries), 21)
+        self.assertEqual(summaries[0], self.empty)
+        self.assertEqual((summaries[0].units_total, summaries[0].rent_total), (0, Decimal('0.00')))
+        row = summaries[1]
+        self.assertEqual((row.units_total, row.units_vacant, row.units_occupied), (15, 10, 5))
+        self.assertEqual((row.rent_total, row.rent_occupied, row.rent_vacant),
+                         (Decimal('150000.00'), Decimal('50000.00'), Decimal('100000.00')))
+        self.assertEqual(totals['units_total'], 300)
+        self.assertEqual(totals['units_occupied'], 100)
+        self.assertEqual(totals['rent_total'], Decimal('3000000.00'))
+        self.assertEqual(totals['occupancy_rate'], 33.3)
+
+    def test_apartment_page_defers_text(self):
+        page = apartment_page(self.landlord, status='Vacant')
+        self.assertEqual(len(page), 24)
+        self.assertTrue(page.has_next)
+        apartment = page.object_list[0]
+        self.assertEqual(apartment.get_deferred_fields(), {'description', 'notes'})
+        self.assertEqual(len(apartment.excerpt), 200)
+        self.assertTrue(all(a.status == 'Vacant' for a in page))
+
+    def test_dashboard_within_budget(self):
+        self.client.force_login(self.landlord)
+        response = self.client.get(reverse('landlord_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(len(response.context['properties']), 21)
+        self.assertContains(response, '150000.00')
+        self.assertEqual(len(response.context['apartments']), 24)
+
+
+def make_xlsx(rows):
+    """Minimal single-sheet workbook: header row as shared strings, data inline."""
+    def cell(ref, value):
+        if isinstance(value, (int, float)):
+            return f'<c r="{ref}"><v>{value}</v></c>'
+        return f'<c r="{ref}" t="inlineStr"><is><t>{value}</t></is></c>'
+
+    header, *data = rows
+    main = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    strings = ''.join(f'<si><t>{name}</t></si>' for name in header)
+    sheet_rows = ''.join(f'<c r="{chr(65 + i)}1" t="s"><v>{i}</v></c>' for i in range(len(header)))
+    sheet_rows = f'<row r="1">{sheet_rows}</row>'
+    for n, row in enumerate(data, start=2):
+        sheet_rows += f'<row r="{n}">' + ''.join(
+            cell(f'{chr(65 + i)}{n}', v) for i, v in enumerate(row) if v != ''
+        ) + '</row>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('xl/workbook.xml', (
+            f'<workbook xmlns="{main}" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets><sheet name="Units" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ))
+        archive.writestr('xl/_rels/workbook.xml.rels', (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+            '</Relationships>'
+        ))
+        archive.writestr('xl/sharedStrings.xml', f'<sst xmlns="{main}">{strings}</sst>')
+        archive.writestr('xl/worksheets/sheet1.xml', f'<worksheet xmlns="{main}"><sheetData>{sheet_rows}</sheetData></worksheet>')
+    return buffer.getvalue()
+
+
+class ApartmentSpreadsheetTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord()
+        cls.property = Property.objects.create(landlord=cls.landlord, title='Riverside Court',
+                                               property_type='House', address='Ngong Road')
+        cls.url = reverse('import_apartments', args=[cls.property.pk])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.landlord)
+
+    def upload(self, name, content):
+        if isinstance(content, str):
+            content = content.encode()
+        return self.client.post(self.url, {'file': SimpleUploadedFile(name, content)})
+
+    def test_csv_import(self):
+        rows = ['Title,Unit Number,Bedrooms,Rent,Location,Status']
+        rows += [f'Unit {i},{i},2,{20000 + i},Kilimani,' for i in range(1200)]
+        response = self.upload('units.csv', '\ufeff' + '\n'.join(rows))
+        self.assertRedirects(response, reverse('property_detail', args=[self.property.pk]))
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(self.property.apartments.count(), 1200)
+        self.assertEqual(self.property.apartments.filter(status='Vacant', bedrooms=2).count(), 1200)
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.unit_count, 1200)
+        self.assertEqual(self.property.max_rent, 21199)
+
+    def test_invalid_rows_are_reported_and_nothing_is_saved(self):
+        response = self.upload('units.csv', (
+            'title,rent,location,status\n'
+            'Unit 1,20000,Kilimani,Vacant\n'
+            ',lots,Kilimani,Vacant\n'
+            'Unit 3,20000,Kilimani,Sold\n'
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['error_count'], 2)
+        row, errors = response.context['errors'][0]
+        self.assertEqual(row, 3)
+        self.assertEqual(set(errors), {'title', 'rent'})
+        self.assertEqual(set(response.context['errors'][1][1]), {'status'})
+        self.assertFalse(self.property.apartments.exists())
+
+    def test_unreadable_file(self):
+        response = self.upload('units.xlsx', 'not a zip')
+        self.assertFormError(response.context['form'], 'file', "Could not read the XLSX file: File is not a zip file")
+        response = self.upload('units.csv', 'rent,location\n100,Kilimani\n')
+        self.assertIn('header', response.context['form'].errors['file'][0])
+
+    def test_xlsx_import(self):
+        content = make_xlsx([
+            ['title', 'bedrooms', 'rent', 'location', 'notes'],
+            ['Penthouse', 3, 85000.0, 'Westlands', ''],
+            ['Studio', '', 18000, 'Westlands', 'Ground floor'],
+        ])
+        self.upload('units.xlsx', content)
+        apartments = {a.title: a for a in self.property.apartments.all()}
+        self.assertEqual(apartments['Penthouse'].bedrooms, 3)
+        self.assertEqual(apartments['Penthouse'].rent, 85000)
+        self.assertEqual(apartments['Studio'].bedrooms, 1)
+        self.assertEqual(apartments['Studio'].notes, 'Ground floor')
+
+    def test_other_landlords_cannot_import(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass',
+                                         full_name='Other', role='LANDLORD')
+        self.client.force_login(other)
+        self.assertEqual(self.upload('units.csv', 'title\nUnit\n').status_code, 404)
+
+    def test_export_streams_landlords_units(self):
+        Apartment.objects.create(property=self.property, title='=HYPERLINK("x")', rent=20000, location='Kilimani')
+        Apartment.objects.create(property=self.property, title='Unit 2', rent=21000, location='Kilimani',
+                                 description='Corner unit, "quiet"')
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass',
+                                         full_name='Other', role='LANDLORD')
+        elsewhere = Property.objects.create(landlord=other, title='Elsewhere', property_type='House', address='Karen')
+        Apartment.objects.create(property=elsewhere, title='Not mine', rent=1, location='Karen')
+
+        response = self.client.get(reverse('export_apartments'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertWithinQueryBudget(response)  # pre-stream work only
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content)
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual([r['title'] for r in rows], ['\'=HYPERLINK("x")', 'Unit 2'])
+        self.assertEqual(rows[1]['description'], 'Corner unit, "quiet"')
+        self.assertEqual(rows[1]['property'], 'Riverside Court')
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        await Apartment.objects.acreate(property=self.property, title='Unit 1', rent=20000, location='Kilimani')
+        await self.async_client.aforce_login(self.landlord)
+        response = await self.async_client.get(reverse('export_apartments'))
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual([r['title'] for r in rows], ['Unit 1'])
+
+    def test_export_round_trips_through_import(self):
+        Apartment.objects.create(property=self.property, title='Unit 1', rent=20000, location='Kilimani',
+                                 bedrooms=3, status='Occupied', tenant_name='Jane')
+        exported = b''.join(self.client.get(reverse('export_apartments'), {'property': self.property.pk}).streaming_content)
+        self.upload('units.csv', exported)
+        copies = self.property.apartments.filter(title='Unit 1')
+        self.assertEqual(copies.count(), 2)
+        self.assertEqual(set(copies.values_list('bedrooms', 'status', 'tenant_name', 'rent')), {(3, 'Occupied', 'Jane', 20000)})
+
+
+class PropertyRollupTests(TestCase):
+    """Property unit/occupancy/rent columns follow apartment writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord()
+
+    def setUp(self):
+        self.prop = Property.objects.create(landlord=self.landlord, title='Block', property_type='Apartment',
+                                            address='1 Ngong Road')
+
+    def add(self, prop=None, **fields):
+        fields.setdefault('rent', 10000)
+        return Apartment.objects.create(property=prop or self.prop, title='Unit', location='Kilimani', **fields)
+
+    def rollup(self, prop=None):
+        return Property.objects.values_list(
+            'unit_count', 'occupied_count', 'vacant_count', 'avg_rent', 'min_rent', 'max_rent',
+        ).get(pk=(prop or self.prop).pk)
+
+    def test_create(self):
+        self.assertEqual(self.rollup(), (0, 0, 0, 0, None, None))
+        self.add(rent=10000)
+        self.add(rent=20000, status='Occupied')
+        self.assertEqual(self.rollup(), (2, 1, 1, 15000, 10000, 20000))
+
+    def test_status_and_rent_changes(self):
+        apartment = self.add(rent=10000)
+        apartment.status = 'Occupied'
+        apartment.save()
+        self.assertEqual(self.rollup()[:3], (1, 1, 0))
+        apartment.rent = 12500
+        apartment.save()
+        self.assertEqual(self.rollup()[3:], (12500, 12500, 12500))
+
+    def test_moving_to_another_property_refreshes_both(self):
+        other = Property.objects.create(landlord=self.landlord, title='Annex', property_type='Apartment',
+                                        address='2 Ngong Road')
+        apartment = self.add(rent=30000, status='Occupied')
+        self.add(rent=10000)
+        apartment.property = other
+        apartment.save()
+        self.assertEqual(self.rollup(), (1, 0, 1, 10000, 10000, 10000))
+        self.assertEqual(self.rollup(other), (1, 1, 0, 30000, 30000, 30000))
+
+    def test_unrelated_save_leaves_stats_alone(self):
+        apartment = self.add()
+        with mock.patch.object(PropertyQuerySet, 'refresh_stats') as refresh:
+            apartment.description = 'Top floor'
+            apartment.save()
+        refresh.assert_not_called()
+
+    def test_delete(self):
+        keep = self.add(rent=10000)
+        self.add(rent=50000, status='Occupied').delete()
+        self.assertEqual(self.rollup(), (1, 0, 1, 10000, 10000, 10000))
+        Apartment.objects.filter(pk=keep.pk).delete()
+        self.assertEqual(self.rollup(), (0, 0, 0, 0, None, None))
+
+    def test_bulk_update_then_refresh(self):
+        Apartment.objects.bulk_create([
+            Apartment(property=self.prop, title=f'Unit {i}', rent=10000, location='Kilimani') for i in range(4)
+        ])
+        self.assertEqual(self.rollup()[0], 0)
+        Property.objects.filter(pk=self.prop.pk).refresh_stats()
+        self.assertEqual(self.rollup()[:3], (4, 0, 4))
+
+        apartments = list(Apartment.objects.filter(property=self.prop))
+        for apartment in apartments[:3]:
+            apartment.status = 'Occupied'
+        update_statuses({a.pk: (a.status, 'Tenant') for a in apartments})
+        self.assertEqual(self.rollup()[:3], (4, 3, 1))
+
+    def test_rebuild_verify_reports_stale_rows(self):
+        self.add(rent=10000)
+        stale = Property.objects.create(landlord=self.landlord, title='Annex', property_type='Apartment',
+                                        address='2 Ngong Road')
+        Apartment.objects.bulk_create([Apartment(property=stale, title='Unit', rent=5000, location='Kilimani')])
+
+        with self.assertRaisesMessage(CommandError, f"1 properties have stale stats: [{stale.pk}]"):
+            call_command('rebuild_property_stats', '--verify', stdout=io.StringIO())
+        self.assertEqual(self.rollup(stale)[0], 0)
+
+        call_command('rebuild_property_stats', stdout=io.StringIO())
+        self.assertEqual(self.rollup(stale), (1, 0, 1, 5000, 5000, 5000))
+        out = io.StringIO()
+        call_command('rebuild_property_stats', '--verify', stdout=out)
+        self.assertIn("All 2 properties are up to date.", out.getvalue())
+
+
+class BulkStatusUpdateTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = make_landlord()
+        cls.properties = Property.objects.bulk_create([
+            Property(landlord=cls.landlord, title=f'Block {i}', property_type='Apartment', address=f'{i} Ngong Road')
+            for i in range(3)
+        ])
+        Apartment.objects.bulk_create([
+            Apartment(property=prop, title=f'Unit {u}', rent=10000, location='Kilimani')
+            for prop in cls.properties for u in range(100)
+        ])
+        Property.objects.refresh_stats()
+        cls.url = reverse('bulk_update_apartment_status')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.landlord)
+
+    def test_move_in_day(self):
+        ids = list(Apartment.objects.filter(property__in=self.properties[:2]).values_list('pk', flat=True))
+        data = {'apartment': ids, 'property': self.properties[0].pk}
+        for pk in ids:
+            data[f'status-{pk}'] = 'Occupied'
+            data[f'tenant_name-{pk}'] = f'Tenant {pk}'
+        response = self.client.post(self.url, data)
+        self.assertRedirects(response, reverse('property_detail', args=[self.properties[0].pk]))
+        self.assertWithinQueryBudget(response)
+
+        self.assertEqual(Apartment.objects.filter(status='Occupied').count(), 200)
+        self.assertEqual(Apartment.objects.get(pk=ids[0]).tenant_name, f'Tenant {ids[0]}')
+        counts = dict(Property.objects.values_list('pk', 'occupied_count'))
+        self.assertEqual([counts[p.pk] for p in self.properties], [100, 100, 0])
+
+    def test_vacating_clears_tenant_and_unchanged_rows_are_skipped(self):
+        first, second = Apartment.objects.filter(property=self.properties[0])[:2]
+        update_statuses({first.pk: ('Occupied', 'Jane'), second.pk: ('Occupied', 'John')})
+        self.assertEqual(update_statuses({first.pk: ('Vacant', 'Jane'), second.pk: ('Occupied', 'John')}), 1)
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.tenant_name), ('Vacant', ''))
+        self.properties[0].refresh_from_db()
+        self.assertEqual(self.properties[0].occupied_count, 1)
+
+    def test_other_landlords_units_are_refused(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass',
+                                         full_name='Other', role='LANDLORD')
+        self.client.force_login(other)
+        pk = Apartment.objects.values_list('pk', flat=True).first()
+        response = self.client.post(self.url, {'apartment': [pk], f'status-{pk}': 'Occupied'})
+        self.assertRedirects(response, reverse('landlord_dashboard'), fetch_redirect_response=False)
+        self.assertEqual([str(m) for m in get_messages(response.wsgi_request)],
+                         [f"You can only update your own apartments, not #{pk}."])
+        self.assertFalse(Apartment.objects.filter(status='Occupied').exists())
+
+        response = self.client.get(reverse('property_detail', args=[self.properties[0].pk]))
+        self.assertNotContains(response, self.url)
+        self.client.force_login(self.landlord)
+        response = self.client.get(reverse('property_detail', args=[self.properties[0].pk]))
+        self.assertContains(response, self.url)
+
+    def test_missing_units_are_named(self):
+        pk = Apartment.objects.order_by('pk').values_list('pk', flat=True).last()
+        response = self.client.post(self.url, {'apartment': [pk, pk + 1], f'status-{pk}': 'Occupied',
+                                                f'status-{pk + 1}': 'Occupied'})
+        self.assertEqual([str(m) for m in get_messages(response.wsgi_request)],
+                         [f"These apartments do not exist: #{pk + 1}."])
+        self.assertFalse(Apartment.objects.filter(status='Occupied').exists())
+
+    def test_invalid_status_changes_nothing(self):
+        a, b = Apartment.objects.values_list('pk', flat=True)[:2]
+        response = self.client.post(self.url, {'apartment': [a, b], f'status-{a}': 'Occupied', f'status-{b}': 'Sold'})
+        self.assertRedirects(response, reverse('landlord_dashboard'), fetch_redirect_response=False)
+        self.assertFalse(Apartment.objects.filter(status='Occupied').exists())
 
-# Create your tests here.
+    def test_admin_action(self):
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass',
+                                              full_name='Admin', role='ADMIN')
+        self.client.force_login(admin)
+        ids = list(Apartment.objects.filter(property=self.properties[2]).values_list('pk', flat=True)[:10])
+        response = self.client.post(reverse('admin:listings_apartment_changelist'),
+                                    {'action': 'mark_occupied', '_selected_action': ids})
+        self.assertEqual(response.status_code, 302)
+        self.properties[2].refresh_from_db()
+        self.assertEqual(self.properties[2].occupied_count, 10)
@@ -9,9 +9,14 @@ urlpatterns = [
     path('properties/<int:pk>/edit/', views.edit_property, name='edit_property'),
     path('properties/<int:pk>/delete/', views.delete_property, name='delete_property'),
     path('properties/<int:property_pk>/add_apartment/', views.add_apartment, name='add_apartment'),
+    path('properties/<int:property_pk>/import_apartments/', views.import_apartments, name='import_apartments'),
+    path('apartments/export/', views.export_apartments, name='export_apartments'),
     path('apartments/<int:pk>/edit/', views.edit_apartment, name='edit_apartment'),
     path('apartments/<int:pk>/update_status/', views.update_apartment_status, name='update_apartment_status'),
+    path('apartments/update_status/', views.bulk_update_apartment_status, name='bulk_update_apartment_status'),
     path('search/', views.search_properties, name='search_properties'),
+    path('map/', views.property_map, name='property_map'),
+    path('availability/', views.search_availability, name='search_availability'),
     path('apartment/<int:pk>/', views.apartment_detail, name='apartment_detail'),
 
 ]
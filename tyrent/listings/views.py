@@ -1,75 +1,127 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Avg
-from django.http import JsonResponse
+import asyncio
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.shortcuts import aget_object_or_404, render, get_object_or_404, redirect
+from django.urls import reverse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.views.decorators.cache import cache_control
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_GET, require_POST, require_safe
+from core.csv_export import csv_response
+from core.pagination import CursorPaginator
+from core.renditions import arenditions_for_many
+from core.querybudget import query_budget
+from core.shortcuts import alist, arender, is_asgi
+from core.stats import aget_homepage_stats
+from .cache import SEARCH_CACHE_TIMEOUT, asearch_cache_key, asearch_validators
 from .models import Property, Apartment
-from .forms import PropertyForm, ApartmentForm
+from . import geo
+from .occupancy import parse_period
+from .forms import PropertyForm, ApartmentForm, UploadSpreadsheetForm
+from . import services, spreadsheets
+
+PROPERTIES_PER_PAGE = 24
+AVAILABILITY_PER_PAGE = 24
+MAP_MAX_CLUSTERS = 500
 
 # ---------- HOME VIEW ----------
-def home(request):
+@query_budget(4)
+async def home(request):
     """Homepage with featured properties, stats, and search."""
 
-    # Total stats
-    total_properties = Property.objects.count()
-    total_units = Apartment.objects.count()
-    occupied_units = Apartment.objects.filter(status='Occupied').count()
-    vacant_units = total_units - occupied_units
-
-    occupancy_rate = round((occupied_units / total_units) * 100, 1) if total_units else 0
-    vacancy_rate = 100 - occupancy_rate if total_units else 0
-
-    # Featured properties (first 6)
-    properties = Property.objects.all()[:6]
-
-    # Add average rent to each property
-    for prop in properties:
-        prop.avg_rent = prop.apartments.aggregate(avg_rent=Avg('rent'))['avg_rent'] or 0
-        prop.status = "Vacant" if prop.apartments.filter(status="Vacant").exists() else "Occupied"
+    # Total stats and featured properties, cached until listings change
+    stats, _ = await asyncio.gather(aget_homepage_stats(), request.auser())
 
     context = {
-        'total_properties': total_properties,
-        'total_units': total_units,
-        'occupancy_rate': occupancy_rate,
-        'vacancy_rate': vacancy_rate,
-        'properties': properties,
+        'total_properties': stats['total_properties'],
+        'total_units': stats['total_units'],
+        'occupancy_rate': stats['occupancy_rate'],
+        'vacancy_rate': stats['vacancy_rate'],
+        'properties': stats['featured_properties'],
     }
-    return render(request, 'core/home.html', context)
+    return await arender(request, 'core/home.html', context)
 
 
 # ---------- PROPERTY MANAGEMENT ----------
 
-@login_required
-def property_list(request):
-    """Show all properties or filtered search results."""
-    location = request.GET.get('location', '')
-    property_type = request.GET.get('property_type', '')
-    max_price = request.GET.get('max_price', '')
+def _search_params(request):
+    """
+    Read location/property_type/max_price and the geo filters from the query
+    string, normalized (whitespace collapsed, lower-cased, numbers as floats,
+    coordinates to 5 decimals) so equivalent searches share one cache entry.
+    """
+    max_price = request.GET.get('max_price', '').strip()
+    try:
+        max_price = float(max_price) if max_price else None
+    except ValueError:
+        max_price = None
+    return {
+        'location': ' '.join(request.GET.get('location', '').split()).lower(),
+        'property_type': request.GET.get('property_type', '').strip().lower(),
+        'max_price': max_price,
+        'near': _near_param(request),
+        'bbox': _bbox_param(request),
+    }
 
-    properties = Property.objects.all()
 
-    if location:
-        properties = properties.filter(address__icontains=location)
-    if property_type:
-        properties = properties.filter(property_type__iexact=property_type.capitalize())
-    if max_price:
-        try:
-            max_price = float(max_price)
-            properties = [p for p in properties if (p.apartments.aggregate(avg_rent=Avg('rent'))['avg_rent'] or 0) <= max_price]
-        except ValueError:
-            pass
+def _near_param(request):
+    """[lat, lon, radius_km] from lat/lon/radius_km, or None if absent or invalid."""
+    try:
+        lat, lon, radius_km = (float(request.GET[name]) for name in ('lat', 'lon', 'radius_km'))
+    except (KeyError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180 and 0 < radius_km <= geo.MAX_RADIUS_KM):
+        return None
+    return [round(lat, 5), round(lon, 5), round(radius_km, 3)]
+
+
+def _bbox_param(request):
+    """[min_lon, min_lat, max_lon, max_lat] from bbox, or None if absent or invalid."""
+    try:
+        return [round(value, 5) for value in geo.parse_bbox(request.GET['bbox'])]
+    except (KeyError, ValueError):
+        return None
+
+
+async def _property_page(request, params):
+    """
+    One cursor page of search results: nearest first for a radius search,
+    else ranked when a location is given, else newest first.
+    """
+    properties = Property.objects.with_stats().search(**params)
+    if params['near']:
+        ordering = ('distance_km', 'pk')
+    elif params['location']:
+        ordering = ('-rank', '-pk')
+    else:
+        ordering = ('-date_added', '-pk')
+    paginator = CursorPaginator(properties, ordering, per_page=PROPERTIES_PER_PAGE)
+    return await paginator.apage(request.GET.get('cursor'))
 
-    # Add avg_rent and status
-    for prop in properties:
-        prop.avg_rent = prop.apartments.aggregate(avg_rent=Avg('rent'))['avg_rent'] or 0
-        prop.status = "Vacant" if prop.apartments.filter(status="Vacant").exists() else "Occupied"
 
-    return render(request, 'listings/property_list.html', {
-        'properties': properties,
+@query_budget(6)
+@login_required
+async def property_list(request):
+    """Show all properties or filtered search results."""
+    page = await _property_page(request, _search_params(request))
+
+    return await arender(request, 'listings/property_list.html', {
+        'properties': page,
+        'page': page,
+        'next_query': page.next_query(request) if page.has_next else '',
+        'image_renditions': await arenditions_for_many(p.main_image.name for p in page),
         'user': request.user
     })
 
 
+@query_budget(10)
 @login_required
 def add_property(request):
     """Landlord adds a new property."""
@@ -87,6 +139,7 @@ def add_property(request):
     return render(request, 'listings/property_form.html', {'form': form, 'model_name': 'Property', 'is_edit': False})
 
 
+@query_budget(10)
 @login_required
 def edit_property(request, pk):
     property = get_object_or_404(Property, pk=pk)
@@ -101,6 +154,7 @@ def edit_property(request, pk):
     return render(request, 'listings/property_form.html', {'form': form, 'model_name': 'Property', 'is_edit': True})
 
 
+@query_budget(10)
 @login_required
 def delete_property(request, pk):
     property = get_object_or_404(Property, pk=pk)
@@ -109,21 +163,26 @@ def delete_property(request, pk):
     return redirect('property_list')
 
 
+@query_budget(6)
 @login_required
-def property_detail(request, pk):
-    property = get_object_or_404(Property, pk=pk)
-    apartments = property.apartments.all()
-    property.avg_rent = property.apartments.aggregate(avg_rent=Avg('rent'))['avg_rent'] or 0
-    property.status = "Vacant" if property.apartments.filter(status="Vacant").exists() else "Occupied"
+async def property_detail(request, pk):
+    property, apartments = await asyncio.gather(
+        aget_object_or_404(Property.objects.with_stats(), pk=pk),
+        alist(Apartment.objects.filter(property_id=pk)),
+    )
     context = {
         'property': property,
         'apartments': apartments,
+        'image_renditions': await arenditions_for_many(
+            [property.main_image.name, *(a.image.name for a in apartments)]
+        ),
     }
-    return render(request, 'listings/property_detail.html', context)
+    return await arender(request, 'listings/property_detail.html', context)
 
 
 # ---------- APARTMENT MANAGEMENT ----------
 
+@query_budget(15)
 @login_required
 def add_apartment(request, property_pk):
     property = get_object_or_404(Property, pk=property_pk)
@@ -140,6 +199,7 @@ def add_apartment(request, property_pk):
     return render(request, 'listings/apartment_form.html', {'form': form, 'property': property, 'model_name': 'Apartment', 'is_edit': False})
 
 
+@query_budget(15)
 @login_required
 def edit_apartment(request, pk):
     apartment = get_object_or_404(Apartment, pk=pk)
@@ -154,6 +214,7 @@ def edit_apartment(request, pk):
     return render(request, 'listings/apartment_form.html', {'form': form, 'property': apartment.property, 'model_name': 'Apartment', 'is_edit': True})
 
 
+@query_budget(15)
 @login_required
 def update_apartment_status(request, pk):
     apartment = get_object_or_404(Apartment, pk=pk)
@@ -168,37 +229,247 @@ def update_apartment_status(request, pk):
     return render(request, 'listings/update_apartment_status.html', {'apartment': apartment})
 
 
+@query_budget(12)
 @login_required
-def apartment_detail(request, pk):
-    apartment = get_object_or_404(Apartment, pk=pk)
-    return render(request, 'listings/apartment_detail.html', {'apartment': apartment})
+@require_POST
+def bulk_update_apartment_status(request):
+    """
+    Landlord updates many units at once: the selected `apartment` ids, each
+    with `status-<id>` and `tenant_name-<id>`.
+    """
+    try:
+        ids = [int(pk) for pk in request.POST.getlist('apartment')]
+    except ValueError:
+        ids = None
+    if ids:
+        changes = {
+            pk: (request.POST.get(f'status-{pk}', ''), request.POST.get(f'tenant_name-{pk}', '').strip())
+            for pk in ids
+        }
+        try:
+            updated = services.update_statuses(changes, landlord=request.user)
+        except (ValueError, PermissionDenied) as exc:
+            # Nothing was changed; the message names the rejected ids.
+            messages.error(request, str(exc))
+        else:
+            messages.success(request, f"Updated {updated} of {len(changes)} apartments.")
+    else:
+        messages.error(request, "Select at least one apartment.")
+
+    property_pk = request.POST.get('property', '')
+    if property_pk.isdigit():
+        return redirect('property_detail', pk=int(property_pk))
+    return redirect('landlord_dashboard')
+
+
+@query_budget(4)
+@login_required
+async def apartment_detail(request, pk):
+    apartment = await aget_object_or_404(Apartment.objects.select_related('property'), pk=pk)
+    return await arender(request, 'listings/apartment_detail.html', {'apartment': apartment})
 
 
 # ---------- AJAX SEARCH ----------
-def search_properties(request):
-    location = request.GET.get('location', '')
-    property_type = request.GET.get('property_type', '')
-    max_price = request.GET.get('max_price', '')
+@query_budget(3)
+@require_GET
+@cache_control(public=True, max_age=0, must_revalidate=True)
+async def search_properties(request):
+    """
+    Public JSON search. Responses are cached per normalized query and data
+    version, and carry ETag/Last-Modified so clients revalidate with a 304.
+    Besides the text filters it takes lat/lon/radius_km (km, nearest first)
+    and bbox=min_lon,min_lat,max_lon,max_lat.
+    """
+    params = _search_params(request)
+    cursor = request.GET.get('cursor', '')
+    # Validators are checked here rather than with @condition, whose
+    # callbacks are sync and would block the event loop on the cache.
+    (etag, last_modified), key = await asyncio.gather(
+        asearch_validators(params, cursor), asearch_cache_key(params, cursor),
+    )
+    etag = quote_etag(etag)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _with_validators(not_modified, etag, last_modified)
+
+    body = await cache.aget(key)
+    if body is None:
+        page = await _property_page(request, params)
+        results = []
+        for p in page:
+            result = {
+                'id': p.id,
+                'title': p.title,
+                'location': p.address,
+                'main_image': p.main_image.url if p.main_image else '',
+                'average_rent': p.avg_rent,
+                'latitude': p.latitude,
+                'longitude': p.longitude,
+            }
+            if params['near']:
+                result['distance_km'] = round(p.distance_km, 2)
+            results.append(result)
+        body = json.dumps({'results': results, 'next_cursor': page.next_cursor}, cls=DjangoJSONEncoder)
+        await cache.aset(key, body, SEARCH_CACHE_TIMEOUT)
+
+    return _with_validators(HttpResponse(body, content_type='application/json'), etag, last_modified)
+
+
+def _with_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+@query_budget(1)
+@require_GET
+@cache_control(public=True, max_age=60)
+async def property_map(request):
+    """
+    Map markers for `bbox` at web-map `zoom` (0-20), clustered on the server
+    by geohash cell so the client gets at most MAP_MAX_CLUSTERS points. The
+    search filters (location, property_type, max_price, radius) apply too.
+    A cluster of one carries the property's id and url.
+    """
+    params = _search_params(request)
+    if params['bbox'] is None:
+        return JsonResponse({'error': "bbox must be min_lon,min_lat,max_lon,max_lat"}, status=400)
+    try:
+        zoom = min(max(int(request.GET.get('zoom', '')), 0), geo.MAX_ZOOM)
+    except ValueError:
+        return JsonResponse({'error': "zoom must be a whole number"}, status=400)
+    precision = geo.zoom_precision(zoom)
+
+    key = await asearch_cache_key({**params, 'map_precision': precision})
+    body = await cache.aget(key)
+    if body is None:
+        rows = await alist(Property.objects.search(**params).clusters(precision)[:MAP_MAX_CLUSTERS + 1])
+        clusters = []
+        for row in rows[:MAP_MAX_CLUSTERS]:
+            cluster = {
+                'geohash': row['cell'],
+                'count': row['count'],
+                'latitude': round(row['lat'], 6),
+                'longitude': round(row['lon'], 6),
+            }
+            if row['count'] == 1:
+                cluster['id'] = row['property_id']
+                cluster['url'] = reverse('property_detail', args=[row['property_id']])
+            clusters.append(cluster)
+        body = json.dumps({
+            'zoom': zoom,
+            'precision': precision,
+            'clusters': clusters,
+            'truncated': len(rows) > MAP_MAX_CLUSTERS,
+        })
+        await cache.aset(key, body, SEARCH_CACHE_TIMEOUT)
+
+    return HttpResponse(body, content_type='application/json')
+
+
+# ---------- BULK IMPORT / EXPORT ----------
+
+@query_budget(20)
+@login_required
+def import_apartments(request, property_pk):
+    """Landlord uploads a CSV/XLSX of units for one of their properties."""
+    property = get_object_or_404(Property, pk=property_pk, landlord=request.user)
+    form = UploadSpreadsheetForm()
+    errors, error_count = [], 0
+    if request.method == 'POST':
+        form = UploadSpreadsheetForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                created, errors, error_count = spreadsheets.import_apartments(property, form.cleaned_data['file'])
+            except spreadsheets.SpreadsheetError as exc:
+                form.add_error('file', str(exc))
+            else:
+                if created:
+                    messages.success(request, f"Imported {created} apartments.")
+                    return redirect('property_detail', pk=property.pk)
+                if not error_count:
+                    form.add_error('file', "The file has no apartment rows.")
+                else:
+                    messages.error(request, f"{error_count} rows have errors; nothing was imported.")
+    return render(request, 'listings/apartment_import.html', {
+        'form': form, 'property': property, 'errors': errors, 'error_count': error_count,
+    })
 
-    properties = Property.objects.all()
 
-    if location:
-        properties = properties.filter(address__icontains=location)
-    if property_type:
-        properties = properties.filter(property_type__iexact=property_type.capitalize())
-    if max_price:
+# Covers only the work before streaming starts (session and user). The
+# export query itself runs while the body streams, after the middleware
+# has stopped counting; it is a single query (see ApartmentSpreadsheetTests).
+@query_budget(2)
+@login_required
+@require_safe
+def export_apartments(request):
+    """The landlord's units as CSV, streamed; ?property=<pk> narrows to one property."""
+    apartments = Apartment.objects.filter(property__landlord=request.user)
+    filename = 'apartments.csv'
+    if request.GET.get('property'):
         try:
-            max_price = float(max_price)
-            properties = [p for p in properties if (p.apartments.aggregate(avg_rent=Avg('rent'))['avg_rent'] or 0) <= max_price]
+            property_pk = int(request.GET['property'])
         except ValueError:
-            pass
+            raise Http404("No such property.")
+        apartments = apartments.filter(property_id=property_pk)
+        filename = f'apartments-property-{property_pk}.csv'
+    return csv_response(spreadsheets.export_rows(apartments, asynchronous=is_asgi(request)), filename)
+
+
+# ---------- AVAILABILITY SEARCH ----------
+
+def _decimal_param(request, name):
+    value = request.GET.get(name, '').strip()
+    try:
+        return Decimal(value) if value else None
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+
+
+def _int_param(request, name):
+    value = request.GET.get(name, '').strip()
+    try:
+        return int(value) if value else None
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number")
+
+
+@query_budget(2)
+@require_GET
+def search_availability(request):
+    """
+    Public JSON search for apartments free on every day from `start` to `end`
+    (ISO dates, inclusive), optionally filtered by minimum `bedrooms`,
+    `min_rent`/`max_rent` and `location`. Reads the occupancy calendar, not
+    the Booking table.
+    """
+    try:
+        start, end = parse_period(request.GET.get('start', ''), request.GET.get('end', ''))
+        min_rent = _decimal_param(request, 'min_rent')
+        max_rent = _decimal_param(request, 'max_rent')
+        bedrooms = _int_param(request, 'bedrooms')
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    apartments = Apartment.objects.available_between(start, end).select_related('property')
+    if bedrooms is not None:
+        apartments = apartments.filter(bedrooms__gte=bedrooms)
+    if min_rent is not None:
+        apartments = apartments.filter(rent__gte=min_rent)
+    if max_rent is not None:
+        apartments = apartments.filter(rent__lte=max_rent)
+    location = ' '.join(request.GET.get('location', '').split())
+    if location:
+        apartments = apartments.filter(location__icontains=location)
 
+    page = CursorPaginator(apartments, ('rent', 'pk'), per_page=AVAILABILITY_PER_PAGE).page(request.GET.get('cursor'))
     results = [{
-        'id': p.id,
-        'title': p.title,
-        'location': p.address,
-        'main_image': p.main_image.url if p.main_image else '',
-        'average_rent': p.apartments.aggregate(avg_rent=Avg('rent'))['avg_rent'] or 0,
-    } for p in properties]
-
-    return JsonResponse({'results': results})
+        'id': a.id,
+        'title': a.title,
+        'property': a.property.title,
+        'location': a.location,
+        'bedrooms': a.bedrooms,
+        'rent': a.rent,
+        'url': reverse('apartment_detail', args=[a.pk]),
+    } for a in page]
+    return JsonResponse({'results': results, 'next_cursor': page.next_cursor}, encoder=DjangoJSONEncoder)
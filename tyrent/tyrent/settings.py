@@ -20,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Custom apps
     'accounts',
     'listings',
@@ -29,10 +30,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -69,6 +71,39 @@ DATABASES = {
     }
 }
 
+# Cache (homepage stats). Set REDIS_URL in production so invalidation reaches
+# every worker; without it each process keeps its own local-memory cache.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tyrent',
+        }
+    }
+
+# With a shared cache, sessions are read from it and written through to the
+# DB (a cache flush or restart does not log anyone out), and request.user and
+# its profile are cached too (accounts.middleware.CachedAuthenticationMiddleware).
+# A per-process cache would let other workers keep honouring a logged-out
+# session or a changed password, so auth state then always comes from the DB.
+USER_CACHE_ENABLED = bool(REDIS_URL)
+if USER_CACHE_ENABLED:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+# Per-view SQL query budgets are declared with @query_budget next to each
+# view; entries here ({'url_name': max_queries}) override them.
+QUERY_BUDGETS = {}
+
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -102,6 +137,13 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 # Media files (user uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_CACHE_MAX_AGE = 3600
+
+# Hand media transfers to the front proxy: 'x-accel-redirect' (nginx, which
+# must map MEDIA_ACCEL_REDIRECT_PREFIX to MEDIA_ROOT as an internal location)
+# or 'x-sendfile'. Unset, Django streams the file itself.
+MEDIA_SENDFILE_BACKEND = os.environ.get('MEDIA_SENDFILE_BACKEND') or None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -109,3 +151,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
 
+
+# Outgoing email is queued in core.OutboxEmail and sent by
+# `manage.py send_outbox`, never from a request. Links in emails are built
+# on SITE_URL, since there is no request to take the host from.
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from core.views import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,5 +11,9 @@ urlpatterns = [
     path('bookings/', include('bookings.urls')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Served by Django in development, or in production when the front proxy
+# takes over the transfer via MEDIA_SENDFILE_BACKEND.
+if settings.DEBUG or settings.MEDIA_SENDFILE_BACKEND:
+    urlpatterns += [
+        path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", serve_media, name='media'),
+    ]